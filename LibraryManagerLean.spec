@@ -0,0 +1,82 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Lean build profile of LibraryManager (fast cold start).
+#
+# Unlike LibraryManager.spec it does not use collect_all('mysql'), which copies the whole
+# mysql package (mysql.ai, Django backend, aio stack, all auth plugins) as loose .py files
+# that are compiled again on every start. Here only the pure-Python connector modules
+# reachable from src/main.py are bundled, as pre-compiled bytecode inside the PYZ archive.
+#
+# Build:  pyinstaller LibraryManagerLean.spec
+# Output: dist/LibraryManagerLean/LibraryManager.exe (copy the 'config' and 'data' folders next to it)
+
+# Modules loaded dynamically by mysql.connector (not visible to the import analysis)
+hiddenimports = [
+    'mysql.connector.locales.eng.client_error',
+    'mysql.connector.plugins.mysql_native_password',
+    'mysql.connector.plugins.caching_sha2_password',
+    'mysql.connector.plugins.sha256_password',
+]
+
+# Parts of the mysql distribution the application never uses
+excludes = [
+    'mysql.ai',
+    'mysql.connector.aio',
+    'mysql.connector.django',
+    'mysql.connector.connection_cext',
+    'mysql.connector.cursor_cext',
+    '_mysql_connector',
+    'mysql.connector.plugins.authentication_kerberos_client',
+    'mysql.connector.plugins.authentication_ldap_sasl_client',
+    'mysql.connector.plugins.authentication_oci_client',
+    'mysql.connector.plugins.authentication_openid_connect_client',
+    'mysql.connector.plugins.authentication_webauthn_client',
+    'mysql.connector.plugins.mysql_clear_password',
+    'opentelemetry',
+    'django',
+    'tkinter',
+    'lib2to3',
+    'pydoc_data',
+]
+
+
+a = Analysis(
+    ['src\\main.py'],
+    pathex=['src'],
+    binaries=[],
+    datas=[],
+    hiddenimports=hiddenimports,
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=excludes,
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='LibraryManager',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,  # UPX compressed DLLs have to be unpacked on every start
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='LibraryManagerLean',
+)
@@ -0,0 +1,124 @@
+"""
+Benchmark: requests per second of the HTTP JSON API (src/api_server.py).
+
+Scenarios:
+    list    - GET /books
+    borrow  - POST /loans followed by POST /returns (one borrow/return cycle = 2 requests)
+
+Every client thread keeps one HTTP/1.1 keep-alive connection open for all its requests.
+By default the server is started in-process on a free port; use --url to target a running server.
+--memory runs the same server on the in-memory services, comparing both runs
+separates the application (HTTP, JSON, services) overhead from the database cost.
+
+Usage:
+    python benchmarks/bench_api.py --clients 8 --requests 500
+    python benchmarks/bench_api.py --url http://127.0.0.1:8080 --scenario list
+    python benchmarks/bench_api.py --memory
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+
+def request(conn, method, path, payload=None):
+    """
+    Sends one request on an open keep-alive connection and returns the status code.
+    """
+    body = json.dumps(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body else {}
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def run_client(host, port, scenario, count, member_id, book_id, results):
+    """
+    Client thread: sends 'count' operations over a single connection.
+    """
+    conn = http.client.HTTPConnection(host, port)
+    ok = 0
+    sent = 0
+    for _ in range(count):
+        if scenario == "list":
+            ok += request(conn, "GET", "/books") == 200
+            sent += 1
+        else:
+            ok += request(conn, "POST", "/loans", {"member_id": member_id, "book_id": book_id}) == 201
+            ok += request(conn, "POST", "/returns", {"book_id": book_id}) == 200
+            sent += 2
+    conn.close()
+    results.append((sent, ok))
+
+
+def run_scenario(host, port, scenario, clients, count, member_id, book_ids):
+    """
+    Runs one scenario with concurrent clients and prints the throughput.
+    """
+    results = []
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(host, port, scenario, count, member_id, book_ids[i % len(book_ids)], results),
+        )
+        for i in range(clients)
+    ]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    sent = sum(r[0] for r in results)
+    ok = sum(r[1] for r in results)
+    print(f"{scenario:<7} clients={clients:<3} requests={sent:<7} ok={ok:<7} "
+          f"time={elapsed:6.2f}s  {sent / elapsed:8.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running server (default: start one in-process).")
+    parser.add_argument("--memory", action="store_true",
+                        help="Run the in-process server on the in-memory backend (no database).")
+    parser.add_argument("--scenario", choices=["list", "borrow", "all"], default="all")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive connections.")
+    parser.add_argument("--requests", type=int, default=200, help="Operations per client.")
+    parser.add_argument("--member", type=int, default=1, help="Member ID used for borrowing.")
+    parser.add_argument("--books", default="1,2",
+                        help="Comma separated book IDs used for borrowing (one per client, round robin).")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        from api_server import create_server
+        server = create_server(port=0, quiet=True, backend="memory" if args.memory else None)
+        host, port = server.server_address
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    book_ids = [int(b) for b in args.books.split(",")]
+    scenarios = ["list", "borrow"] if args.scenario == "all" else [args.scenario]
+    try:
+        for scenario in scenarios:
+            # Borrowing the same book concurrently only produces conflicts, use one client per book
+            clients = min(args.clients, len(book_ids)) if scenario == "borrow" else args.clients
+            run_scenario(host, port, scenario, clients, args.requests, args.member, book_ids)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
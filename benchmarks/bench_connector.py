@@ -0,0 +1,88 @@
+"""
+Benchmark: rows per second of BookRepository.get_all_books with the pure Python
+connector and with the C extension (settings.json "connector": "pure" / "c").
+
+With --seed N the books table is first filled with N synthetic books (ISBN prefix 'BENCH-'),
+which are removed again at the end unless --keep is given.
+
+Usage:
+    python benchmarks/bench_connector.py --seed 100000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from db_connection import DatabaseConnection
+from book_repository import BookRepository
+
+
+def seed_books(db, count, chunk=5000):
+    """
+    Inserts 'count' synthetic books using multi-row inserts.
+    """
+    conn = db.connect()
+    cursor = conn.cursor()
+    try:
+        for start in range(0, count, chunk):
+            rows = [(f"Benchmark Book {i}", f"BENCH-{i}", 100.0 + i % 500, None)
+                    for i in range(start, min(start + chunk, count))]
+            cursor.executemany("INSERT INTO books (title, isbn, price, publisher_id) VALUES (%s, %s, %s, %s)", rows)
+            conn.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+
+def remove_seeded_books(db):
+    """
+    Deletes the synthetic books created by seed_books().
+    """
+    conn = db.connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM books WHERE isbn LIKE 'BENCH-%'")
+        conn.commit()
+    finally:
+        cursor.close()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Number of synthetic books to insert first.")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic books after the benchmark.")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per implementation.")
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    repo = BookRepository()
+    if args.seed:
+        seed_books(db, args.seed)
+
+    try:
+        for mode in ("pure", "c"):
+            db.set_connector(mode)
+            if mode == "c" and db.use_pure:
+                print("c      : C extension not available, skipped")
+                continue
+
+            repo.get_all_books()  # warm up (opens the pooled connection)
+            best = None
+            rows = 0
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows = len(repo.get_all_books())
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{mode:<7}: {rows} rows in {best:.3f}s  ->  {rows / best:,.0f} rows/s")
+    finally:
+        if args.seed and not args.keep:
+            remove_seeded_books(db)
+        db.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: borrow/return throughput of LoanService under contention.
+
+Several threads borrow and return the same few books at the same time, which
+produces lock conflicts (deadlocks, lock wait timeouts, 'database is locked').
+The run prints the completed operations per second, the results by outcome and
+the attempt metrics of the TransactionRunner (retries, reconnects, failures).
+
+Usage:
+    python benchmarks/bench_loans.py --threads 8 --books 1,2 --seconds 10
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from db_connection import DatabaseConnection
+from loan_service import LoanService
+from transaction_runner import TransactionRunner
+
+
+def worker(service, member_id, book_ids, deadline, outcomes, lock):
+    """
+    Borrows and returns the books in a loop until the deadline.
+    """
+    local = Counter()
+    i = 0
+    while time.perf_counter() < deadline:
+        book_id = book_ids[i % len(book_ids)]
+        i += 1
+        for message in (service.borrow_book(member_id, book_id), service.return_book(book_id)):
+            local[message.split(":")[0]] += 1
+    with lock:
+        outcomes.update(local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--books", default="1,2", help="Comma separated IDs of the (not borrowed) books used.")
+    parser.add_argument("--member", type=int, default=1, help="ID of the borrowing member.")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    book_ids = [int(book_id) for book_id in args.books.split(",")]
+    service = LoanService()
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    # Transaction log messages of the service are not part of the measurement
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        deadline = time.perf_counter() + args.seconds
+        threads = [threading.Thread(target=worker, args=(service, args.member, book_ids, deadline, outcomes, lock))
+                   for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        for book_id in book_ids:
+            service.return_book(book_id)
+
+    total = sum(outcomes.values())
+    print(f"{args.threads} threads, {len(book_ids)} books: {total} operations in {elapsed:.1f}s"
+          f"  ->  {total / elapsed:,.0f} ops/s")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<20}: {count}")
+    print(f"Transaction attempts: {TransactionRunner.metrics.snapshot()}")
+    DatabaseConnection().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: memory per row and conversion time of Book records vs. dictionaries.
+
+Simulates a listing of N books (default 1,000,000) fetched from a tuple cursor and compares:
+    dict    - what conn.cursor(dictionary=True) produces (one dict per row)
+    record  - models.Book built with models.to_records (named tuple per row)
+
+No database is needed, the rows are generated in memory.
+
+Usage:
+    python benchmarks/bench_records.py --rows 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from models import Book, to_records
+
+COLUMNS = list(Book._fields)
+
+
+def as_dicts(rows):
+    """
+    Equivalent of a dictionary cursor: one dict with repeated keys per row.
+    """
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def measure(name, convert, rows):
+    """
+    Measures conversion time and the memory retained by the converted rows.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = convert(rows)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<7}: {elapsed:6.3f}s  {retained / 1024 / 1024:8.1f} MiB  "
+          f"{retained / len(rows):6.1f} bytes/row (excluding field values)")
+    del result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # Rows as a tuple cursor returns them (values are shared, only the containers are measured)
+    rows = [(i, f"Book {i}", f"978-{i}", 100.0, 1, 1) for i in range(args.rows)]
+
+    measure("dict", as_dicts, rows)
+    measure("record", lambda r: to_records(r, Book), rows)
+
+
+if __name__ == "__main__":
+    main()
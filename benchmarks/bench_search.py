@@ -0,0 +1,126 @@
+"""
+Benchmark: title search latency on a large catalogue.
+
+    prefix    - in-memory TitlePrefixIndex (autocomplete) over N synthetic titles
+    fuzzy     - in-memory TitleTrigramIndex, queries are real titles with one typo
+    fulltext  - BookRepository.search_books (MySQL FULLTEXT index), only with --db
+
+The in-memory benchmarks need no database.
+
+Usage:
+    python benchmarks/bench_search.py --titles 1000000
+    python benchmarks/bench_search.py --db --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from title_index import TitlePrefixIndex, TitleTrigramIndex
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiouy"
+
+
+def make_vocabulary(size, rng):
+    """
+    Generates pronounceable pseudo-words of 4-10 letters (alternating consonants and vowels).
+    """
+    words = set()
+    while len(words) < size:
+        length = rng.randint(4, 10)
+        start = rng.randint(0, 1)
+        words.add("".join(rng.choice(CONSONANTS if (i + start) % 2 == 0 else VOWELS) for i in range(length)))
+    return sorted(words)
+
+
+def synthetic_titles(count, vocabulary, rng):
+    """
+    Generates (book_id, title) pairs made of 2-5 words of the vocabulary.
+    """
+    return [(i, " ".join(rng.choice(vocabulary).capitalize() for _ in range(rng.randint(2, 5))))
+            for i in range(1, count + 1)]
+
+
+def add_typo(text, rng):
+    """
+    Introduces one typo (dropped, doubled, swapped or replaced character).
+    """
+    i = rng.randrange(1, len(text) - 1)
+    kind = rng.choice(("drop", "double", "swap", "replace"))
+    if kind == "drop":
+        return text[:i] + text[i + 1:]
+    if kind == "double":
+        return text[:i] + text[i] + text[i:]
+    if kind == "swap":
+        return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+    return text[:i] + rng.choice("aeiou") + text[i + 1:]
+
+
+def report(name, timings):
+    """
+    Prints latency statistics in milliseconds.
+    """
+    timings = sorted(t * 1000 for t in timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:<9}: queries={len(timings):<6} mean={statistics.mean(timings):8.3f} ms  "
+          f"median={statistics.median(timings):8.3f} ms  p99={p99:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--db", action="store_true", help="Also benchmark the MySQL full-text search.")
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    vocabulary = make_vocabulary(20000, rng)
+    titles = synthetic_titles(args.titles, vocabulary, rng)
+
+    start = time.perf_counter()
+    prefix_index = TitlePrefixIndex(titles)
+    print(f"prefix index built for {len(prefix_index)} titles in {time.perf_counter() - start:.2f}s")
+
+    timings = []
+    for _ in range(args.queries):
+        word = rng.choice(vocabulary)
+        prefix = word[:rng.randint(1, len(word))]
+        start = time.perf_counter()
+        prefix_index.complete(prefix, 10)
+        timings.append(time.perf_counter() - start)
+    report("prefix", timings)
+
+    start = time.perf_counter()
+    trigram_index = TitleTrigramIndex(titles)
+    print(f"trigram index built for {len(trigram_index)} titles in {time.perf_counter() - start:.2f}s")
+
+    timings = []
+    found = 0
+    for _ in range(args.queries):
+        book_id, title = rng.choice(titles)
+        query = add_typo(" ".join(title.split()[:2]), rng)
+        start = time.perf_counter()
+        results = trigram_index.search(query, 10)
+        timings.append(time.perf_counter() - start)
+        found += any(r[0] == book_id for r in results)
+    report("fuzzy", timings)
+    print(f"fuzzy    : intended title among top 10 results in {found / args.queries:.0%} of queries")
+
+    if args.db:
+        from book_repository import BookRepository
+        repo = BookRepository()
+        timings = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            repo.search_books(f"{rng.choice(vocabulary)} {rng.choice(vocabulary)}", 20)
+            timings.append(time.perf_counter() - start)
+        report("fulltext", timings)
+
+
+if __name__ == "__main__":
+    main()
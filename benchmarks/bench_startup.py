@@ -0,0 +1,90 @@
+"""
+Benchmark: cold start time of the application (process launch -> first menu prompt).
+
+Compares the current build (LibraryManager.spec) with the lean build (LibraryManagerLean.spec).
+Each run starts the program, waits until the menu prompt "Select an option:" is printed,
+answers '0' (Exit) and records the elapsed time. The database must be reachable, otherwise
+the time until the connection error message is measured instead (reported as 'no-db').
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 dist/LibraryManager/LibraryManager.exe "python src/main.py"
+"""
+import argparse
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_TARGETS = [
+    os.path.join(ROOT, "dist", "LibraryManager", "LibraryManager.exe"),
+    os.path.join(ROOT, "dist", "LibraryManagerLean", "LibraryManager.exe"),
+]
+
+MENU_PROMPT = b"Select an option:"
+NO_DB_PROMPT = b"Press Enter to exit"
+
+
+def measure(command):
+    """
+    Starts the program once and measures the time until the first menu prompt.
+
+    Returns:
+        tuple[float, str]: Elapsed seconds and outcome ('menu' or 'no-db').
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, cwd=ROOT)
+    output = b""
+    outcome = None
+    while outcome is None:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            break
+        output += chunk
+        if MENU_PROMPT in output:
+            outcome = "menu"
+        elif NO_DB_PROMPT in output:
+            outcome = "no-db"
+    elapsed = time.perf_counter() - start
+
+    try:
+        process.communicate(b"0\n\n", timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+
+    if outcome is None:
+        raise RuntimeError(f"Program exited without showing the menu: {output[-200:]!r}")
+    return elapsed, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="Executables or commands to compare.")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    targets = args.targets or [t for t in DEFAULT_TARGETS if os.path.exists(t)]
+    if not targets:
+        targets = [f'"{sys.executable}" src/main.py']
+
+    print(f"{'Target':<60} {'min':>8} {'median':>8} {'max':>8}  outcome")
+    for target in targets:
+        command = [target] if os.path.exists(target) else shlex.split(target)
+        times = []
+        outcomes = set()
+        for _ in range(args.runs):
+            elapsed, outcome = measure(command)
+            times.append(elapsed)
+            outcomes.add(outcome)
+        print(f"{os.path.relpath(target, ROOT) if os.path.exists(target) else target:<60} "
+              f"{min(times):8.3f} {statistics.median(times):8.3f} {max(times):8.3f}  {','.join(sorted(outcomes))}")
+
+
+if __name__ == "__main__":
+    main()
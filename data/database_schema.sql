@@ -5,6 +5,9 @@
 
 SET FOREIGN_KEY_CHECKS=0;
 
+-- Schema changes made after this base script live in data/migrations (applied by 'library migrate')
+DROP TABLE IF EXISTS schema_migrations;
+
 -- 1. Table: Authors (Simple entity)
 DROP TABLE IF EXISTS authors;
 CREATE TABLE authors (
@@ -0,0 +1,104 @@
+-- DATABASE SCHEMA FOR LIBRARY PROJECT - SQLite version of database_schema.sql
+-- Used by the embedded "sqlite" backend, executed automatically when the database file is created.
+-- Keep in sync with database_schema.sql (same tables, columns, views and test data).
+-- Timestamps are stored in local time, like MySQL DATETIME columns filled by NOW().
+
+PRAGMA foreign_keys = OFF;
+
+-- Schema changes made after this base script live in data/migrations/sqlite (applied by 'library migrate')
+DROP TABLE IF EXISTS schema_migrations;
+DROP VIEW IF EXISTS view_available_books;
+DROP VIEW IF EXISTS view_active_loans;
+
+-- 1. Table: Authors
+DROP TABLE IF EXISTS authors;
+CREATE TABLE authors (
+    author_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100) NOT NULL,
+    birth_date DATE NULL,
+    created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 2. Table: Publishers
+DROP TABLE IF EXISTS publishers;
+CREATE TABLE publishers (
+    publisher_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    website VARCHAR(255) NULL
+);
+
+-- 3. Table: Books
+DROP TABLE IF EXISTS books;
+CREATE TABLE books (
+    book_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title VARCHAR(255) NOT NULL,
+    isbn VARCHAR(20) UNIQUE NOT NULL,
+    price FLOAT NOT NULL,
+    is_active INTEGER DEFAULT 1, -- Bool (1=True, 0=False)
+    publisher_id INTEGER,
+    FOREIGN KEY (publisher_id) REFERENCES publishers(publisher_id)
+);
+
+-- 4. Table: Members (NOCASE like the case-insensitive MySQL collation)
+DROP TABLE IF EXISTS members;
+CREATE TABLE members (
+    member_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    full_name VARCHAR(200) NOT NULL COLLATE NOCASE,
+    email VARCHAR(150) UNIQUE NOT NULL COLLATE NOCASE,
+    membership_type VARCHAR(10) DEFAULT 'BASIC' CHECK (membership_type IN ('BASIC', 'PREMIUM', 'STUDENT')),
+    joined_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
+
+-- 5. Table: Loans
+DROP TABLE IF EXISTS loans;
+CREATE TABLE loans (
+    loan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    loan_date DATETIME DEFAULT (datetime('now', 'localtime')),
+    return_date DATETIME NULL,
+    status VARCHAR(20) DEFAULT 'ACTIVE', -- active, returned, overdue
+    FOREIGN KEY (member_id) REFERENCES members(member_id),
+    FOREIGN KEY (book_id) REFERENCES books(book_id)
+);
+
+-- 6. Table: Book_Authors (M:N Relationship table)
+DROP TABLE IF EXISTS book_authors;
+CREATE TABLE book_authors (
+    book_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    PRIMARY KEY (book_id, author_id),
+    FOREIGN KEY (book_id) REFERENCES books(book_id) ON DELETE CASCADE,
+    FOREIGN KEY (author_id) REFERENCES authors(author_id) ON DELETE CASCADE
+);
+
+-- MySQL creates these indexes implicitly for the foreign keys
+CREATE INDEX idx_books_publisher_id ON books (publisher_id);
+CREATE INDEX idx_loans_member_id ON loans (member_id);
+CREATE INDEX idx_loans_book_id ON loans (book_id);
+CREATE INDEX idx_book_authors_author_id ON book_authors (author_id);
+
+-- View 1: Available Books (Active books that are not currently borrowed)
+CREATE VIEW view_available_books AS
+SELECT b.book_id, b.title, b.isbn, b.price
+FROM books b
+WHERE b.is_active = 1
+AND b.book_id NOT IN (SELECT book_id FROM loans WHERE status = 'ACTIVE');
+
+-- View 2: Active Loans
+CREATE VIEW view_active_loans AS
+SELECT l.loan_id, m.full_name, b.title, l.loan_date
+FROM loans l
+JOIN members m ON l.member_id = m.member_id
+JOIN books b ON l.book_id = b.book_id
+WHERE l.status = 'ACTIVE';
+
+PRAGMA foreign_keys = ON;
+
+-- TEST DATA
+INSERT INTO publishers (name) VALUES ('Penguin Books'), ('O Reilly');
+INSERT INTO authors (first_name, last_name, birth_date) VALUES ('George', 'Orwell', '1903-06-25'), ('Guido', 'van Rossum', '1956-01-31');
+INSERT INTO members (full_name, email, membership_type) VALUES ('Jan Novak', 'jan@test.com', 'STUDENT');
+INSERT INTO books (title, isbn, price, publisher_id) VALUES ('1984', '123-456', 299.50, 1), ('Python Guide', '999-000', 500.00, 2);
+INSERT INTO book_authors (book_id, author_id) VALUES (1, 1), (2, 2);
@@ -0,0 +1,2 @@
+-- Full-text index for relevance search over book titles (BookRepository.search_books)
+ALTER TABLE books ADD FULLTEXT INDEX ft_books_title (title);
@@ -0,0 +1,2 @@
+-- Index for member name prefix search (MemberRepository.search_by_name, LIKE 'prefix%')
+CREATE INDEX idx_members_full_name ON members (full_name);
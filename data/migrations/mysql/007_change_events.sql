@@ -0,0 +1,12 @@
+-- Change feed (transactional outbox): every write of books, publishers, members
+-- and loans inserts a row here in the same transaction. Consumers (caches,
+-- replicas) tail the table by event_id, see ChangeFeed; the primary key is the
+-- only index needed.
+CREATE TABLE change_events (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    entity VARCHAR(30) NOT NULL, -- book, publisher, member, loan
+    entity_id INT NOT NULL,
+    action VARCHAR(20) NOT NULL, -- insert, update, delete
+    payload TEXT NULL, -- JSON
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
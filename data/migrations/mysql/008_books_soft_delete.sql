@@ -0,0 +1,8 @@
+-- Soft delete: BookRepository.delete_book sets is_active = 0 and the time of
+-- withdrawal instead of deleting the row, so the loan history is kept.
+-- purge_inactive_books() removes books withdrawn long ago, with their history.
+ALTER TABLE books ADD COLUMN deactivated_at DATETIME NULL;
+
+-- MySQL has no filtered (partial) indexes: catalogue queries (is_active = 1,
+-- ordered by book_id) and the purge (is_active = 0) read their own range of this index
+CREATE INDEX idx_books_is_active ON books (is_active, book_id);
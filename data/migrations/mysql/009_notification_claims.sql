@@ -0,0 +1,5 @@
+-- Claim (lease) of a batch of notifications by one dispatcher: rows with a
+-- claimed_until in the future are skipped by the other dispatchers, so the API
+-- server's thread and 'library notifications send' never send the same row twice.
+ALTER TABLE notification_outbox ADD COLUMN claimed_by VARCHAR(32) NULL;
+ALTER TABLE notification_outbox ADD COLUMN claimed_until DATETIME NULL;
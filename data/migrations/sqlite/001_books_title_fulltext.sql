@@ -0,0 +1,7 @@
+-- Full-text index for relevance search over book titles (BookRepository.search_books)
+-- SQLite: external content FTS5 table kept in sync with 'books' by triggers
+CREATE VIRTUAL TABLE books_fts USING fts5(title, content='books', content_rowid='book_id');
+INSERT INTO books_fts (books_fts) VALUES ('rebuild');
+CREATE TRIGGER books_fts_insert AFTER INSERT ON books BEGIN INSERT INTO books_fts (rowid, title) VALUES (new.book_id, new.title); END;
+CREATE TRIGGER books_fts_delete AFTER DELETE ON books BEGIN INSERT INTO books_fts (books_fts, rowid, title) VALUES ('delete', old.book_id, old.title); END;
+CREATE TRIGGER books_fts_update AFTER UPDATE OF title ON books BEGIN INSERT INTO books_fts (books_fts, rowid, title) VALUES ('delete', old.book_id, old.title); INSERT INTO books_fts (rowid, title) VALUES (new.book_id, new.title); END;
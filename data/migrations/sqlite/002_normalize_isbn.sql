@@ -0,0 +1,6 @@
+-- ISBNs are stored normalised (no hyphens or spaces, upper-case X) so that
+-- lookups of scanned or typed ISBNs can use the UNIQUE index on 'isbn'.
+-- Two spellings of the same ISBN would violate the UNIQUE index halfway through
+-- the UPDATE: the migration is refused and the duplicates are reported instead.
+-- check: SELECT UPPER(REPLACE(REPLACE(TRIM(isbn), '-', ''), ' ', '')) AS normalised_isbn, GROUP_CONCAT(book_id) AS book_ids FROM books GROUP BY normalised_isbn HAVING COUNT(*) > 1
+UPDATE books SET isbn = UPPER(REPLACE(REPLACE(TRIM(isbn), '-', ''), ' ', ''));
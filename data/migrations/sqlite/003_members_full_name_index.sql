@@ -0,0 +1,3 @@
+-- Index for member name prefix search (MemberRepository.search_by_name, LIKE 'prefix%')
+-- The column uses NOCASE collation, so the case-insensitive LIKE can use the index
+CREATE INDEX idx_members_full_name ON members (full_name);
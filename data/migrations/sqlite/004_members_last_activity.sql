@@ -0,0 +1,5 @@
+-- Last borrowing activity of a member. Loans used to overwrite 'joined_at' on
+-- every borrow; the activity now has its own column, updated at most once per
+-- 'member_activity_interval_seconds' per member (see LoanService).
+ALTER TABLE members ADD COLUMN last_activity_at DATETIME NULL;
+UPDATE members SET last_activity_at = (SELECT MAX(l.loan_date) FROM loans l WHERE l.member_id = members.member_id);
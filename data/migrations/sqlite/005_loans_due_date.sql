@@ -0,0 +1,27 @@
+-- Due date of a loan, set at borrowing from the loan period of the member's
+-- membership type ("loan_days" in settings.json). Existing loans get the
+-- default periods (BASIC 21, PREMIUM 42, STUDENT 28 days).
+ALTER TABLE loans ADD COLUMN due_date DATE NULL;
+UPDATE loans SET due_date = date(loan_date, '+' || (
+    SELECT CASE m.membership_type WHEN 'PREMIUM' THEN 42 WHEN 'STUDENT' THEN 28 ELSE 21 END
+    FROM members m WHERE m.member_id = loans.member_id
+) || ' days');
+
+-- The overdue sweep and report read (status, due_date) ranges only
+CREATE INDEX idx_loans_status_due_date ON loans (status, due_date);
+
+-- Loans marked 'OVERDUE' by the sweep are still borrowed
+DROP VIEW IF EXISTS view_available_books;
+CREATE VIEW view_available_books AS
+SELECT b.book_id, b.title, b.isbn, b.price
+FROM books b
+WHERE b.is_active = 1
+AND b.book_id NOT IN (SELECT book_id FROM loans WHERE status IN ('ACTIVE', 'OVERDUE'));
+
+DROP VIEW IF EXISTS view_active_loans;
+CREATE VIEW view_active_loans AS
+SELECT l.loan_id, m.full_name, b.title, l.loan_date, l.due_date
+FROM loans l
+JOIN members m ON l.member_id = m.member_id
+JOIN books b ON l.book_id = b.book_id
+WHERE l.status IN ('ACTIVE', 'OVERDUE');
@@ -0,0 +1,31 @@
+-- Reservation queue of borrowed books. When a book is returned, LoanService
+-- lends it to the oldest WAITING reservation in the same transaction.
+CREATE TABLE reservations (
+    reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    book_id INTEGER NOT NULL,
+    reserved_at DATETIME DEFAULT (datetime('now', 'localtime')),
+    status VARCHAR(20) DEFAULT 'WAITING', -- waiting, fulfilled, cancelled
+    fulfilled_at DATETIME NULL,
+    FOREIGN KEY (member_id) REFERENCES members(member_id),
+    FOREIGN KEY (book_id) REFERENCES books(book_id)
+);
+
+-- Head of the queue of a book: one index range read, however long the queue is
+CREATE INDEX idx_reservations_queue ON reservations (book_id, status, reservation_id);
+
+-- Notifications written in the same transaction as the change that causes them
+-- (transactional outbox) and sent later by the NotificationOutbox dispatcher.
+CREATE TABLE notification_outbox (
+    notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    kind VARCHAR(30) NOT NULL,
+    payload TEXT NOT NULL, -- JSON
+    created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+    sent_at DATETIME NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (member_id) REFERENCES members(member_id)
+);
+
+-- Unsent notifications in order (sent_at IS NULL)
+CREATE INDEX idx_notification_outbox_pending ON notification_outbox (sent_at, notification_id);
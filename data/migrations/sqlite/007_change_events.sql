@@ -0,0 +1,12 @@
+-- Change feed (transactional outbox): every write of books, publishers, members
+-- and loans inserts a row here in the same transaction. Consumers (caches,
+-- replicas) tail the table by event_id, see ChangeFeed; the primary key is the
+-- only index needed.
+CREATE TABLE change_events (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity VARCHAR(30) NOT NULL, -- book, publisher, member, loan
+    entity_id INTEGER NOT NULL,
+    action VARCHAR(20) NOT NULL, -- insert, update, delete
+    payload TEXT NULL, -- JSON
+    created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+);
@@ -0,0 +1,9 @@
+-- Soft delete: BookRepository.delete_book sets is_active = 0 and the time of
+-- withdrawal instead of deleting the row, so the loan history is kept.
+-- purge_inactive_books() removes books withdrawn long ago, with their history.
+ALTER TABLE books ADD COLUMN deactivated_at DATETIME NULL;
+
+-- Filtered (partial) indexes: catalogue queries (is_active = 1) contain only the
+-- active books, the purge (is_active = 0) only the withdrawn ones
+CREATE INDEX idx_books_active ON books (book_id) WHERE is_active = 1;
+CREATE INDEX idx_books_inactive ON books (deactivated_at) WHERE is_active = 0;
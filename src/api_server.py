@@ -0,0 +1,398 @@
+import json
+import os
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Ensure we can import modules from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from db_connection import DatabaseConnection
+from services import ServiceContainer
+from transaction_runner import TransactionRunner
+
+
+class LibraryApiHandler(BaseHTTPRequestHandler):
+    """
+    HTTP JSON API for the library services (UI Layer for front desk terminals and kiosks).
+
+    Endpoints:
+        GET    /books                   List all books with availability (?authors=1 adds authors).
+        GET    /books/page?after=&limit=  One page of books with authors (keyset pagination).
+        GET    /books/search?q=...      Full-text search in titles.
+        GET    /books/autocomplete?prefix=...  Titles starting with a prefix.
+        GET    /books/fuzzy?q=...       Typo-tolerant title search.
+        GET    /books/isbn/<isbn>       Find a book by ISBN-10/13 (hyphens allowed).
+        POST   /books/isbn-lookup       Resolve many ISBNs at once {"isbns": [...]}.
+        POST   /books                   Add a book {"title", "isbn", "price", "publisher_id"}.
+        DELETE /books/<id>              Delete a book.
+        GET    /publishers              List all publishers.
+        GET    /members?after=&limit=   One page of members (keyset pagination).
+        GET    /members/search?prefix=  Members whose name starts with a prefix.
+        GET    /members/<id>            Find a member by ID.
+        GET    /loans                   List active loans.
+        POST   /loans                   Borrow a book {"member_id", "book_id"} or several {"member_id", "book_ids"}.
+        POST   /returns                 Return a book {"book_id"} (lent to the next reservation, if any).
+        GET    /reservations?book_id=   Waiting reservations in queue order.
+        POST   /reservations            Reserve a borrowed book {"member_id", "book_id"}.
+        DELETE /reservations/<id>       Cancel a waiting reservation.
+        GET    /changes?after=&limit=&wait=  Change events after an event ID (waits up to 'wait' seconds for new ones).
+        GET    /reports/top-borrowers   Borrowing statistics.
+        GET    /reports/overdue         Loans past their due date.
+        GET    /stats                   Connection pool and transaction retry counters.
+        GET    /health                  Database availability (503 while the circuit breaker is open).
+
+    HTTP/1.1 is used, so clients can keep the TCP connection open (keep-alive)
+    for many requests. Each client connection is served by its own thread and
+    database connections come from the shared pool.
+
+    The server also runs the notification outbox dispatcher in a background thread.
+    """
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY every response on
+    # a keep-alive connection waits ~40 ms for the client's delayed ACK (Nagle's algorithm)
+    disable_nagle_algorithm = True
+    # Unread request bodies up to this size are skipped; larger ones close the connection
+    MAX_DISCARD_BYTES = 1024 * 1024
+    server_version = "LibraryManagerAPI/1.0"
+
+    # Services are shared by all handler threads (they keep no per-request state)
+    book_repo = None
+    member_repo = None
+    loan_service = None
+    reservation_service = None
+    report_service = None
+    services = None
+    backend = None
+    quiet = False
+
+    ROUTES = [
+        ("GET", re.compile(r"^/books$"), "list_books"),
+        ("GET", re.compile(r"^/books/page$"), "books_page"),
+        ("GET", re.compile(r"^/books/search$"), "search_books"),
+        ("GET", re.compile(r"^/books/autocomplete$"), "autocomplete"),
+        ("GET", re.compile(r"^/books/fuzzy$"), "fuzzy_search"),
+        ("GET", re.compile(r"^/books/isbn/([0-9Xx-]+)$"), "find_by_isbn"),
+        ("POST", re.compile(r"^/books/isbn-lookup$"), "find_by_isbns"),
+        ("POST", re.compile(r"^/books$"), "add_book"),
+        ("DELETE", re.compile(r"^/books/(\d+)$"), "delete_book"),
+        ("GET", re.compile(r"^/publishers$"), "list_publishers"),
+        ("GET", re.compile(r"^/members$"), "list_members"),
+        ("GET", re.compile(r"^/members/search$"), "search_members"),
+        ("GET", re.compile(r"^/members/(\d+)$"), "get_member"),
+        ("GET", re.compile(r"^/loans$"), "list_loans"),
+        ("POST", re.compile(r"^/loans$"), "borrow_book"),
+        ("POST", re.compile(r"^/returns$"), "return_book"),
+        ("GET", re.compile(r"^/reservations$"), "list_reservations"),
+        ("POST", re.compile(r"^/reservations$"), "reserve_book"),
+        ("DELETE", re.compile(r"^/reservations/(\d+)$"), "cancel_reservation"),
+        ("GET", re.compile(r"^/changes$"), "list_changes"),
+        ("GET", re.compile(r"^/reports/top-borrowers$"), "top_borrowers"),
+        ("GET", re.compile(r"^/reports/overdue$"), "overdue_loans"),
+        ("GET", re.compile(r"^/stats$"), "stats"),
+        ("GET", re.compile(r"^/health$"), "health"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        """
+        Finds the handler method for the request path and sends its result as JSON.
+        """
+        path, _, query = self.path.partition("?")
+        self.query_params = {key: values[-1] for key, values in parse_qs(query).items()}
+        self.body_read = False
+        status, payload = 404, {"error": f"Unknown endpoint {method} {path}"}
+        for route_method, pattern, name in self.ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                try:
+                    status, payload = getattr(self, name)(*match.groups())
+                except (KeyError, TypeError, ValueError) as e:
+                    # Missing fields, wrong types or malformed JSON in the request body
+                    status, payload = 400, {"error": f"Invalid request: {e!r}"}
+                except Exception as e:
+                    status, payload = 500, {"error": f"Unexpected Application Error: {e}"}
+                break
+        self._discard_body()
+        self._send_json(status, payload)
+
+    def _discard_body(self):
+        """
+        Skips a request body the handler did not read (a 404, a GET or DELETE with a body),
+        so the next request on a keep-alive connection starts at its request line.
+        A body that cannot be skipped safely closes the connection instead.
+        """
+        if self.body_read:
+            return
+        if self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self.close_connection = True
+            return
+        if length < 0 or length > self.MAX_DISCARD_BYTES:
+            self.close_connection = True
+        elif length > 0:
+            self.rfile.read(length)
+        self.body_read = True
+
+    def _read_json(self):
+        """
+        Reads and parses the JSON request body.
+
+        Returns:
+            dict: The parsed body (empty dict if there is no body).
+        """
+        length = int(self.headers.get("Content-Length") or 0)
+        if length < 0:
+            raise ValueError("Invalid Content-Length")
+        if length == 0:
+            return {}
+        data = self.rfile.read(length)
+        self.body_read = True
+        body = json.loads(data)
+        if not isinstance(body, dict):
+            raise ValueError("JSON object expected")
+        return body
+
+    def _send_json(self, status, payload):
+        """
+        Sends a JSON response with an explicit Content-Length (required for keep-alive).
+        """
+        body = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _message_response(self, message, success_status=200):
+        """
+        Converts a service result message ("Success: ...", "Error: ...") to a response:
+        404 for an unknown member or book, 409 for other rejected requests and 503 when
+        the database failed.
+
+        Returns:
+            tuple[int, dict]: HTTP status and JSON payload.
+        """
+        if message.startswith("Success"):
+            return success_status, {"message": message}
+        if message.startswith("Error") and message.endswith("does not exist."):
+            return 404, {"error": message}
+        if message.startswith("Error"):
+            return 409, {"error": message}
+        return 503, {"error": message}
+
+    # --- ENDPOINTS ---
+
+    def list_books(self):
+        if self.query_params.get("authors") in ("1", "true"):
+            books = self.book_repo.get_all_books_with_authors(as_dict=True)
+        else:
+            books = self.book_repo.get_all_books(as_dict=True)
+        borrowed_book_ids = set(self.loan_service.get_borrowed_book_ids())
+        return 200, [
+            {**b, "status": "BORROWED" if b['book_id'] in borrowed_book_ids else "AVAILABLE"}
+            for b in books
+        ]
+
+    def books_page(self):
+        after_id = int(self.query_params.get("after", 0))
+        limit = min(int(self.query_params.get("limit", 100)), 1000)
+        books = self.book_repo.get_books_with_authors(after_id, limit, as_dict=True)
+        next_after = books[-1]["book_id"] if len(books) == limit else None
+        return 200, {"books": books, "next_after": next_after}
+
+    def search_books(self):
+        limit = int(self.query_params.get("limit", 20))
+        return 200, self.book_repo.search_books(self.query_params["q"], limit, as_dict=True)
+
+    def autocomplete(self):
+        limit = int(self.query_params.get("limit", 10))
+        suggestions = self.book_repo.autocomplete(self.query_params["prefix"], limit)
+        return 200, [{"book_id": book_id, "title": title} for book_id, title in suggestions]
+
+    def fuzzy_search(self):
+        limit = int(self.query_params.get("limit", 10))
+        matches = self.book_repo.fuzzy_search(self.query_params["q"], limit)
+        return 200, [{"book_id": book_id, "title": title, "similarity": similarity}
+                     for book_id, title, similarity in matches]
+
+    def find_by_isbn(self, isbn):
+        book = self.book_repo.find_by_isbn(isbn, as_dict=True)
+        if book is None:
+            return 404, {"error": f"No book with ISBN {isbn}."}
+        return 200, book
+
+    def find_by_isbns(self):
+        isbns = self._read_json()["isbns"]
+        if not isinstance(isbns, list):
+            raise ValueError("'isbns' must be a list")
+        return 200, self.book_repo.find_by_isbns([str(isbn) for isbn in isbns], as_dict=True)
+
+    def add_book(self):
+        data = self._read_json()
+        new_id = self.book_repo.add_book(
+            data["title"], data["isbn"], float(data["price"]), int(data["publisher_id"])
+        )
+        if new_id is None:
+            return 409, {"error": "Failed to add book."}
+        return 201, {"book_id": new_id}
+
+    def delete_book(self, book_id):
+        if self.book_repo.delete_book(int(book_id)):
+            return 200, {"message": f"Book ID {book_id} withdrawn from the catalogue."}
+        return 409, {"error": "Failed to withdraw book (unknown or already withdrawn)."}
+
+    def list_publishers(self):
+        return 200, self.book_repo.get_all_publishers(as_dict=True)
+
+    def list_members(self):
+        after_id = int(self.query_params.get("after", 0))
+        limit = min(int(self.query_params.get("limit", 100)), 1000)
+        return 200, self.member_repo.list_members(after_id, limit, as_dict=True)
+
+    def search_members(self):
+        limit = int(self.query_params.get("limit", 20))
+        return 200, self.member_repo.search_by_name(self.query_params["prefix"], limit, as_dict=True)
+
+    def get_member(self, member_id):
+        member = self.member_repo.get_by_id(int(member_id), as_dict=True)
+        if member is None:
+            return 404, {"error": f"Member ID {member_id} not found."}
+        return 200, member
+
+    def list_loans(self):
+        return 200, self.loan_service.get_active_loans(as_dict=True)
+
+    def borrow_book(self):
+        data = self._read_json()
+        if "book_ids" in data:
+            results = self.loan_service.borrow_books(int(data["member_id"]), [int(b) for b in data["book_ids"]])
+            ok = all(message.startswith("Success") for message in results.values())
+            return (201 if ok else 409), {'results': [{'book_id': book_id, 'message': message}
+                                                      for book_id, message in results.items()]}
+        message = self.loan_service.borrow_book(int(data["member_id"]), int(data["book_id"]))
+        return self._message_response(message, success_status=201)
+
+    def return_book(self):
+        data = self._read_json()
+        return self._message_response(self.loan_service.return_book(int(data["book_id"])))
+
+    def list_reservations(self):
+        book_id = self.query_params.get("book_id")
+        return 200, self.reservation_service.get_waiting_reservations(
+            int(book_id) if book_id is not None else None, as_dict=True
+        )
+
+    def reserve_book(self):
+        data = self._read_json()
+        message = self.reservation_service.reserve_book(int(data["member_id"]), int(data["book_id"]))
+        return self._message_response(message, success_status=201)
+
+    def cancel_reservation(self, reservation_id):
+        return self._message_response(self.reservation_service.cancel_reservation(int(reservation_id)))
+
+    def list_changes(self):
+        skipped = [int(event_id) for event_id in self.query_params.get("skipped", "").split(",") if event_id]
+        feed = self.services.change_feed(int(self.query_params.get("after", 0)), skipped)
+        limit = min(int(self.query_params.get("limit", 500)), 5000)
+        deadline = time.monotonic() + min(float(self.query_params.get("wait", 0)), 30)
+        events = feed.poll(limit, as_dict=True)
+        # Long polling: a consumer that is up to date gets new events as soon as they are committed
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.1)
+            events = feed.poll(limit, as_dict=True)
+        return 200, {"events": events, "last_id": feed.last_id, "skipped": sorted(feed.skipped),
+                     "lost": feed.lost_ids}
+
+    def top_borrowers(self):
+        return 200, self.report_service.get_top_borrowers(as_dict=True)
+
+    def overdue_loans(self):
+        return 200, self.report_service.get_overdue_loans(as_dict=True)
+
+    def health(self):
+        if self.backend == 'memory':
+            return 200, {'status': 'ok', 'databases': {}}
+        db = DatabaseConnection()
+        status = 'ok' if db.available else 'unavailable'
+        return (200 if db.available else 503), {'status': status, 'databases': db.health()}
+
+    def stats(self):
+        return 200, {
+            'pools': DatabaseConnection().pool_stats(),
+            'transactions': TransactionRunner.metrics.snapshot(),
+        }
+
+
+def create_server(host="127.0.0.1", port=8080, quiet=False, backend=None):
+    """
+    Creates the threaded API server (one thread per client connection).
+
+    Args:
+        host (str): Interface to listen on.
+        port (int): TCP port (0 = pick a free port).
+        quiet (bool): Disable the per-request access log.
+        backend (str): Override the 'backend' setting (e.g. 'memory' for load tests without a database).
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet started.
+    """
+    services = ServiceContainer()
+    services.backend = backend
+    LibraryApiHandler.book_repo = services.book_repo
+    LibraryApiHandler.member_repo = services.member_repo
+    LibraryApiHandler.loan_service = services.loan_service
+    LibraryApiHandler.reservation_service = services.reservation_service
+    LibraryApiHandler.report_service = services.report_service
+    LibraryApiHandler.services = services
+    LibraryApiHandler.backend = services.backend_name
+    LibraryApiHandler.quiet = quiet
+
+    server = ThreadingHTTPServer((host, port), LibraryApiHandler)
+    server.daemon_threads = True
+    server.notification_outbox = services.notification_outbox
+    return server
+
+
+def serve(host="127.0.0.1", port=8080, quiet=False):
+    """
+    Runs the API server until interrupted (Ctrl+C).
+    """
+    server = create_server(host, port, quiet)
+    message = LibraryApiHandler.services.migration_service.check_schema()
+    if message:
+        print(message)
+        server.server_close()
+        return
+    print(f"Library API listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    server.notification_outbox.start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping API server.")
+    finally:
+        server.notification_outbox.stop()
+        server.server_close()
+        DatabaseConnection().shutdown()
+
+
+if __name__ == "__main__":
+    serve()
@@ -4,27 +4,17 @@ import os
 # Ensure we can import modules from the same directory
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from db_connection import DatabaseConnection
-from book_repository import BookRepository
-from loan_service import LoanService
-from import_service import ImportService
-from reporting_service import ReportingService
+from services import ServiceContainer
 
 
-class LibraryApp:
+class LibraryApp(ServiceContainer):
     """
     Main Application Controller.
     Handles the menu loop and user interactions (UI Layer).
-    """
 
-    def __init__(self):
-        """
-        Initializes the application by instantiating all necessary services and repositories.
-        """
-        self.book_repo = BookRepository()
-        self.loan_service = LoanService()
-        self.import_service = ImportService()
-        self.report_service = ReportingService()
+    Services and repositories (book_repo, member_repo, loan_service, import_service, report_service)
+    are inherited from ServiceContainer and created on first use.
+    """
 
     def print_menu(self):
         """
@@ -33,6 +23,10 @@ class LibraryApp:
         print("\n" + "=" * 30)
         print("   LIBRARY MANAGER v1.1")
         print("=" * 30)
+        status = self.database_status()
+        if status:
+            print(status)
+            print("-" * 30)
         print("1. List All Books (with Availability)")
         print("2. Add New Book")
         print("3. Borrow a Book (Transaction)")
@@ -41,20 +35,48 @@ class LibraryApp:
         print("6. Generate Statistics Report")
         print("7. Delete a Book")
         print("8. Return a Book")
+        print("9. Search Books")
+        print("10. Reserve a Borrowed Book")
         print("0. Exit")
         print("-" * 30)
 
+    def database_status(self):
+        """
+        Returns a warning line while the database is unavailable (circuit breaker open), otherwise None.
+        """
+        if self.backend_name == 'memory':
+            return None
+        from db_connection import DatabaseConnection
+        breaker = DatabaseConnection().health().get('primary')
+        if not breaker or breaker['state'] == 'CLOSED':
+            return None
+        if breaker['state'] == 'HALF_OPEN':
+            return "DATABASE: reconnecting..."
+        return f"DATABASE OFFLINE (next attempt in {breaker['retry_in']:.0f}s)"
+
     def run(self):
         """
         Starts the main application loop.
         It handles database connection verification and user input processing.
         """
-        # Initial DB Check
+        from db_connection import DatabaseConnection
+
+        # Initial DB Check (the in-memory backend needs no database)
         db = DatabaseConnection()
-        if not db.connect():
-            print("CRITICAL ERROR: Cannot connect to database. Check config/settings.json.")
-            input("Press Enter to exit...")
-            return
+        if self.backend_name != 'memory':
+            if not db.connect():
+                print("CRITICAL ERROR: Cannot connect to database. Check config/settings.json.")
+                input("Press Enter to exit...")
+                return
+            db.close()
+            message = self.migration_service.check_schema()
+            if message:
+                print(message)
+                input("Press Enter to exit...")
+                return
+
+        # Notifications (e.g. reserved books ready for pickup) are sent in the background
+        self.notification_outbox.start()
 
         while True:
             self.print_menu()
@@ -77,8 +99,14 @@ class LibraryApp:
                     self.delete_book_ui()
                 elif choice == '8':
                     self.return_book_ui()
+                elif choice == '9':
+                    self.search_books_ui()
+                elif choice == '10':
+                    self.reserve_book_ui()
                 elif choice == '0':
                     print("Exiting application. Goodbye!")
+                    self.notification_outbox.stop()
+                    db.shutdown()
                     break
                 else:
                     print("Invalid choice, please try again.")
@@ -107,12 +135,12 @@ class LibraryApp:
 
         for b in books:
             # Determine status based on loans
-            if b['book_id'] in borrowed_book_ids:
+            if b.book_id in borrowed_book_ids:
                 status = "BORROWED"
             else:
                 status = "AVAILABLE"
 
-            print(f"{b['book_id']:<4} | {b['title']:<30} | {b['price']:<10.2f} | {status}")
+            print(f"{b.book_id:<4} | {b.title:<30} | {b.price:<10.2f} | {status}")
 
     def add_book_ui(self):
         """
@@ -123,7 +151,7 @@ class LibraryApp:
         print("Available Publishers:")
         publishers = self.book_repo.get_all_publishers()
         for p in publishers:
-            print(f" ID {p['publisher_id']}: {p['name']}")
+            print(f" ID {p.publisher_id}: {p.name}")
         print("-" * 20)
 
         try:
@@ -142,15 +170,24 @@ class LibraryApp:
 
     def borrow_book_ui(self):
         """
-        UI for borrowing a book. Collects IDs and calls the service.
+        UI for borrowing a book. Resolves the member, collects the book ID and calls the service.
         """
         print("\n--- Borrow Book ---")
         try:
-            member_id = int(input("Member ID (e.g., 1): "))
+            member_input = input("Member ID or e-mail (e.g., 1): ").strip()
+            if "@" in member_input:
+                member = self.member_repo.get_by_email(member_input)
+            else:
+                member = self.member_repo.get_by_id(int(member_input))
+            if member is None:
+                print(f"Error: Member '{member_input}' not found.")
+                return
+            print(f"Member: {member.full_name} ({member.membership_type})")
+
             book_id = int(input("Book ID to borrow: "))
 
             print("Processing transaction...")
-            message = self.loan_service.borrow_book(member_id, book_id)
+            message = self.loan_service.borrow_book(member.member_id, book_id)
             print(f"Result: {message}")
         except ValueError:
             print("Error: IDs must be numbers.")
@@ -167,6 +204,18 @@ class LibraryApp:
         except ValueError:
             print("Error: ID must be a number.")
 
+    def reserve_book_ui(self):
+        """
+        UI for joining the reservation queue of a borrowed book.
+        """
+        print("\n--- Reserve Book ---")
+        try:
+            member_id = int(input("Member ID: "))
+            book_id = int(input("Book ID to reserve: "))
+            print(self.reservation_service.reserve_book(member_id, book_id))
+        except ValueError:
+            print("Error: IDs must be numbers.")
+
     def show_loans(self):
         """
         UI to display currently active loans.
@@ -176,7 +225,7 @@ class LibraryApp:
         if not loans:
             print("No active loans.")
         for l in loans:
-            print(f"Loan [{l['loan_id']}] | {l['full_name']} has '{l['title']}' (since {l['loan_date']})")
+            print(f"Loan [{l.loan_id}] | {l.full_name} has '{l.title}' (since {l.loan_date}, due {l.due_date})")
 
     def import_csv_ui(self):
         """
@@ -192,6 +241,7 @@ class LibraryApp:
         UI for displaying statistics.
         """
         print(self.report_service.generate_top_borrowers_report())
+        print(self.report_service.generate_overdue_report())
 
     def delete_book_ui(self):
         """
@@ -203,10 +253,43 @@ class LibraryApp:
             confirm = input(f"Are you sure you want to delete book {book_id}? (yes/no): ")
             if confirm.lower() == 'yes':
                 if self.book_repo.delete_book(book_id):
-                    print("Book deleted successfully.")
+                    print("Book withdrawn from the catalogue (kept in the loan history).")
                 else:
-                    print("Failed to delete book (maybe ID does not exist).")
+                    print("Failed to delete book (maybe ID does not exist or it is already withdrawn).")
             else:
                 print("Deletion cancelled.")
         except ValueError:
-            print("Error: ID must be a number.")
\ No newline at end of file
+            print("Error: ID must be a number.")
+
+    def search_books_ui(self):
+        """
+        UI for searching books by title.
+        Shows relevance (full-text) results, or title suggestions (prefix, then typo-tolerant) if nothing matches.
+        """
+        print("\n--- Search Books ---")
+        text = input("Search title: ").strip()
+        if not text:
+            return
+
+        books = self.book_repo.search_books(text)
+        if books:
+            print(f"{'ID':<4} | {'Title':<30} | {'Price':<10}")
+            print("-" * 50)
+            for b in books:
+                print(f"{b.book_id:<4} | {b.title:<30} | {b.price:<10.2f}")
+            return
+
+        suggestions = self.book_repo.autocomplete(text)
+        if suggestions:
+            print("No exact matches. Titles starting with your text:")
+            for book_id, title in suggestions:
+                print(f" ID {book_id}: {title}")
+            return
+
+        similar = self.book_repo.fuzzy_search(text)
+        if not similar:
+            print("No books found.")
+            return
+        print("No exact matches. Did you mean:")
+        for book_id, title, _ in similar:
+            print(f" ID {book_id}: {title}")
@@ -0,0 +1,287 @@
+import functools
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+
+try:
+    import mysql.connector
+except ImportError:  # SQLite-only installation
+    mysql = None
+
+from settings import get_base_dir
+
+# Errors raised by any of the supported database drivers. Services catch this
+# tuple instead of a driver specific class, so they work with every backend.
+DatabaseError = (sqlite3.Error,) + ((mysql.connector.Error,) if mysql else ())
+# Constraint violations (foreign key, unique, not null) of any driver
+IntegrityError = (sqlite3.IntegrityError,) + ((mysql.connector.IntegrityError,) if mysql else ())
+
+
+class MySQLBackend:
+    """
+    MySQL server backend (mysql-connector-python), the default.
+    """
+    name = 'mysql'
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): The 'database' section of settings.json.
+        """
+        self.config = config
+        self.use_pure = self.select_connector(config.get('connector', 'auto'))
+
+    def select_connector(self, mode):
+        """
+        Decides which implementation of the MySQL protocol is used.
+
+        Args:
+            mode (str): 'auto' (C extension if available), 'c' (C extension) or 'pure' (pure Python).
+
+        Returns:
+            bool: True for the pure Python implementation, False for the C extension.
+        """
+        if mode not in ('auto', 'c', 'pure'):
+            print(f"Warning: Unknown connector '{mode}' in settings.json, using 'auto'.")
+            mode = 'auto'
+
+        if mode == 'pure':
+            return True
+
+        # The pure Python implementation is required for compatibility with PyInstaller (EXE builds)
+        if getattr(sys, 'frozen', False):
+            return True
+
+        if not mysql.connector.HAVE_CEXT:
+            if mode == 'c':
+                print("Warning: MySQL C extension is not available, using the pure Python connector.")
+            return True
+        return False
+
+    def connect(self, server=None):
+        """
+        Opens a brand new connection to the MySQL server.
+
+        Args:
+            server (dict): Settings of another server (e.g. a read replica) overriding
+                host, port, user, password or database of the primary.
+
+        Returns:
+            mysql.connector.connection.MySQLConnection: A new database connection
+            (CMySQLConnection when the C extension is used).
+        """
+        config = {**self.config, **(server or {})}
+        return mysql.connector.connect(
+            host=config['host'],
+            port=config.get('port', 3306),
+            user=config['user'],
+            password=config['password'],
+            database=config['database'],
+            use_pure=self.use_pure
+        )
+
+
+class SQLiteBackend:
+    """
+    Embedded SQLite backend for single-desk (offline) installations and tests.
+
+    The database is a single file (no server, opening a connection costs
+    microseconds). It is created from 'data/database_schema_sqlite.sql' on first
+    start. Connections use WAL journaling (readers do not block the writer) and
+    memory-mapped I/O.
+    """
+    name = 'sqlite'
+    SCHEMA_FILE = 'database_schema_sqlite.sql'
+
+    def __init__(self, config):
+        """
+        Args:
+            config (dict): The 'database' section of settings.json ('sqlite' sub-section is used).
+        """
+        sqlite_config = config.get('sqlite', {})
+        path = sqlite_config.get('path', 'data/library.db')
+        self.in_memory = path == ':memory:'
+        if self.in_memory:
+            # Shared in-memory database, visible to all pooled connections of the process
+            self.path = f"file:library-{id(self)}?mode=memory&cache=shared"
+        else:
+            self.path = path if os.path.isabs(path) else os.path.join(get_base_dir(), path)
+        self.mmap_size = int(sqlite_config.get('mmap_size_mb', 256)) * 1024 * 1024
+        self.busy_timeout = float(sqlite_config.get('busy_timeout', 5.0))
+        self._keeper = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """
+        Opens a new connection to the database file, creating the schema if the file is new.
+
+        Returns:
+            SQLiteConnection: A connection with the interface of a MySQL connection.
+        """
+        with self._lock:
+            is_new = self.in_memory and self._keeper is None or not self.in_memory and not os.path.exists(self.path)
+            conn = sqlite3.connect(
+                self.path, uri=self.in_memory, timeout=self.busy_timeout,
+                detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+            )
+            if self.in_memory and self._keeper is None:
+                # The in-memory database lives only while a connection to it is open
+                self._keeper = conn
+                conn = sqlite3.connect(self.path, uri=True, timeout=self.busy_timeout,
+                                       detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+            self._configure(conn)
+            if is_new:
+                self._create_schema(conn)
+        return SQLiteConnection(conn)
+
+    def _configure(self, conn):
+        """
+        Applies per-connection settings.
+        """
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")  # durable with WAL, fsync only at checkpoints
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+    def _create_schema(self, conn):
+        """
+        Creates tables, views and test data of a new database.
+        """
+        schema_path = os.path.join(get_base_dir(), 'data', self.SCHEMA_FILE)
+        with open(schema_path, mode='r', encoding='utf-8') as schema_file:
+            conn.executescript(schema_file.read())
+        conn.commit()
+        location = "in memory" if self.in_memory else self.path
+        print(f"Created SQLite database {location}. Run 'library migrate' to apply migrations.")
+
+
+class SQLiteConnection:
+    """
+    Adapter giving a sqlite3 connection the interface of a MySQL connection
+    (cursor, commit, rollback, autocommit, in_transaction), so repositories and
+    services work with both backends without changes.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    @property
+    def autocommit(self):
+        return self._conn.isolation_level is None
+
+    @autocommit.setter
+    def autocommit(self, value):
+        # Like MySQL, transactions are started implicitly by the first write
+        # and must be committed unless autocommit is enabled.
+        if value != self.autocommit:
+            self._conn.isolation_level = None if value else "DEFERRED"
+
+    def is_connected(self):
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+
+class SQLiteCursor:
+    """
+    Cursor adapter translating the MySQL flavoured SQL used by the services to SQLite.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def translate(query):
+        """
+        Converts a MySQL query to SQLite: '%s' placeholders to '?', NOW() to the local
+        time (as in MySQL) and removes row locking ('FOR UPDATE', SQLite locks the whole database).
+        """
+        query = query.replace("%s", "?")
+        query = re.sub(r"\bNOW\(\)", "datetime('now', 'localtime')", query, flags=re.IGNORECASE)
+        return re.sub(r"\s+FOR\s+UPDATE\b", "", query, flags=re.IGNORECASE)
+
+    def execute(self, query, params=()):
+        self._cursor.execute(self.translate(query), tuple(params))
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(self.translate(query), seq_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+# DATETIME/DATE columns are returned as datetime/date objects, as with MySQL
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", timespec="seconds"))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+
+BACKENDS = {
+    'mysql': MySQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def create_backend(config):
+    """
+    Creates the backend selected by the 'backend' setting ('mysql' or 'sqlite').
+    The 'memory' backend needs no connection, None is returned.
+
+    Args:
+        config (dict): The 'database' section of settings.json.
+
+    Returns:
+        object: The backend, or None if it cannot be used.
+    """
+    name = config.get('backend', 'mysql')
+    if name == 'memory':
+        # Served by memory_backend.py (see ServiceContainer), there is no database connection
+        return None
+    if name not in BACKENDS:
+        print(f"Warning: Unknown backend '{name}' in settings.json, using 'mysql'.")
+        name = 'mysql'
+    if name == 'mysql' and mysql is None:
+        print("CRITICAL ERROR: MySQL driver (mysql-connector-python) is not installed. "
+              "Install it or set \"backend\": \"sqlite\" in config/settings.json.")
+        return None
+    return BACKENDS[name](config)
@@ -1,5 +1,17 @@
-import mysql.connector
-from db_connection import DatabaseConnection
+import itertools
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from cache import LRUCache
+from change_feed import record_change, record_changes
+from data_loader import DataLoader
+from db_connection import DatabaseConnection, DatabaseError
+from isbn import isbn_lookup_keys, normalize_isbn
+from models import Author, Book, BookWithAuthors, Publisher, to_records
+from notification_outbox import NotificationOutbox
+from title_index import TitlePrefixIndex, TitleTrigramIndex
+from transaction_runner import TransactionRunner
 
 
 class BookRepository:
@@ -10,65 +22,247 @@ class BookRepository:
     providing a clean API for the rest of the application.
     Requirement D1: Repository Pattern implementation.
     """
+    BOOK_COLUMNS = "book_id, title, isbn, price, is_active, publisher_id"
+    # Withdrawn books (is_active = 0) stay in the table for the loan history, but are
+    # hidden from the catalogue; the condition matches the filtered index of migration 008
+    ACTIVE_FILTER = "is_active = 1"
+    # Authors joined through the M:N table, the first column is the book ID
+    BOOK_AUTHORS_QUERY = """
+        SELECT ba.book_id, a.author_id, a.first_name, a.last_name, a.birth_date
+        FROM book_authors ba
+        JOIN authors a ON a.author_id = ba.author_id
+    """
+
+    # In-memory title indexes shared by all repository instances (built on first use),
+    # one per index type and branch: (index_class, branch_id) -> index
+    _title_indexes = {}
+    _index_lock = threading.Lock()
+    # Changes notified while an index is being built, replayed on it when the scan ends:
+    # (index_class, branch_id) -> list of (book_id, title or None for a removal)
+    _index_changes = {}
+    _changes_lock = threading.Lock()
 
-    def __init__(self):
+    # Recently resolved ISBNs (normalised ISBN -> Book), one cache per branch shared by all instances
+    _isbn_caches = {}
+    ISBN_CHUNK_SIZE = 500
+    # Rows per multi-row statement (and transaction) of the bulk operations
+    BULK_CHUNK_SIZE = 500
+
+    def __init__(self, branch_id=None):
         """
         Initializes the repository with a database connection instance.
+
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
         """
-        self.db = DatabaseConnection()
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+        self.transactions = TransactionRunner(self.db)
+
+    @property
+    def _isbn_cache(self):
+        return self._branch_isbn_cache(self.branch_id)
 
-    def get_all_books(self):
+    @classmethod
+    def _branch_isbn_cache(cls, branch_id):
+        cache = cls._isbn_caches.get(branch_id)
+        if cache is None:
+            cache = cls._isbn_caches.setdefault(branch_id, LRUCache(max_size=1024))
+        return cache
+
+    def get_all_books(self, as_dict=False, include_inactive=False):
         """
-        Retrieves all books from the database.
+        Retrieves all books of the catalogue from the database.
+
+        Args:
+            as_dict (bool): Return dictionaries instead of Book records (compatibility mode).
+            include_inactive (bool): Include withdrawn (soft-deleted) books.
 
         Returns:
-            list[dict]: A list of dictionaries, where each dictionary represents a book.
+            list[Book]: A list of Book records (or dictionaries if as_dict is True).
         """
-        conn = self.db.connect()
+        conn = self.db.connect(read_only=True)
         if not conn:
             return []
 
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         try:
-            query = "SELECT * FROM books"
-            cursor.execute(query)
-            return cursor.fetchall()
-        except mysql.connector.Error as err:
+            query = f"SELECT {self.BOOK_COLUMNS} FROM books"
+            if not include_inactive:
+                query += f" WHERE {self.ACTIVE_FILTER}"
+            cursor.execute(query + " ORDER BY book_id")
+            return to_records(cursor.fetchall(), Book, as_dict)
+        except DatabaseError as err:
             print(f"Error fetching books: {err}")
             return []
         finally:
             cursor.close()
             self.db.close()
 
-    def get_all_publishers(self):
+    def get_all_publishers(self, as_dict=False):
         """
         Retrieves all publishers from the database.
         This is a helper method to assist users in selecting a Publisher ID when creating a book.
 
+        Args:
+            as_dict (bool): Return dictionaries instead of Publisher records (compatibility mode).
+
         Returns:
-            list[dict]: A list of publishers.
+            list[Publisher]: A list of publishers.
         """
-        conn = self.db.connect()
+        conn = self.db.connect(read_only=True)
         if not conn:
             return []
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         try:
-            cursor.execute("SELECT * FROM publishers")
-            return cursor.fetchall()
-        except mysql.connector.Error as err:
+            cursor.execute("SELECT publisher_id, name, website FROM publishers")
+            return to_records(cursor.fetchall(), Publisher, as_dict)
+        except DatabaseError as err:
             print(f"Error fetching publishers: {err}")
             return []
         finally:
             cursor.close()
             self.db.close()
 
+    # --- AUTHORS ---
+
+    def get_books_with_authors(self, after_id=0, limit=100, as_dict=False, loader=None):
+        """
+        Retrieves one page of active books (ordered by ID) together with their authors.
+        Costs two queries per page: the books and one batched query for all their authors.
+
+        Args:
+            after_id (int): Return books with a higher ID (keyset pagination, 0 = first page).
+            limit (int): Page size.
+            as_dict (bool): Return dictionaries instead of BookWithAuthors records (compatibility mode).
+            loader (DataLoader): Author loader to share between pages (see author_loader).
+
+        Returns:
+            list[BookWithAuthors]: The books of the page with their authors.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT {self.BOOK_COLUMNS} FROM books WHERE {self.ACTIVE_FILTER} AND book_id > %s "
+                f"ORDER BY book_id LIMIT %s",
+                (after_id, limit)
+            )
+            books = to_records(cursor.fetchall(), Book)
+        except DatabaseError as err:
+            print(f"Error fetching books: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
+
+        authors = (loader or self.author_loader()).load_many(book.book_id for book in books)
+        return self._with_authors(books, authors, as_dict)
+
+    def get_all_books_with_authors(self, as_dict=False):
+        """
+        Retrieves all active books together with their authors.
+        Always costs exactly two queries (all books, all book-author pairs), whatever the number of books.
+
+        Args:
+            as_dict (bool): Return dictionaries instead of BookWithAuthors records (compatibility mode).
+
+        Returns:
+            list[BookWithAuthors]: All books with their authors.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {self.BOOK_COLUMNS} FROM books WHERE {self.ACTIVE_FILTER} ORDER BY book_id")
+            books = to_records(cursor.fetchall(), Book)
+            cursor.execute(self.BOOK_AUTHORS_QUERY + " ORDER BY a.last_name, a.first_name")
+            authors_by_book = self._group_authors(cursor.fetchall())
+        except DatabaseError as err:
+            print(f"Error fetching books: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
+
+        authors = [authors_by_book.get(book.book_id, ()) for book in books]
+        return self._with_authors(books, authors, as_dict)
+
+    def get_authors_by_book_ids(self, book_ids):
+        """
+        Loads the authors of many books with one 'WHERE book_id IN (...)' query.
+        This is the batch function of the author DataLoader.
+
+        Args:
+            book_ids (list[int]): IDs of the books.
+
+        Returns:
+            dict[int, list[Author]]: Book ID -> its authors (books without authors are missing).
+        """
+        if not book_ids:
+            return {}
+        conn = self.db.connect()
+        if not conn:
+            return {}
+
+        cursor = conn.cursor()
+        try:
+            placeholders = ", ".join(["%s"] * len(book_ids))
+            cursor.execute(
+                self.BOOK_AUTHORS_QUERY + f" WHERE ba.book_id IN ({placeholders}) ORDER BY a.last_name, a.first_name",
+                list(book_ids)
+            )
+            return self._group_authors(cursor.fetchall())
+        except DatabaseError as err:
+            print(f"Error fetching authors: {err}")
+            return {}
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def author_loader(self, max_batch_size=1000):
+        """
+        Creates a DataLoader that batches and caches author lookups by book ID.
+        Use one loader per listing (e.g. for all pages of one export).
+
+        Returns:
+            DataLoader: Loader returning a list of Author records per book ID.
+        """
+        return DataLoader(self.get_authors_by_book_ids, max_batch_size=max_batch_size, default=())
+
+    @staticmethod
+    def _group_authors(rows):
+        """
+        Groups (book_id, author columns...) rows into book ID -> list of Author records.
+        """
+        authors_by_book = {}
+        for book_id, *author in rows:
+            authors_by_book.setdefault(book_id, []).append(Author._make(author))
+        return authors_by_book
+
+    @staticmethod
+    def _with_authors(books, authors_per_book, as_dict):
+        """
+        Combines Book records with the author lists (in the same order).
+        """
+        records = [BookWithAuthors(*book, tuple(authors)) for book, authors in zip(books, authors_per_book)]
+        if as_dict:
+            return [{**record._asdict(), 'authors': [author._asdict() for author in record.authors]}
+                    for record in records]
+        return records
+
     def add_book(self, title, isbn, price, publisher_id):
         """
         Inserts a new book record into the database.
 
         Args:
             title (str): Title of the book.
-            isbn (str): International Standard Book Number.
+            isbn (str): International Standard Book Number (stored normalised, without hyphens).
             price (float): Price of the book.
             publisher_id (int): Foreign key referencing the publisher.
 
@@ -83,14 +277,17 @@ class BookRepository:
         cursor = conn.cursor()
         try:
             query = "INSERT INTO books (title, isbn, price, publisher_id) VALUES (%s, %s, %s, %s)"
-            values = (title, isbn, price, publisher_id)
+            values = (title, normalize_isbn(isbn), price, publisher_id)
             cursor.execute(query, values)
+            new_id = cursor.lastrowid
+            record_change(cursor, 'book', new_id, 'insert',
+                          {'title': title, 'isbn': values[1], 'price': price, 'publisher_id': publisher_id})
             conn.commit()
 
-            new_id = cursor.lastrowid
+            BookRepository.notify_book_added(new_id, title, self.branch_id)
             print(f"Success: Book '{title}' added with ID {new_id}.")
             return new_id
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Error adding book: {err}")
             return None
         finally:
@@ -99,28 +296,595 @@ class BookRepository:
 
     def delete_book(self, book_id):
         """
-        Deletes a book from the database by its ID.
+        Withdraws a book from the catalogue (soft delete).
+
+        The row is kept with is_active = 0 and the time of withdrawal, so the loan
+        history stays intact and borrowed copies can still be returned. Waiting
+        reservations of the book are cancelled and their members notified.
+        Withdrawn books are removed for good by purge_inactive_books().
+
+        Args:
+            book_id (int): The ID of the book to withdraw.
+
+        Returns:
+            bool: True if the book was withdrawn, False otherwise (unknown or already withdrawn).
+        """
+        try:
+            withdrawn = self.transactions.run(lambda cursor: bool(self._deactivate(cursor, [book_id])),
+                                              name=f"Withdrawal of Book {book_id}")
+        except DatabaseError as err:
+            print(f"Error deleting book: {err}")
+            return False
+
+        if not withdrawn:
+            if withdrawn is False:
+                print(f"Error: Book ID {book_id} does not exist or is already withdrawn.")
+            return False
+        BookRepository.notify_book_removed(book_id, self.branch_id)
+        print(f"Success: Book ID {book_id} withdrawn from the catalogue.")
+        return True
+
+    @staticmethod
+    def _deactivate(cursor, book_ids):
+        """
+        Withdraws the active books among book_ids in the caller's transaction,
+        cancels their waiting reservations and notifies the waiting members.
+
+        Returns:
+            list[int]: IDs of the books withdrawn (unknown and already withdrawn books are left out).
+        """
+        placeholders = ", ".join(["%s"] * len(book_ids))
+        cursor.execute(f"SELECT book_id FROM books WHERE is_active = 1 AND book_id IN ({placeholders})", book_ids)
+        active = [row[0] for row in cursor.fetchall()]
+        if not active:
+            return []
+
+        placeholders = ", ".join(["%s"] * len(active))
+        cursor.execute(f"UPDATE books SET is_active = 0, deactivated_at = NOW() "
+                       f"WHERE is_active = 1 AND book_id IN ({placeholders})", active)
+        cursor.execute(f"SELECT reservation_id, member_id, book_id FROM reservations "
+                       f"WHERE status = 'WAITING' AND book_id IN ({placeholders})", active)
+        reservations = cursor.fetchall()
+        if reservations:
+            cursor.execute(f"UPDATE reservations SET status = 'CANCELLED' "
+                           f"WHERE status = 'WAITING' AND book_id IN ({placeholders})", active)
+            for reservation_id, member_id, book_id in reservations:
+                NotificationOutbox.enqueue(cursor, member_id, 'RESERVATION_CANCELLED',
+                                           {'reservation_id': reservation_id, 'book_id': book_id})
+        record_changes(cursor, 'book', 'update', [(book_id, {'is_active': 0}) for book_id in active])
+        return active
+
+    def purge_inactive_books(self, older_than_days=365, batch_size=500, pause=0.0):
+        """
+        Permanently deletes books withdrawn more than 'older_than_days' ago, together
+        with their archived loans and reservations.
+
+        Books are deleted in batches, each in its own short transaction. The IDs of a
+        batch are read from the index of withdrawn books (only inactive rows), and a
+        book that is still borrowed is kept until it is returned.
+
+        Args:
+            older_than_days (int): Minimum age of the withdrawal in days.
+            batch_size (int): Books deleted per transaction (keeps row locks short).
+            pause (float): Seconds to wait between batches.
+
+        Returns:
+            int: Number of deleted books.
+        """
+        cutoff = datetime.now().replace(microsecond=0) - timedelta(days=older_than_days)
+        purged = 0
+        last_id = 0
+
+        def work(cursor):
+            cursor.execute(
+                "SELECT book_id FROM books b WHERE is_active = 0 AND deactivated_at < %s AND book_id > %s "
+                "AND NOT EXISTS (SELECT 1 FROM loans l WHERE l.book_id = b.book_id "
+                "AND l.status IN ('ACTIVE', 'OVERDUE')) "
+                "ORDER BY book_id LIMIT %s",
+                (cutoff, last_id, batch_size)
+            )
+            book_ids = [row[0] for row in cursor.fetchall()]
+            if not book_ids:
+                return []
+            placeholders = ", ".join(["%s"] * len(book_ids))
+            cursor.execute(f"DELETE FROM reservations WHERE book_id IN ({placeholders})", book_ids)
+            cursor.execute(f"DELETE FROM loans WHERE book_id IN ({placeholders})", book_ids)
+            cursor.execute(f"DELETE FROM book_authors WHERE book_id IN ({placeholders})", book_ids)
+            cursor.execute(f"DELETE FROM books WHERE is_active = 0 AND book_id IN ({placeholders})", book_ids)
+            record_changes(cursor, 'book', 'delete', [(book_id, None) for book_id in book_ids])
+            return book_ids
+
+        while True:
+            try:
+                book_ids = self.transactions.run(work, name="Purge of withdrawn books")
+            except DatabaseError as err:
+                print(f"Error purging books: {err}")
+                break
+            if not book_ids:
+                break
+            for book_id in book_ids:
+                BookRepository.notify_book_removed(book_id, self.branch_id)
+            purged += len(book_ids)
+            last_id = book_ids[-1]
+            if len(book_ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        print(f"Purge: {purged} withdrawn books deleted.")
+        return purged
+
+    # --- BULK OPERATIONS ---
+
+    def add_books(self, books, chunk_size=None):
+        """
+        Inserts many books at once (e.g. a supplier catalogue).
+
+        The books are inserted in chunks, each with one multi-row INSERT in its own
+        transaction, instead of one connection and commit per book. Books whose ISBN
+        is already in the database (or repeated in the input) or whose publisher
+        does not exist are skipped, and so are malformed items (a missing field or a
+        price that is not a number), without affecting the rest of the input.
+
+        Args:
+            books (iterable): (title, isbn, price, publisher_id) tuples or dictionaries with these keys.
+            chunk_size (int): Books per statement and transaction (default BULK_CHUNK_SIZE).
+
+        Returns:
+            list[int]: ID of each new book in input order, None for skipped books and failed chunks.
+        """
+        results = []
+        for chunk in self._chunks(books, chunk_size or self.BULK_CHUNK_SIZE):
+            rows = [self._book_values(book) for book in chunk]
+            valid = [index for index, row in enumerate(rows) if row is not None]
+
+            def work(cursor):
+                isbns = list(dict.fromkeys(rows[index][1] for index in valid))
+                cursor.execute(f"SELECT isbn FROM books WHERE isbn IN ({', '.join(['%s'] * len(isbns))})", isbns)
+                existing = {row[0] for row in cursor.fetchall()}
+                publisher_ids = list({rows[index][3] for index in valid if rows[index][3] is not None})
+                publishers = set()
+                if publisher_ids:
+                    cursor.execute(f"SELECT publisher_id FROM publishers "
+                                   f"WHERE publisher_id IN ({', '.join(['%s'] * len(publisher_ids))})", publisher_ids)
+                    publishers = {row[0] for row in cursor.fetchall()}
+                new = {}  # isbn -> index of its first row in the chunk
+                for index in valid:
+                    row = rows[index]
+                    if row[1] not in existing and row[1] not in new and (row[3] is None or row[3] in publishers):
+                        new[row[1]] = index
+                if not new:
+                    return {}
+
+                cursor.executemany("INSERT INTO books (title, isbn, price, publisher_id) VALUES (%s, %s, %s, %s)",
+                                   [rows[index] for index in new.values()])
+                cursor.execute(f"SELECT book_id, isbn FROM books WHERE isbn IN ({', '.join(['%s'] * len(new))})",
+                               list(new))
+                ids = {isbn: book_id for book_id, isbn in cursor.fetchall()}
+                record_changes(cursor, 'book', 'insert', [
+                    (ids[isbn], dict(zip(('title', 'isbn', 'price', 'publisher_id'), rows[index])))
+                    for isbn, index in new.items()
+                ])
+                return {index: ids[isbn] for isbn, index in new.items()}
+
+            inserted = {}
+            if valid:
+                try:
+                    inserted = self.transactions.run(work, name=f"Insert of {len(valid)} books") or {}
+                except DatabaseError as err:
+                    print(f"Error adding books: {err}")
+            for index, book_id in inserted.items():
+                BookRepository.notify_book_added(book_id, rows[index][0], self.branch_id)
+            results.extend(inserted.get(index) for index in range(len(rows)))
+
+        return results
+
+    def update_prices(self, prices, chunk_size=None):
+        """
+        Changes the prices of many books at once (e.g. a new supplier price list).
+
+        Every chunk is one 'UPDATE ... SET price = CASE book_id WHEN ... END' statement
+        in its own transaction, so thousands of prices cost a few round trips.
+
+        Args:
+            prices (dict[int, float]): Book ID -> new price (or an iterable of (book_id, price) pairs).
+            chunk_size (int): Books per statement and transaction (default BULK_CHUNK_SIZE).
+
+        Returns:
+            dict[int, bool]: Book ID -> True if updated, False if the book does not exist, the price
+            is not a number or the chunk failed.
+        """
+        pairs = prices.items() if hasattr(prices, 'items') else prices
+        results = {}
+        for chunk in self._chunks(pairs, chunk_size or self.BULK_CHUNK_SIZE):
+            new_prices = {}
+            for book_id, price in chunk:
+                price = self._price_value(price)
+                if price is None:
+                    results[book_id] = False
+                else:
+                    new_prices[book_id] = price
+            if not new_prices:
+                continue
+
+            def work(cursor):
+                book_ids = list(new_prices)
+                cursor.execute(f"SELECT book_id FROM books WHERE book_id IN ({', '.join(['%s'] * len(book_ids))})",
+                               book_ids)
+                found = [row[0] for row in cursor.fetchall()]
+                if not found:
+                    return []
+                cases = " ".join(["WHEN %s THEN %s"] * len(found))
+                params = [value for book_id in found for value in (book_id, new_prices[book_id])]
+                cursor.execute(f"UPDATE books SET price = CASE book_id {cases} END "
+                               f"WHERE book_id IN ({', '.join(['%s'] * len(found))})", params + found)
+                record_changes(cursor, 'book', 'update', [(book_id, {'price': new_prices[book_id]})
+                                                          for book_id in found])
+                return found
+
+            try:
+                updated = set(self.transactions.run(work, name=f"Price update of {len(new_prices)} books") or ())
+            except DatabaseError as err:
+                print(f"Error updating prices: {err}")
+                updated = set()
+            if updated:
+                BookRepository.notify_books_changed(updated, self.branch_id)
+            results.update((book_id, book_id in updated) for book_id in new_prices)
+
+        return results
+
+    def deactivate_books(self, book_ids, chunk_size=None):
+        """
+        Withdraws many books from the catalogue at once (bulk version of delete_book).
+
+        Args:
+            book_ids (iterable[int]): IDs of the books.
+            chunk_size (int): Books per statement and transaction (default BULK_CHUNK_SIZE).
+
+        Returns:
+            dict[int, bool]: Book ID -> True if withdrawn, False if unknown, already withdrawn or the chunk failed.
+        """
+        results = {}
+        for chunk in self._chunks(dict.fromkeys(book_ids), chunk_size or self.BULK_CHUNK_SIZE):
+            try:
+                withdrawn = set(self.transactions.run(lambda cursor: self._deactivate(cursor, chunk),
+                                                      name=f"Withdrawal of {len(chunk)} books") or ())
+            except DatabaseError as err:
+                print(f"Error deleting books: {err}")
+                withdrawn = set()
+            for book_id in withdrawn:
+                BookRepository.notify_book_removed(book_id, self.branch_id)
+            results.update((book_id, book_id in withdrawn) for book_id in chunk)
+
+        return results
+
+    @staticmethod
+    def _book_values(book):
+        """
+        Returns the (title, isbn, price, publisher_id) values of a book to insert, with the ISBN normalised,
+        or None if the item is malformed (a missing field or a price that is not a number).
+        """
+        try:
+            if isinstance(book, dict):
+                book = (book['title'], book['isbn'], book['price'], book.get('publisher_id'))
+            title, isbn, price, publisher_id = book
+        except (KeyError, TypeError, ValueError):
+            return None
+        price = BookRepository._price_value(price)
+        if not title or not isbn or price is None:
+            return None
+        return title, normalize_isbn(isbn), price, publisher_id
+
+    @staticmethod
+    def _price_value(price):
+        """
+        Returns a price as a float, or None if it is not a finite number.
+        """
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        return price if math.isfinite(price) else None
+
+    @staticmethod
+    def _chunks(iterable, size):
+        """
+        Splits an iterable of any length into lists of at most 'size' items.
+        """
+        iterator = iter(iterable)
+        while True:
+            chunk = list(itertools.islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+
+    # --- ISBN LOOKUP ---
+
+    def find_by_isbn(self, isbn, as_dict=False):
+        """
+        Finds a book by its ISBN (e.g. a scanned barcode).
+        Accepts ISBN-10 or ISBN-13 with or without hyphens; hot ISBNs are served from an LRU cache.
 
         Args:
-            book_id (int): The ID of the book to delete.
+            isbn (str): ISBN as typed or scanned.
+            as_dict (bool): Return a dictionary instead of a Book record (compatibility mode).
 
         Returns:
-            bool: True if deletion was successful, False otherwise.
+            Book: The book, or None if no book has this ISBN.
+        """
+        return self.find_by_isbns([isbn], as_dict).get(isbn)
+
+    def find_by_isbns(self, isbns, as_dict=False, chunk_size=None):
+        """
+        Resolves many ISBNs at once (e.g. a stack of books at a scanning station).
+        Uncached ISBNs are looked up with one 'WHERE isbn IN (...)' query per chunk,
+        which uses the UNIQUE index on 'isbn', so a typical stack costs one round trip.
+
+        Args:
+            isbns (iterable[str]): ISBNs as typed or scanned.
+            as_dict (bool): Return dictionaries instead of Book records (compatibility mode).
+            chunk_size (int): Maximum number of ISBNs per query (default ISBN_CHUNK_SIZE).
+
+        Returns:
+            dict[str, Book]: Input ISBN -> book, or None for unknown ISBNs.
+        """
+        chunk_size = chunk_size or self.ISBN_CHUNK_SIZE
+        lookup_keys = {isbn: isbn_lookup_keys(isbn) for isbn in isbns}
+
+        found = {}
+        missing = {}
+        for keys in lookup_keys.values():
+            cached = next((book for book in map(self._isbn_cache.get, keys) if book is not None), None)
+            if cached is not None:
+                found[keys[0]] = cached
+            else:
+                missing.update(dict.fromkeys(keys))
+
+        if missing:
+            found.update(self._fetch_by_isbns(list(missing), chunk_size))
+
+        results = {}
+        for isbn, keys in lookup_keys.items():
+            book = next((found[key] for key in keys if key in found), None)
+            if book is not None and as_dict:
+                book = book._asdict()
+            results[isbn] = book
+        return results
+
+    def _fetch_by_isbns(self, keys, chunk_size):
+        """
+        Loads books with the given normalised ISBNs from the database and caches them.
+
+        Returns:
+            dict[str, Book]: Normalised ISBN -> Book for the ISBNs that exist.
         """
         conn = self.db.connect()
         if not conn:
-            return False
+            return {}
 
         cursor = conn.cursor()
+        found = {}
         try:
-            query = "DELETE FROM books WHERE book_id = %s"
-            cursor.execute(query, (book_id,))
-            conn.commit()
-            print(f"Success: Book ID {book_id} deleted.")
-            return True
-        except mysql.connector.Error as err:
-            print(f"Error deleting book: {err}")
-            return False
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cursor.execute(f"SELECT {self.BOOK_COLUMNS} FROM books WHERE isbn IN ({placeholders})", chunk)
+                for book in to_records(cursor.fetchall(), Book):
+                    found[book.isbn] = book
+                    self._isbn_cache.put(book.isbn, book)
+            return found
+        except DatabaseError as err:
+            print(f"Error looking up ISBNs: {err}")
+            return found
+        finally:
+            cursor.close()
+            self.db.close()
+
+    # --- SEARCH ---
+
+    def search_books(self, text, limit=20, as_dict=False):
+        """
+        Full-text (relevance) search over the titles of active books.
+        Uses the FULLTEXT index 'ft_books_title' (MySQL) or the FTS5 table 'books_fts' (SQLite),
+        both created by migration 001. Results are ordered by relevance.
+
+        Args:
+            text (str): Words to search for.
+            limit (int): Maximum number of results.
+            as_dict (bool): Return dictionaries instead of Book records (compatibility mode).
+
+        Returns:
+            list[Book]: Matching books, the most relevant first.
+        """
+        conn = self.db.connect()
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            if self.db.dialect == 'sqlite':
+                # Any of the words matches (like MySQL natural language mode), best BM25 rank first
+                words = TitleTrigramIndex.split_words(text)
+                if not words:
+                    return []
+                match = " OR ".join('"' + word.replace('"', '""') + '"' for word in words)
+                query = f"""
+                    SELECT {self.BOOK_COLUMNS}
+                    FROM books
+                    JOIN (SELECT rowid AS match_id, rank FROM books_fts WHERE books_fts MATCH %s
+                          ORDER BY rank) matches ON matches.match_id = books.book_id
+                    WHERE books.{self.ACTIVE_FILTER}
+                    ORDER BY matches.rank
+                    LIMIT %s
+                """
+                cursor.execute(query, (match, limit))
+            else:
+                query = f"""
+                    SELECT {self.BOOK_COLUMNS}
+                    FROM books
+                    WHERE MATCH(title) AGAINST (%s IN NATURAL LANGUAGE MODE) AND {self.ACTIVE_FILTER}
+                    ORDER BY MATCH(title) AGAINST (%s IN NATURAL LANGUAGE MODE) DESC
+                    LIMIT %s
+                """
+                cursor.execute(query, (text, text, limit))
+            return to_records(cursor.fetchall(), Book, as_dict)
+        except DatabaseError as err:
+            print(f"Error searching books: {err}")
+            return []
         finally:
             cursor.close()
-            self.db.close()
\ No newline at end of file
+            self.db.close()
+
+    def autocomplete(self, prefix, limit=10):
+        """
+        Suggests books whose title starts with the given prefix (as-you-type search).
+        Served from the in-memory prefix index, only the first call reads the titles from the database.
+
+        Args:
+            prefix (str): Text typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list[tuple[int, str]]: (book_id, title) pairs in alphabetical order.
+        """
+        index = self._get_index(TitlePrefixIndex)
+        if index is None:
+            return []
+        return index.complete(prefix, limit)
+
+    def fuzzy_search(self, text, limit=10):
+        """
+        Typo-tolerant title search (e.g. 'pyhton guide' finds 'Python Guide').
+        Served from the in-memory trigram index, only the first call reads the titles from the database.
+
+        Args:
+            text (str): Searched title or its part, possibly misspelled.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list[tuple[int, str, float]]: (book_id, title, similarity), the best match first.
+        """
+        index = self._get_index(TitleTrigramIndex)
+        if index is None:
+            return []
+        return index.search(text, limit)
+
+    def iter_titles(self, batch_size=10000):
+        """
+        Streams (book_id, title) pairs of all active books without loading the whole table at once.
+        Used to build the in-memory title indexes.
+
+        Args:
+            batch_size (int): Number of rows fetched per round trip.
+
+        Yields:
+            tuple[int, str]: (book_id, title) pairs (none if the database is unavailable).
+        """
+        conn = self.db.connect()
+        if not conn:
+            return
+        try:
+            yield from self._scan_titles(conn, batch_size)
+        finally:
+            self.db.close()
+
+    def _scan_titles(self, conn, batch_size=10000):
+        """
+        Streams the (book_id, title) pairs of the active books over an open connection.
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT book_id, title FROM books WHERE {self.ACTIVE_FILTER}")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _get_index(self, index_class):
+        """
+        Returns the shared title index of the repository's branch, building it from
+        a streamed scan of the titles on first use.
+
+        An index is kept only if the scan succeeded, so after a database outage the
+        next call tries to build it again (instead of serving an empty index).
+
+        Args:
+            index_class (type): TitlePrefixIndex or TitleTrigramIndex.
+
+        Returns:
+            object: The index, or None if the titles could not be loaded.
+        """
+        key = (index_class, self.branch_id)
+        if key not in BookRepository._title_indexes:
+            with BookRepository._index_lock:
+                if key not in BookRepository._title_indexes:
+                    conn = self.db.connect()
+                    if not conn:
+                        print("Error building title index: database unavailable.")
+                        return None
+                    # Books added or removed during the scan may be missed by it
+                    with BookRepository._changes_lock:
+                        BookRepository._index_changes[key] = []
+                    index = None
+                    try:
+                        index = index_class(self._scan_titles(conn))
+                    except DatabaseError as err:
+                        print(f"Error building title index: {err}")
+                    finally:
+                        self.db.close()
+                        with BookRepository._changes_lock:
+                            changes = BookRepository._index_changes.pop(key)
+                            if index is not None:
+                                for book_id, title in changes:
+                                    if title is None:
+                                        index.remove(book_id)
+                                    else:
+                                        index.add(book_id, title)
+                                BookRepository._title_indexes[key] = index
+        return BookRepository._title_indexes.get(key)
+
+    @classmethod
+    def _branch_indexes(cls, branch_id, book_id, title=None):
+        """
+        Returns the built title indexes of a branch that a book change must be applied to,
+        and queues the change for the indexes of the branch that are still being built.
+
+        Args:
+            title (str): Title of an added book, None if the book was removed.
+        """
+        with cls._changes_lock:
+            for (_, index_branch), changes in cls._index_changes.items():
+                if index_branch == branch_id:
+                    changes.append((book_id, title))
+            return [index for (_, index_branch), index in cls._title_indexes.items() if index_branch == branch_id]
+
+    @classmethod
+    def notify_book_added(cls, book_id, title, branch_id=None):
+        """
+        Keeps the in-memory title indexes current after a book was inserted.
+        Must be called by every code path that inserts books (e.g. ImportService).
+        Indexes not built yet load the book with the titles; indexes being built get it after the scan.
+        Books inserted by other processes are not seen until the process restarts.
+        """
+        for index in cls._branch_indexes(branch_id, book_id, title):
+            index.add(book_id, title)
+
+    @classmethod
+    def notify_books_changed(cls, book_ids, branch_id=None):
+        """
+        Keeps the ISBN cache current after books were updated (e.g. their prices).
+        """
+        book_ids = set(book_ids)
+        cls._branch_isbn_cache(branch_id).discard_if(lambda book: book.book_id in book_ids)
+
+    @classmethod
+    def notify_book_removed(cls, book_id, branch_id=None):
+        """
+        Keeps the in-memory title indexes and the ISBN cache current after a book was withdrawn or deleted.
+        """
+        for index in cls._branch_indexes(branch_id, book_id):
+            index.remove(book_id)
+        cls._branch_isbn_cache(branch_id).discard_if(lambda book: book.book_id == book_id)
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small thread-safe Least-Recently-Used cache.
+
+    Keeps at most 'max_size' entries; when full, the entry that was not used for
+    the longest time is dropped. Used for hot lookups (ISBNs, members) to avoid
+    database round trips. With a 'ttl', entries also expire that many seconds
+    after they were stored, which bounds how long a change made by another
+    process (which cannot invalidate this cache) stays invisible.
+    """
+
+    def __init__(self, max_size=1024, ttl=None):
+        """
+        Args:
+            max_size (int): Maximum number of cached entries.
+            ttl (float): Seconds an entry stays valid (None = until evicted or removed).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expiry time or None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Returns the cached value (and marks it as recently used), or default if not cached.
+        """
+        with self._lock:
+            if key not in self._data:
+                return default
+            value, expires = self._data[key]
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        Stores a value, evicting the least recently used entry if the cache is full.
+        """
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """
+        Removes an entry (no-op if it is not cached).
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_if(self, predicate):
+        """
+        Removes all entries whose value matches the predicate (e.g. all entries of a deleted book).
+
+        Args:
+            predicate (callable): Function (value) -> bool.
+        """
+        with self._lock:
+            for key in [k for k, (v, _) in self._data.items() if predicate(v)]:
+                del self._data[key]
+
+    def clear(self):
+        """
+        Removes all entries.
+        """
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,294 @@
+import json
+import time
+from datetime import datetime, timedelta
+from db_connection import DatabaseConnection, DatabaseError
+from models import ChangeEvent
+
+INSERT_QUERY = ("INSERT INTO change_events (entity, entity_id, action, payload, created_at) "
+                "VALUES (%s, %s, %s, %s, NOW())")
+
+
+def record_change(cursor, entity, entity_id, action, payload=None):
+    """
+    Writes a change event inside the caller's transaction (committed or rolled back with the change).
+
+    Args:
+        cursor (object): Cursor of the open transaction.
+        entity (str): 'book', 'publisher', 'member' or 'loan'.
+        entity_id (int): Primary key of the changed row.
+        action (str): 'insert', 'update' or 'delete'.
+        payload (dict): Changed values consumers need (e.g. the book_id of a loan).
+    """
+    cursor.execute(INSERT_QUERY, (entity, entity_id, action, _encode(payload)))
+
+
+def record_changes(cursor, entity, action, changes):
+    """
+    Writes many change events with one multi-row statement.
+
+    Args:
+        changes (list[tuple[int, dict]]): (entity_id, payload) of every changed row.
+    """
+    if changes:
+        cursor.executemany(INSERT_QUERY, [(entity, entity_id, action, _encode(payload))
+                                          for entity_id, payload in changes])
+
+
+def _encode(payload):
+    return json.dumps(payload, default=str) if payload is not None else None
+
+
+class ChangeFeed:
+    """
+    Tails the change events of a database in commit order (transactional outbox).
+
+    Every write of books, publishers, members and loans adds a row to
+    'change_events' in its own transaction, so an event exists exactly when its
+    change is committed. A consumer keeps the last event_id it has processed and
+    reads only newer events with a primary key range scan, which costs the same
+    however large the table is. Caches and replicas can therefore be updated
+    incrementally instead of reloading whole tables.
+
+    Event IDs are allocated at insert time, but transactions commit in any order:
+    a missing ID may still be committed by a running transaction (or was rolled
+    back and never appears). poll() stops in front of such a gap until the next
+    event is 'gap_timeout' seconds old (by the database clock), so the events of
+    a slow transaction usually arrive in order and a rolled back one does not
+    stall the feed.
+
+    A gap older than that is passed over, but its IDs are kept in 'skipped' and
+    looked up again on every poll, until the event after the gap is
+    'late_horizon' seconds old. An event that turns up late is returned at the
+    start of the next poll (it was committed after the events already returned).
+    IDs that never turn up are moved to 'lost_ids', so the consumer can tell a
+    rolled back transaction (the usual case) from nothing at all.
+    """
+
+    FETCH_QUERY = """
+        SELECT event_id, entity, entity_id, action, payload, created_at, NOW()
+        FROM change_events
+        WHERE event_id > %s
+        ORDER BY event_id
+        LIMIT %s
+    """
+
+    def __init__(self, branch_id=None, after_id=0, batch_size=500, gap_timeout=30.0, late_horizon=3600.0,
+                 skipped=()):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+            after_id (int): Last event already processed by the consumer (0 = from the beginning).
+            batch_size (int): Maximum number of events returned by one poll().
+            gap_timeout (float): Seconds the feed waits in front of a missing event ID before passing it over.
+            late_horizon (float): Seconds a passed over ID is still looked up before it is given up as lost.
+            skipped (iterable[int]): IDs passed over by an earlier feed of the consumer (e.g. a previous request).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+        self.last_id = after_id
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.late_horizon = late_horizon
+        self.skipped = dict.fromkeys(skipped)  # event_id -> created_at of the event after the gap (None = unknown)
+        self.lost_ids = []
+
+    def latest_id(self):
+        """
+        Returns:
+            int: ID of the newest event (a new consumer that needs no history starts there), None on error.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return None
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(event_id) FROM change_events")
+            return cursor.fetchone()[0] or 0
+        except DatabaseError as err:
+            print(f"Error reading change events: {err}")
+            return None
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def poll(self, limit=None, as_dict=False):
+        """
+        Returns the events committed after the last returned one and advances the position.
+
+        Args:
+            limit (int): Maximum number of events (default: batch_size).
+            as_dict (bool): Return dictionaries instead of ChangeEvent records.
+
+        Returns:
+            list[ChangeEvent]: Late events of skipped IDs first, then the new events in event_id order
+            (empty if there are none or the database is unavailable).
+        """
+        events = self._recheck_skipped() if self.skipped else []
+        rows = self._fetch(self.last_id, limit or self.batch_size)
+        expected = self.last_id + 1
+        for event, db_now in rows:
+            if event.event_id != expected:
+                if db_now - event.created_at < timedelta(seconds=self.gap_timeout):
+                    break  # the missing event may still be committed
+                self.skipped.update(dict.fromkeys(range(expected, event.event_id), event.created_at))
+            events.append(event)
+            expected = event.event_id + 1
+            self.last_id = event.event_id
+
+        return [event._asdict() for event in events] if as_dict else events
+
+    def _recheck_skipped(self):
+        """
+        Looks up the skipped IDs again. Returns the events that were committed since,
+        and moves the IDs whose gap is older than 'late_horizon' to 'lost_ids'.
+        """
+        found, created_after = self._fetch_ids(sorted(self.skipped))
+        if found is None:
+            return []  # database unavailable, try again on the next poll
+        for event_id in [event_id for event_id in self.skipped if self.skipped[event_id] is None]:
+            self.skipped[event_id] = created_after.get(event_id)
+        for event in found:
+            del self.skipped[event.event_id]
+        db_now = created_after.get('now')
+        horizon = timedelta(seconds=self.late_horizon)
+        lost = sorted(event_id for event_id, created_at in self.skipped.items()
+                      if created_at is not None and db_now is not None and db_now - created_at >= horizon)
+        for event_id in lost:
+            del self.skipped[event_id]
+        if lost:
+            print(f"Warning: {len(lost)} change event ID(s) {lost[0]}..{lost[-1]} did not appear within "
+                  f"{self.late_horizon:g} s and are given up (rolled back, or committed too late).")
+            self.lost_ids.extend(lost)
+        return found
+
+    def tail(self, interval=0.1, stop=None):
+        """
+        Yields new events as they are committed, polling every 'interval' seconds while there are none.
+
+        Args:
+            interval (float): Seconds between polls of an idle feed.
+            stop (threading.Event): Ends the iteration when set (None = run forever).
+
+        Yields:
+            ChangeEvent: The events in event_id order.
+        """
+        while stop is None or not stop.is_set():
+            events = self.poll()
+            yield from events
+            if len(events) < self.batch_size:
+                if stop is not None:
+                    stop.wait(interval)
+                else:
+                    time.sleep(interval)
+
+    def purge(self, keep=100000, batch_size=5000):
+        """
+        Deletes old events, keeping the newest 'keep' ones (for consumers that are behind).
+        The events are deleted by primary key ranges in short transactions.
+
+        Returns:
+            int: Number of deleted events.
+        """
+        latest = self.latest_id()
+        if not latest or latest <= keep:
+            return 0
+        cutoff = latest - keep
+        deleted = 0
+
+        conn = self.db.connect()
+        if not conn:
+            return 0
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MIN(event_id) FROM change_events")
+            start = cursor.fetchone()[0] or cutoff
+            while start <= cutoff:
+                end = min(start + batch_size - 1, cutoff)
+                cursor.execute("DELETE FROM change_events WHERE event_id BETWEEN %s AND %s", (start, end))
+                conn.commit()
+                deleted += cursor.rowcount
+                start = end + 1
+            return deleted
+        except DatabaseError as err:
+            conn.rollback()
+            print(f"Error purging change events: {err}")
+            return deleted
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def _fetch_ids(self, event_ids):
+        """
+        Reads the events with the given IDs (the skipped ones).
+
+        Returns:
+            tuple[list[ChangeEvent], dict]: The events found (None if the database is unavailable), and
+            for IDs that are still missing and whose gap was not known before, the created_at of the
+            next event; the current time of the database is under the key 'now'.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return None, {}
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT event_id, entity, entity_id, action, payload, created_at FROM change_events "
+                           f"WHERE event_id IN ({', '.join(['%s'] * len(event_ids))})", event_ids)
+            rows = cursor.fetchall()
+            cursor.execute("SELECT NOW()")
+            created_after = {'now': self._as_datetime(cursor.fetchone()[0])}
+            found_ids = {row[0] for row in rows}
+            for event_id in event_ids:
+                if event_id in found_ids or self.skipped.get(event_id) is not None:
+                    continue
+                if event_id - 1 in created_after:  # same gap as the previous ID
+                    created_after[event_id] = created_after[event_id - 1]
+                    continue
+                cursor.execute("SELECT created_at FROM change_events WHERE event_id > %s ORDER BY event_id LIMIT 1",
+                               (event_id,))
+                row = cursor.fetchone()
+                created_after[event_id] = self._as_datetime(row[0]) if row else created_after['now']
+        except DatabaseError as err:
+            print(f"Error reading change events: {err}")
+            return None, {}
+        finally:
+            cursor.close()
+            self.db.close()
+
+        return [self._event(*row) for row in rows], created_after
+
+    @staticmethod
+    def _as_datetime(value):
+        if isinstance(value, str):  # SQLite returns expressions as text
+            return datetime.fromisoformat(value)
+        return value
+
+    @staticmethod
+    def _event(event_id, entity, entity_id, action, payload, created_at):
+        return ChangeEvent(event_id, entity, entity_id, action, json.loads(payload) if payload else None, created_at)
+
+    def _fetch(self, after_id, limit):
+        """
+        Reads events after an ID.
+
+        Returns:
+            list[tuple[ChangeEvent, datetime]]: Each event with the current time of the database.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.FETCH_QUERY, (after_id, limit))
+            rows = cursor.fetchall()
+        except DatabaseError as err:
+            print(f"Error reading change events: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
+
+        return [(self._event(*row[:6]), self._as_datetime(row[6])) for row in rows]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding the connection attempts to one database.
+
+    CLOSED:    connections are attempted normally; consecutive failures are counted.
+    OPEN:      after 'failure_threshold' consecutive failures no connection is attempted
+               (callers fail immediately instead of waiting for the TCP timeout).
+    HALF_OPEN: 'reset_timeout' seconds after opening, one caller is let through as
+               a probe; success closes the circuit, failure opens it again.
+    """
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failure_threshold=3, reset_timeout=10):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.last_error = None
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Decides whether a connection may be attempted now.
+
+        Returns:
+            bool: False while the circuit is open (or a half-open probe is already running).
+        """
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # this caller is the probe
+                return True
+            return False
+
+    def record_success(self):
+        if self.state == self.CLOSED and self.failures == 0:
+            return  # fast path of every successful acquire, no lock needed
+        with self._lock:
+            if self.state != self.CLOSED:
+                print("Database connection restored.")
+            self.state = self.CLOSED
+            self.failures = 0
+            self.last_error = None
+
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state == self.CLOSED:
+                    print(f"Database unavailable after {self.failures} failed attempts, "
+                          f"failing fast for {self.reset_timeout}s.")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def retry_in(self):
+        """
+        Returns:
+            float: Seconds until the next probe is allowed (0 unless the circuit is open).
+        """
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: state, failures, last_error and retry_in (seconds).
+        """
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'last_error': self.last_error,
+                'retry_in': round(retry_in, 1),
+            }
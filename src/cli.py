@@ -0,0 +1,743 @@
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import shlex
+import sys
+
+# Ensure we can import modules from the same directory
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services import ServiceContainer
+
+
+class LibraryCLI(ServiceContainer):
+    """
+    Non-interactive Command Line Interface (UI Layer).
+
+    Runs a single operation per process invocation, e.g.:
+        library books list --format jsonl
+        library borrow --member 1 --book 5
+        library import file.csv
+        library report --format jsonl
+        library loans sweep
+        library reservations add --member 1 --book 5
+
+    The 'batch' command reads many such commands from stdin (one per line) and runs
+    them all in one process over the same pooled database connection.
+
+    The global --branch option selects the branch database when branches are
+    configured (e.g. library --branch 2 books list).
+
+    Results are written to stdout, informational messages printed by the services
+    are redirected to stderr so the output can be piped into other programs.
+    Only the services needed by the executed command are loaded (see ServiceContainer).
+    """
+
+    # Commands that work on a database whose migrations are not applied yet
+    SCHEMA_CHECK_EXEMPT = ('migrate', 'health', 'batch')
+
+    def __init__(self, out=None):
+        """
+        Args:
+            out (file): Stream for command results (default: standard output).
+        """
+        self.out = out or sys.stdout
+        self.parser = self._build_parser()
+
+    def _build_parser(self):
+        """
+        Defines all subcommands and their arguments.
+
+        Returns:
+            argparse.ArgumentParser: The configured parser.
+        """
+        parser = argparse.ArgumentParser(prog="library", description="Library Manager command line interface.")
+        parser.add_argument("--branch", type=int, help="Branch ID (use the branch database, see 'branches' in settings.json).")
+        commands = parser.add_subparsers(dest="command", required=True)
+
+        # library books list|add|search|complete|fuzzy|isbn|delete|prices|purge
+        books = commands.add_parser("books", help="Manage books.")
+        book_commands = books.add_subparsers(dest="action", required=True)
+        books_list = book_commands.add_parser("list", help="List all books with availability.")
+        books_list.add_argument("--authors", action="store_true", help="Include the authors of each book.")
+        self._add_format_argument(books_list)
+        books_list.set_defaults(handler=self.books_list)
+
+        books_add = book_commands.add_parser("add", help="Add a new book.")
+        books_add.add_argument("--title", required=True)
+        books_add.add_argument("--isbn", required=True)
+        books_add.add_argument("--price", type=float, required=True)
+        books_add.add_argument("--publisher", type=int, required=True, help="Publisher ID.")
+        books_add.set_defaults(handler=self.books_add)
+
+        books_search = book_commands.add_parser("search", help="Full-text search in book titles.")
+        books_search.add_argument("text")
+        books_search.add_argument("--limit", type=int, default=20)
+        self._add_format_argument(books_search)
+        books_search.set_defaults(handler=self.books_search)
+
+        books_complete = book_commands.add_parser("complete", help="Suggest titles starting with a prefix.")
+        books_complete.add_argument("prefix")
+        books_complete.add_argument("--limit", type=int, default=10)
+        self._add_format_argument(books_complete)
+        books_complete.set_defaults(handler=self.books_complete)
+
+        books_fuzzy = book_commands.add_parser("fuzzy", help="Typo-tolerant title search.")
+        books_fuzzy.add_argument("text")
+        books_fuzzy.add_argument("--limit", type=int, default=10)
+        self._add_format_argument(books_fuzzy)
+        books_fuzzy.set_defaults(handler=self.books_fuzzy)
+
+        books_isbn = book_commands.add_parser("isbn", help="Look up books by ISBN (e.g. scanned barcodes).")
+        books_isbn.add_argument("isbns", nargs="*", help="ISBN-10/13, hyphens allowed. Read from stdin if omitted.")
+        self._add_format_argument(books_isbn)
+        books_isbn.set_defaults(handler=self.books_isbn)
+
+        books_delete = book_commands.add_parser("delete", help="Withdraw books from the catalogue (soft delete).")
+        books_delete.add_argument("book_ids", type=int, nargs="+", metavar="book_id")
+        books_delete.set_defaults(handler=self.books_delete)
+
+        books_prices = book_commands.add_parser("prices", help="Update prices from 'book_id,price' CSV lines.")
+        books_prices.add_argument("file", nargs="?", help="CSV file (header optional). Read from stdin if omitted.")
+        books_prices.add_argument("--chunk-size", type=int, default=500, help="Prices updated per statement.")
+        self._add_format_argument(books_prices)
+        books_prices.set_defaults(handler=self.books_prices)
+
+        books_purge = book_commands.add_parser("purge",
+                                               help="Permanently delete long withdrawn books and their history.")
+        books_purge.add_argument("--days", type=int, default=365, help="Minimum days since the withdrawal.")
+        books_purge.add_argument("--batch-size", type=int, default=500, help="Books deleted per transaction.")
+        books_purge.set_defaults(handler=self.books_purge)
+
+        # library publishers list
+        publishers = commands.add_parser("publishers", help="List publishers.")
+        publisher_commands = publishers.add_subparsers(dest="action", required=True)
+        publishers_list = publisher_commands.add_parser("list", help="List all publishers.")
+        self._add_format_argument(publishers_list)
+        publishers_list.set_defaults(handler=self.publishers_list)
+
+        # library members list|search|show|add
+        members = commands.add_parser("members", help="Manage members.")
+        member_commands = members.add_subparsers(dest="action", required=True)
+        members_list = member_commands.add_parser("list", help="List members (one page).")
+        members_list.add_argument("--after", type=int, default=0, help="Show members with a higher ID.")
+        members_list.add_argument("--limit", type=int, default=100)
+        self._add_format_argument(members_list)
+        members_list.set_defaults(handler=self.members_list)
+
+        members_search = member_commands.add_parser("search", help="Find members by the beginning of their name.")
+        members_search.add_argument("prefix")
+        members_search.add_argument("--limit", type=int, default=20)
+        self._add_format_argument(members_search)
+        members_search.set_defaults(handler=self.members_search)
+
+        members_show = member_commands.add_parser("show", help="Show a member by ID or e-mail.")
+        members_show.add_argument("member", type=self._member_key, help="Member ID or e-mail.")
+        self._add_format_argument(members_show)
+        members_show.set_defaults(handler=self.members_show)
+
+        members_add = member_commands.add_parser("add", help="Register a new member.")
+        members_add.add_argument("--name", required=True)
+        members_add.add_argument("--email", required=True)
+        members_add.add_argument("--type", default="BASIC", choices=["BASIC", "PREMIUM", "STUDENT"])
+        members_add.set_defaults(handler=self.members_add)
+
+        # library borrow / return
+        borrow = commands.add_parser("borrow", help="Borrow a book (transaction).")
+        borrow.add_argument("--member", type=int, required=True, help="Member ID.")
+        borrow.add_argument("--book", type=int, nargs="+", required=True,
+                            help="Book ID (several IDs are borrowed in one transaction).")
+        borrow.set_defaults(handler=self.borrow)
+
+        return_book = commands.add_parser("return", help="Return a borrowed book.")
+        return_book.add_argument("--book", type=int, required=True, help="Book ID.")
+        return_book.set_defaults(handler=self.return_book)
+
+        # library reservations add|list|cancel
+        reservations = commands.add_parser("reservations", help="Manage the reservation queues of borrowed books.")
+        reservation_commands = reservations.add_subparsers(dest="action", required=True)
+        reservations_add = reservation_commands.add_parser("add", help="Reserve a borrowed book.")
+        reservations_add.add_argument("--member", type=int, required=True, help="Member ID.")
+        reservations_add.add_argument("--book", type=int, required=True, help="Book ID.")
+        reservations_add.set_defaults(handler=self.reservations_add)
+
+        reservations_list = reservation_commands.add_parser("list", help="List waiting reservations in queue order.")
+        reservations_list.add_argument("--book", type=int, help="Only the queue of this book.")
+        self._add_format_argument(reservations_list)
+        reservations_list.set_defaults(handler=self.reservations_list)
+
+        reservations_cancel = reservation_commands.add_parser("cancel", help="Cancel a waiting reservation.")
+        reservations_cancel.add_argument("reservation_id", type=int)
+        reservations_cancel.set_defaults(handler=self.reservations_cancel)
+
+        # library notifications list|send
+        notifications = commands.add_parser("notifications", help="Show or send pending member notifications.")
+        notification_commands = notifications.add_subparsers(dest="action", required=True)
+        notifications_list = notification_commands.add_parser("list", help="List unsent notifications.")
+        self._add_format_argument(notifications_list)
+        notifications_list.set_defaults(handler=self.notifications_list)
+
+        notifications_send = notification_commands.add_parser("send", help="Send all pending notifications.")
+        notifications_send.set_defaults(handler=self.notifications_send)
+
+        # library changes tail|purge
+        changes = commands.add_parser("changes", help="Read the change feed (committed data changes).")
+        change_commands = changes.add_subparsers(dest="action", required=True)
+        changes_tail = change_commands.add_parser("tail", help="Print change events as JSON lines.")
+        changes_tail.add_argument("--after", type=int, default=0, help="Last event ID already processed.")
+        changes_tail.add_argument("--follow", action="store_true", help="Keep waiting for new events (Ctrl+C stops).")
+        changes_tail.set_defaults(handler=self.changes_tail)
+
+        changes_purge = change_commands.add_parser("purge", help="Delete old change events.")
+        changes_purge.add_argument("--keep", type=int, default=100000, help="Number of newest events kept.")
+        changes_purge.set_defaults(handler=self.changes_purge)
+
+        # library loans list
+        loans = commands.add_parser("loans", help="Show loans.")
+        loan_commands = loans.add_subparsers(dest="action", required=True)
+        loans_list = loan_commands.add_parser("list", help="List active loans.")
+        self._add_format_argument(loans_list)
+        loans_list.set_defaults(handler=self.loans_list)
+
+        loans_journal = loan_commands.add_parser("journal", help="List operations waiting in the offline journal.")
+        self._add_format_argument(loans_journal)
+        loans_journal.set_defaults(handler=self.loans_journal)
+
+        loans_sync = loan_commands.add_parser("sync", help="Replay the offline journal to the database.")
+        loans_sync.set_defaults(handler=self.loans_sync)
+
+        loans_sweep = loan_commands.add_parser("sweep", help="Mark loans past their due date as overdue.")
+        loans_sweep.add_argument("--batch-size", type=int, default=1000, help="Loans updated per transaction.")
+        loans_sweep.add_argument("--pause", type=float, default=0.0, help="Seconds to wait between batches.")
+        loans_sweep.set_defaults(handler=self.loans_sweep)
+
+        # library import <file>
+        import_csv = commands.add_parser("import", help="Import books from a CSV file.")
+        import_csv.add_argument("file", help="CSV file name in /data folder or a path to the file.")
+        import_csv.set_defaults(handler=self.import_csv)
+
+        # library report [top-borrowers|overdue]
+        report = commands.add_parser("report", help="Generate the borrowing statistics report.")
+        report.add_argument("kind", nargs="?", choices=["top-borrowers", "overdue"], default="top-borrowers",
+                            help="Report to generate (default: top-borrowers).")
+        self._add_format_argument(report)
+        report.set_defaults(handler=self.report)
+
+        # library batch
+        batch = commands.add_parser("batch", help="Run commands read from stdin, one per line.")
+        batch.add_argument("--stop-on-error", action="store_true", help="Stop at the first failing command.")
+        batch.set_defaults(handler=self.batch)
+
+        # library health
+        health = commands.add_parser("health", help="Check that the database is reachable.")
+        health.set_defaults(handler=self.health)
+
+        # library migrate
+        migrate = commands.add_parser("migrate", help="Apply pending database migrations.")
+        migrate.set_defaults(handler=self.migrate)
+
+        # library serve
+        serve = commands.add_parser("serve", help="Run the HTTP JSON API server.")
+        serve.add_argument("--host", default="127.0.0.1")
+        serve.add_argument("--port", type=int, default=8080)
+        serve.add_argument("--quiet", action="store_true", help="Disable the access log.")
+        serve.set_defaults(handler=self.serve)
+
+        return parser
+
+    @staticmethod
+    def _member_key(value):
+        """
+        Argument type of a member given by ID or e-mail.
+
+        Returns:
+            int | str: The member ID, or the e-mail if the value contains '@'.
+        """
+        if "@" in value:
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"'{value}' is neither a member ID nor an e-mail")
+
+    def _add_format_argument(self, parser):
+        """
+        Adds the common --format option to a listing command.
+        """
+        parser.add_argument("--format", choices=["text", "json", "jsonl"], default="text", help="Output format.")
+
+    def execute(self, argv):
+        """
+        Parses and runs a single command.
+
+        Args:
+            argv (list[str]): Command line arguments (without the program name).
+
+        Returns:
+            int: Exit code (0 = success).
+        """
+        try:
+            args = self.parser.parse_args(argv)
+        except SystemExit as exit_request:
+            # argparse exits on --help and on invalid arguments
+            return exit_request.code or 0
+
+        self.use_branch(args.branch)
+
+        if args.command not in self.SCHEMA_CHECK_EXEMPT:
+            message = self.migration_service.check_schema()
+            if message:
+                print(message, file=sys.stderr)
+                return 1
+
+        # Service messages (progress, transaction logs) go to stderr, results to stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            return args.handler(args)
+
+    # --- COMMAND HANDLERS ---
+
+    def books_list(self, args):
+        """
+        Lists all books together with their availability (and authors with --authors).
+        """
+        if args.authors:
+            books = self.book_repo.get_all_books_with_authors(as_dict=True)
+        else:
+            books = self.book_repo.get_all_books(as_dict=True)
+        borrowed_book_ids = set(self.loan_service.get_borrowed_book_ids())
+
+        rows = []
+        for b in books:
+            status = "BORROWED" if b['book_id'] in borrowed_book_ids else "AVAILABLE"
+            row = {**b, 'status': status}
+            if args.authors:
+                names = [f"{a['first_name']} {a['last_name']}" for a in b['authors']]
+                row['authors'] = ", ".join(names) if args.format == "text" else names
+            rows.append(row)
+
+        columns = ['book_id', 'title', 'isbn', 'price', 'status']
+        self._write_rows(rows, args.format, columns + ['authors'] if args.authors else columns)
+        return 0
+
+    def books_search(self, args):
+        """
+        Full-text search in book titles (most relevant first).
+        """
+        books = self.book_repo.search_books(args.text, args.limit, as_dict=True)
+        self._write_rows(books, args.format, ['book_id', 'title', 'isbn', 'price'])
+        return 0
+
+    def books_complete(self, args):
+        """
+        Prints titles starting with the given prefix (autocomplete).
+        """
+        rows = [{'book_id': book_id, 'title': title}
+                for book_id, title in self.book_repo.autocomplete(args.prefix, args.limit)]
+        self._write_rows(rows, args.format, ['book_id', 'title'])
+        return 0
+
+    def books_fuzzy(self, args):
+        """
+        Prints titles similar to a possibly misspelled text.
+        """
+        rows = [{'book_id': book_id, 'title': title, 'similarity': similarity}
+                for book_id, title, similarity in self.book_repo.fuzzy_search(args.text, args.limit)]
+        self._write_rows(rows, args.format, ['book_id', 'title', 'similarity'])
+        return 0
+
+    def books_isbn(self, args):
+        """
+        Resolves ISBNs to books in one batch. Unknown ISBNs are listed with an empty book ID.
+        Returns 1 if any ISBN was not found.
+        """
+        isbns = args.isbns or [line.strip() for line in sys.stdin if line.strip()]
+        books = self.book_repo.find_by_isbns(isbns, as_dict=True)
+
+        empty = dict.fromkeys(['book_id', 'title', 'isbn', 'price'])
+        rows = [{'query': isbn, **(book or empty)} for isbn, book in books.items()]
+        self._write_rows(rows, args.format, ['query', 'book_id', 'title', 'isbn', 'price'])
+        return 0 if all(books.values()) else 1
+
+    def books_add(self, args):
+        """
+        Adds a new book and prints its ID.
+        """
+        new_id = self.book_repo.add_book(args.title, args.isbn, args.price, args.publisher)
+        if new_id is None:
+            return 1
+        print(new_id, file=self.out)
+        return 0
+
+    def books_delete(self, args):
+        """
+        Withdraws books by their IDs (they stay in the loan history).
+        Returns 1 if any book could not be withdrawn.
+        """
+        if len(args.book_ids) == 1:
+            return 0 if self.book_repo.delete_book(args.book_ids[0]) else 1
+        results = self.book_repo.deactivate_books(args.book_ids)
+        for book_id, withdrawn in results.items():
+            if not withdrawn:
+                print(f"Error: Book ID {book_id} was not withdrawn (unknown, already withdrawn or a database error).",
+                      file=sys.stderr)
+        print(f"Books withdrawn: {sum(results.values())} of {len(results)}", file=self.out)
+        return 0 if all(results.values()) else 1
+
+    def books_prices(self, args):
+        """
+        Updates many prices at once (e.g. a supplier price list) and reports the result per book.
+        Returns 1 if any book was not found or any price is not a number.
+        """
+        with open(args.file, mode='r', encoding='utf-8') if args.file else contextlib.nullcontext(sys.stdin) as file:
+            prices = {}
+            invalid = {}
+            for row in csv.reader(file):
+                if len(row) < 2 or not row[0].strip().isdigit():
+                    continue  # header or empty line
+                try:
+                    price = float(row[1])
+                except ValueError:
+                    price = None
+                if price is None or not math.isfinite(price):
+                    invalid[int(row[0])] = row[1]
+                else:
+                    prices[int(row[0])] = price
+
+        results = self.book_repo.update_prices(prices, chunk_size=args.chunk_size)
+        rows = [{'book_id': book_id, 'price': prices[book_id], 'status': "UPDATED" if updated else "NOT FOUND"}
+                for book_id, updated in results.items()]
+        rows += [{'book_id': book_id, 'price': price, 'status': "INVALID PRICE"} for book_id, price in invalid.items()]
+        self._write_rows(rows, args.format, ['book_id', 'price', 'status'])
+        return 0 if all(results.values()) and not invalid else 1
+
+    def books_purge(self, args):
+        """
+        Deletes withdrawn books older than --days (meant to be run periodically, e.g. monthly by cron).
+        """
+        purged = self.book_repo.purge_inactive_books(older_than_days=args.days, batch_size=args.batch_size)
+        print(f"Purged books: {purged}", file=self.out)
+        return 0
+
+    def publishers_list(self, args):
+        """
+        Lists all publishers.
+        """
+        self._write_rows(self.book_repo.get_all_publishers(as_dict=True), args.format, ['publisher_id', 'name'])
+        return 0
+
+    def members_list(self, args):
+        """
+        Lists one page of members (use the last ID as --after for the next page).
+        """
+        members = self.member_repo.list_members(args.after, args.limit, as_dict=True)
+        self._write_rows(members, args.format, ['member_id', 'full_name', 'email', 'membership_type'])
+        return 0
+
+    def members_search(self, args):
+        """
+        Lists members whose name starts with the given text.
+        """
+        members = self.member_repo.search_by_name(args.prefix, args.limit, as_dict=True)
+        self._write_rows(members, args.format, ['member_id', 'full_name', 'email', 'membership_type'])
+        return 0
+
+    def members_show(self, args):
+        """
+        Shows a single member found by ID or e-mail. Returns 1 if the member does not exist.
+        """
+        if isinstance(args.member, str):
+            member = self.member_repo.get_by_email(args.member, as_dict=True)
+        else:
+            member = self.member_repo.get_by_id(args.member, as_dict=True)
+        if member is None:
+            print(f"Error: Member '{args.member}' not found.")
+            return 1
+        self._write_rows([member], args.format, ['member_id', 'full_name', 'email', 'membership_type', 'joined_at'])
+        return 0
+
+    def members_add(self, args):
+        """
+        Registers a new member and prints its ID.
+        """
+        new_id = self.member_repo.add_member(args.name, args.email, args.type)
+        if new_id is None:
+            return 1
+        print(new_id, file=self.out)
+        return 0
+
+    def borrow(self, args):
+        """
+        Borrows a book for a member.
+        """
+        if len(args.book) == 1:
+            message = self.loan_service.borrow_book(args.member, args.book[0])
+            print(message, file=self.out)
+            return 0 if message.startswith("Success") else 1
+
+        results = self.loan_service.borrow_books(args.member, args.book)
+        for book_id, message in results.items():
+            print(f"Book {book_id}: {message}", file=self.out)
+        return 0 if all(message.startswith("Success") for message in results.values()) else 1
+
+    def return_book(self, args):
+        """
+        Returns a borrowed book.
+        """
+        message = self.loan_service.return_book(args.book)
+        print(message, file=self.out)
+        return 0 if message.startswith("Success") else 1
+
+    def reservations_add(self, args):
+        """
+        Adds a member to the reservation queue of a borrowed book.
+        """
+        message = self.reservation_service.reserve_book(args.member, args.book)
+        print(message, file=self.out)
+        return 0 if message.startswith("Success") else 1
+
+    def reservations_list(self, args):
+        """
+        Lists waiting reservations, the head of each queue first.
+        """
+        self._write_rows(self.reservation_service.get_waiting_reservations(args.book, as_dict=True), args.format,
+                         ['reservation_id', 'full_name', 'book_id', 'title', 'reserved_at'])
+        return 0
+
+    def reservations_cancel(self, args):
+        """
+        Cancels a waiting reservation.
+        """
+        message = self.reservation_service.cancel_reservation(args.reservation_id)
+        print(message, file=self.out)
+        return 0 if message.startswith("Success") else 1
+
+    def notifications_list(self, args):
+        """
+        Lists notifications waiting in the outbox.
+        """
+        self._write_rows(self.notification_outbox.pending(as_dict=True), args.format,
+                         ['notification_id', 'email', 'kind', 'created_at', 'attempts'])
+        return 0
+
+    def notifications_send(self, args):
+        """
+        Sends the pending notifications (for a scheduler when no API server runs the dispatcher).
+        """
+        sent = self.notification_outbox.dispatch()
+        print(f"Sent notifications: {sent}", file=self.out)
+        return 0
+
+    def changes_tail(self, args):
+        """
+        Prints the change events after --after as JSON lines (and waits for more with --follow).
+        """
+        feed = self.change_feed(args.after)
+        try:
+            if args.follow:
+                for event in feed.tail():
+                    print(json.dumps(event._asdict(), default=str), file=self.out, flush=True)
+            else:
+                events = feed.poll()
+                while events:
+                    for event in events:
+                        print(json.dumps(event._asdict(), default=str), file=self.out)
+                    events = feed.poll()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    def changes_purge(self, args):
+        """
+        Deletes change events older than the newest --keep ones.
+        """
+        print(f"Deleted change events: {self.change_feed().purge(args.keep)}", file=self.out)
+        return 0
+
+    def loans_list(self, args):
+        """
+        Lists all active loans.
+        """
+        self._write_rows(self.loan_service.get_active_loans(as_dict=True), args.format,
+                         ['loan_id', 'full_name', 'title', 'loan_date', 'due_date'])
+        return 0
+
+    def loans_journal(self, args):
+        """
+        Lists borrows and returns recorded offline and not yet replayed.
+        """
+        journal = getattr(self.loan_service, 'journal', None)
+        self._write_rows(journal.pending() if journal else [], args.format,
+                         ['seq', 'op', 'member_id', 'book_id', 'at'])
+        return 0
+
+    def loans_sync(self, args):
+        """
+        Replays the offline journal. Returns 1 if operations are still waiting (database unavailable).
+        """
+        if getattr(self.loan_service, 'journal', None) is None:
+            print("Offline journal is disabled ('offline_journal' in settings.json).", file=self.out)
+            return 0
+        summary = self.loan_service.replay_journal()
+        print(f"Applied: {summary['applied']}, conflicts: {summary['conflicts']}, pending: {summary['pending']}",
+              file=self.out)
+        return 0 if summary['pending'] == 0 else 1
+
+    def loans_sweep(self, args):
+        """
+        Marks overdue loans (meant to be run periodically, e.g. nightly by cron).
+        """
+        marked = self.loan_service.mark_overdue_loans(batch_size=args.batch_size, pause=args.pause)
+        print(f"Marked as overdue: {marked}", file=self.out)
+        return 0
+
+    def import_csv(self, args):
+        """
+        Imports books from a CSV file.
+        """
+        message = self.import_service.import_books_from_csv(args.file)
+        print(message.strip(), file=self.out)
+        return 0 if "--- Import Finished ---" in message else 1
+
+    def report(self, args):
+        """
+        Prints the borrowing statistics report or the overdue loans report.
+        """
+        if args.kind == "overdue":
+            if args.format == "text":
+                print(self.report_service.generate_overdue_report(), file=self.out)
+            else:
+                self._write_rows(self.report_service.get_overdue_loans(as_dict=True), args.format, [])
+        elif args.format == "text":
+            print(self.report_service.generate_top_borrowers_report(), file=self.out)
+        else:
+            self._write_rows(self.report_service.get_top_borrowers(as_dict=True), args.format, [])
+        return 0
+
+    def batch(self, args):
+        """
+        Runs commands read from stdin, one command per line (same syntax as on the command line).
+        Empty lines and lines starting with '#' are ignored.
+
+        All commands share this process and its connection pool, so there is no
+        per-command start-up or connection cost.
+        """
+        failed = 0
+        executed = 0
+
+        for line_no, line in enumerate(sys.stdin, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            try:
+                argv = shlex.split(line)
+            except ValueError as e:
+                print(f"Line {line_no}: {e}")
+                failed += 1
+                continue
+
+            if argv[0] == "batch":
+                print(f"Line {line_no}: nested batch is not allowed")
+                failed += 1
+                continue
+
+            if args.branch is not None and "--branch" not in argv:
+                # Lines without --branch use the branch of the batch ('library --branch 2 batch')
+                argv = ["--branch", str(args.branch)] + argv
+
+            executed += 1
+            if self.execute(argv) != 0:
+                failed += 1
+                print(f"Line {line_no}: command failed: {line}")
+                if args.stop_on_error:
+                    break
+
+        print(f"Batch finished: {executed} commands, {failed} failed.")
+        return 0 if failed == 0 else 1
+
+    def health(self, args):
+        """
+        Connects to the database (and the branch databases) and prints the circuit breaker states as JSON.
+        """
+        if self.backend_name == 'memory':
+            print(json.dumps({'status': 'ok', 'databases': {}}), file=self.out)
+            return 0
+
+        from db_connection import DatabaseConnection
+        db = DatabaseConnection()
+        ok = True
+        for branch_id in [None] + ([self.branch_id] if self.branch_id is not None else db.branch_ids):
+            target = db.for_branch(branch_id)
+            if target.connect():
+                target.close()
+            else:
+                ok = False
+        status = {'status': 'ok' if ok else 'unavailable', 'databases': db.health()}
+        print(json.dumps(status), file=self.out)
+        return 0 if ok else 1
+
+    def migrate(self, args):
+        """
+        Applies pending database migrations.
+        """
+        message = self.migration_service.apply_migrations()
+        print(message, file=self.out)
+        return 1 if message.startswith(("Migration Failed", "DB Connection Failed")) else 0
+
+    def serve(self, args):
+        """
+        Runs the HTTP JSON API server until interrupted.
+        """
+        from api_server import serve
+        serve(args.host, args.port, args.quiet)
+        return 0
+
+    # --- OUTPUT HELPERS ---
+
+    def _write_rows(self, rows, fmt, columns):
+        """
+        Writes a list of rows in the selected format.
+
+        Args:
+            rows (list[dict]): Data to write.
+            fmt (str): 'text' (aligned table), 'json' (one array) or 'jsonl' (one object per line).
+            columns (list[str]): Columns shown in text format.
+        """
+        if fmt == "json":
+            json.dump(rows, self.out, default=str, ensure_ascii=False)
+            self.out.write("\n")
+        elif fmt == "jsonl":
+            for row in rows:
+                self.out.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+        else:
+            print(" | ".join(f"{c:<15}" for c in columns), file=self.out)
+            print("-" * (18 * len(columns)), file=self.out)
+            for row in rows:
+                print(" | ".join(f"{str(row[c]):<15}" for c in columns), file=self.out)
+
+
+def main(argv=None):
+    """
+    Entry point of the command line interface.
+
+    Args:
+        argv (list[str]): Arguments without the program name (default: sys.argv[1:]).
+
+    Returns:
+        int: Exit code.
+    """
+    cli = LibraryCLI()
+    try:
+        return cli.execute(sys.argv[1:] if argv is None else argv)
+    finally:
+        # Only disconnect if some command actually used the database
+        if 'db_connection' in sys.modules:
+            from db_connection import DatabaseConnection
+            DatabaseConnection().shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import threading
+import time
+
+
+class _PooledConnection:
+    """
+    Idle connection kept by the pool, with its timestamps (time.monotonic()).
+    """
+    __slots__ = ('conn', 'created_at', 'released_at', 'checked_at')
+
+    def __init__(self, conn, created_at, released_at):
+        self.conn = conn
+        self.created_at = created_at
+        self.released_at = released_at
+        self.checked_at = released_at
+
+
+class ConnectionPool:
+    """
+    Simple pool of reusable database connections.
+
+    Instead of opening a new TCP connection (handshake + authentication) for every
+    repository call, released connections are kept idle and handed out again on
+    the next acquire. This makes repeated operations (menu actions, CLI batch
+    commands) almost free in terms of connection setup.
+
+    Idle connections may be closed by the server in the meantime (MySQL
+    'wait_timeout'), so the pool:
+    - evicts connections idle for longer than max_idle or older than max_lifetime,
+    - validates (pings) a connection idle for longer than validate_after before handing it out,
+    - keeps the remaining idle connections alive with maintain(), called
+      periodically by the keep-alive thread of DatabaseConnection.
+    """
+
+    def __init__(self, factory, size=5, max_idle=None, max_lifetime=None, validate_after=None):
+        """
+        Args:
+            factory (callable): Function that opens and returns a new connection.
+            size (int): Maximum number of idle connections kept for reuse.
+            max_idle (float): Seconds after which an idle connection is closed (None = never).
+            max_lifetime (float): Seconds after which a connection is closed instead of reused (None = never).
+            validate_after (float): Idle seconds after which a connection is pinged before use (None = never).
+        """
+        self.factory = factory
+        self.size = size
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+        self._idle = []
+        self._created_at = {}  # id(connection) -> creation time, for all open connections
+        self._created = 0
+        self._evicted = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Returns an idle connection from the pool, or opens a new one if none is available.
+
+        Returns:
+            object: An open database connection.
+        """
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            if self._is_expired(entry, now):
+                self._evict(entry.conn)
+            elif (self.validate_after is not None and now - entry.checked_at >= self.validate_after
+                  and not self._is_alive(entry.conn)):
+                self._evict(entry.conn)
+            else:
+                return entry.conn
+
+        conn = self.factory()
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self._created += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Returns a connection to the pool.
+
+        Any unfinished transaction is rolled back first, so the next user gets a clean
+        session (and a fresh read snapshot). Broken connections are discarded.
+
+        Args:
+            conn (object): The connection previously obtained from acquire().
+            discard (bool): The caller knows the connection is broken (e.g. the server
+                went away), close it instead of keeping it for reuse.
+        """
+        if discard:
+            self._evict(conn)
+            return
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self._evict(conn)
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            entry = _PooledConnection(conn, self._created_at.get(id(conn), now), now)
+            expired = self._is_expired(entry, now)
+            if not expired and len(self._idle) < self.size:
+                self._idle.append(entry)
+                return
+        if expired:
+            self._evict(conn)
+        else:
+            self._discard(conn)  # the pool is full
+
+    def maintain(self, ping_after=None):
+        """
+        Evicts expired idle connections and pings the others, so the server does not
+        close them for inactivity. Called periodically by the keep-alive thread.
+
+        Args:
+            ping_after (float): Ping connections not used or checked for this many seconds (None = no ping).
+        """
+        now = time.monotonic()
+        expired, stale, keep = [], [], []
+        with self._lock:
+            for entry in self._idle:
+                if self._is_expired(entry, now):
+                    expired.append(entry)
+                elif ping_after is not None and now - entry.checked_at >= ping_after:
+                    stale.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+
+        for entry in expired:
+            self._evict(entry.conn)
+
+        alive = []
+        for entry in stale:
+            if self._is_alive(entry.conn):
+                entry.checked_at = time.monotonic()
+                alive.append(entry)
+            else:
+                self._evict(entry.conn)
+        with self._lock:
+            # Checked connections go to the front: the most recently used ones are handed out first
+            room = max(0, self.size - len(self._idle))
+            self._idle[:0] = alive[:room]
+            surplus = alive[room:]
+        for entry in surplus:
+            self._discard(entry.conn)
+
+    def stats(self):
+        """
+        Returns:
+            dict: in_use, idle, created and evicted connection counts.
+        """
+        with self._lock:
+            return {
+                'in_use': len(self._created_at) - len(self._idle),
+                'idle': len(self._idle),
+                'created': self._created,
+                'evicted': self._evicted,
+            }
+
+    def close_all(self):
+        """
+        Closes all idle connections (e.g. when the application exits).
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry.conn)
+
+    def _is_expired(self, entry, now):
+        return (self.max_idle is not None and now - entry.released_at >= self.max_idle
+                or self.max_lifetime is not None and now - entry.created_at >= self.max_lifetime)
+
+    @staticmethod
+    def _is_alive(conn):
+        """
+        Pings a connection (MySQL COM_PING, SQLite 'SELECT 1').
+        """
+        try:
+            return conn.is_connected()
+        except Exception:
+            return False
+
+    def _evict(self, conn):
+        """
+        Closes a connection that is expired or broken.
+        """
+        with self._lock:
+            self._evicted += 1
+        self._discard(conn)
+
+    def _discard(self, conn):
+        """
+        Closes a connection, ignoring errors from already dead sessions.
+        """
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,64 @@
+class DataLoader:
+    """
+    Batching and caching helper for loading related data (DataLoader pattern).
+
+    Instead of one query per item (the N+1 query problem, e.g. authors of every
+    listed book queried separately), all requested keys are collected and loaded
+    by one call of the batch function per chunk. Loaded values are cached for the
+    lifetime of the loader, so a loader is meant to be created per request/listing.
+    """
+
+    def __init__(self, batch_function, max_batch_size=1000, default=None):
+        """
+        Args:
+            batch_function (callable): Function (list of keys) -> dict key -> value,
+                performing one database query for all the keys.
+            max_batch_size (int): Maximum number of keys passed to one batch call.
+            default: Value for keys the batch function returns nothing for.
+        """
+        self.batch_function = batch_function
+        self.max_batch_size = max_batch_size
+        self.default = default
+        self._cache = {}
+        self.batch_calls = 0
+
+    def load(self, key):
+        """
+        Returns the value for a single key.
+        """
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        """
+        Returns values for many keys, loading the uncached ones in batches.
+
+        Args:
+            keys (iterable): Keys to load (duplicates are loaded only once).
+
+        Returns:
+            list: Values in the order of the keys.
+        """
+        keys = list(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in self._cache]
+        for start in range(0, len(missing), self.max_batch_size):
+            chunk = missing[start:start + self.max_batch_size]
+            loaded = self.batch_function(chunk)
+            self.batch_calls += 1
+            for key in chunk:
+                self._cache[key] = loaded.get(key, self.default)
+        return [self._cache[key] for key in keys]
+
+    def prime(self, key, value):
+        """
+        Stores an already known value, so it is never loaded.
+        """
+        self._cache.setdefault(key, value)
+
+    def clear(self, key=None):
+        """
+        Forgets one cached key, or all keys if none is given.
+        """
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
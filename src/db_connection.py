@@ -1,7 +1,12 @@
-import mysql.connector
-import json
-import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backends import DatabaseError, create_backend
+from circuit_breaker import CircuitBreaker
+from connection_pool import ConnectionPool
+from replicas import ReplicaSet
+from settings import get_base_dir, load_settings
 
 
 class DatabaseConnection:
@@ -9,8 +14,38 @@ class DatabaseConnection:
     Singleton class responsible for managing the database connection.
     It reads configuration from 'config/settings.json' and ensures only one
     active connection configuration is loaded.
+
+    The database itself is provided by a backend (see backends.py): a MySQL
+    server (default) or an embedded SQLite file ("backend": "sqlite").
+
+    Connections are served from a ConnectionPool, so close() returns the
+    connection for reuse instead of disconnecting from the server.
+    Acquired connections are tracked per thread, so the instance can be shared
+    by concurrently running request handlers (see api_server.py).
+
+    With "replicas" configured (MySQL only), connect(read_only=True) is served by
+    a read replica (see replicas.py). Writes use the primary, and so do all reads
+    of a thread for 'read_your_writes_seconds' after it used the primary, so a
+    user always sees their own changes even if the replicas lag behind.
+
+    With "branches" configured, every library branch has its own database (shard)
+    with its books, members and loans. Services bound to a branch use
+    for_branch(branch_id); cross-branch reports run on all shards and the
+    default database in parallel (for_each_branch).
+
+    Idle pooled connections are evicted after 'pool_max_idle_seconds', every
+    connection is replaced after 'pool_max_lifetime_seconds', and a background
+    keep-alive thread pings idle connections every 'pool_keepalive_seconds', so
+    a session left in the menu for hours does not hit a connection closed by
+    the server's wait_timeout. pool_stats() reports the state of all pools.
+
+    Connection attempts to the primary and to each branch database are guarded
+    by a CircuitBreaker: after 'circuit_failure_threshold' consecutive failures,
+    connect() returns None immediately (no TCP timeout per menu action) until a
+    probe after 'circuit_reset_seconds' succeeds. health() reports the states.
     """
     _instance = None
+    _lock = threading.Lock()
 
     def __new__(cls):
         """
@@ -18,70 +53,400 @@ class DatabaseConnection:
         If an instance already exists, it returns the existing one.
         """
         if cls._instance is None:
-            cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            cls._instance.connection = None
-            cls._instance.config = cls._instance._load_config()
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super(DatabaseConnection, cls).__new__(cls)
+                    instance._local = threading.local()
+                    instance.pool = None
+                    instance.replicas = None
+                    instance.shards = {}
+                    instance.breakers = {}
+                    instance._keepalive_stop = threading.Event()
+                    instance._keepalive_thread = None
+                    instance.config = instance._load_config()
+                    instance.backend = create_backend(instance.config) if instance.config else None
+                    cls._instance = instance
         return cls._instance
 
+    @property
+    def _open_connections(self):
+        """
+        Stack of (pool, connection, read_only) entries acquired (and not yet closed) by the current thread.
+        """
+        if not hasattr(self._local, 'connections'):
+            self._local.connections = []
+        return self._local.connections
+
+    @property
+    def connection(self):
+        """
+        The connection most recently acquired by the current thread (or None).
+        """
+        stack = self._open_connections
+        return stack[-1][1] if stack else None
+
     def _load_config(self):
         """
         Loads database connection settings from the JSON configuration file.
-
-        It handles path resolution for two scenarios:
-        1. Running as a script (development environment).
-        2. Running as a compiled EXE file (production/frozen environment).
+        The file itself is parsed only once per process (see settings.load_settings).
 
         Returns:
             dict: Database configuration settings (host, user, password, database).
             None: If the configuration file is not found.
         """
-        # Determine the base path depending on whether the app is frozen (EXE) or script
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-        config_path = os.path.join(base_dir, 'config', 'settings.json')
-
         try:
-            with open(config_path, 'r') as file:
-                data = json.load(file)
-                return data['database']
-        except FileNotFoundError:
-            print(f"CRITICAL ERROR: Config file not found at {config_path}")
+            return load_settings()['database']
+        except FileNotFoundError as err:
+            print(f"CRITICAL ERROR: Config file not found at {err.filename}")
             print("Make sure 'config' folder is next to the executable.")
             if getattr(sys, 'frozen', False):
                 input("Press Enter to exit...")
             return None
 
-    def connect(self):
+    @property
+    def dialect(self):
+        """
+        Name of the configured backend ('mysql' or 'sqlite'), for the few queries that differ.
+        """
+        return self.backend.name if self.backend else None
+
+    @property
+    def use_pure(self):
+        """
+        True if the pure Python MySQL connector is used (MySQL backend only).
+        """
+        return getattr(self.backend, 'use_pure', None)
+
+    def set_connector(self, mode):
+        """
+        Switches the MySQL connector implementation at runtime (used by benchmarks).
+        Pooled connections of the previous implementation are closed.
+
+        Args:
+            mode (str): 'auto', 'c' or 'pure'.
+        """
+        self.shutdown()
+        for backend in [self.backend] + [backend for backend, _ in self.shards.values()]:
+            backend.use_pure = backend.select_connector(mode)
+
+    def _create_connection(self):
+        """
+        Opens a brand new connection through the configured backend (used by the pool).
+
+        Returns:
+            object: A new database connection (MySQLConnection or SQLiteConnection).
+        """
+        return self.backend.connect()
+
+    @property
+    def branch_ids(self):
         """
-        Establishes a connection to the MySQL database using the loaded configuration.
+        IDs of the branches with their own database (empty if sharding is not configured).
+        """
+        if not self.config:
+            return []
+        return sorted(int(branch_id) for branch_id in self.config.get('branches') or {})
+
+    def for_branch(self, branch_id):
+        """
+        Returns the connection manager for the database of a branch.
+
+        Args:
+            branch_id (int): ID of the branch (None = the default database).
+
+        Returns:
+            DatabaseConnection or BranchConnection: Object with connect()/close()/dialect.
+        """
+        if branch_id is None:
+            return self
+        return BranchConnection(self, branch_id)
+
+    def for_each_branch(self, function, include_default=False):
+        """
+        Runs a function for every branch in parallel threads (one per shard), so a
+        cross-branch query takes as long as the slowest shard, not the sum of all.
+
+        Args:
+            function (callable): Function (branch_id) -> result.
+            include_default (bool): Also run it for the default database (branch_id None), which
+                holds the loans made without a branch (the menu, the API, the CLI without --branch).
+
+        Returns:
+            dict[int, object]: Branch ID -> result of the function.
+        """
+        branch_ids = self.branch_ids
+        if not branch_ids:
+            return {}
+        if include_default:
+            branch_ids = [None] + branch_ids
+        with ThreadPoolExecutor(max_workers=len(branch_ids), thread_name_prefix="branch") as executor:
+            return dict(zip(branch_ids, executor.map(function, branch_ids)))
+
+    def connect(self, read_only=False, branch_id=None):
+        """
+        Gets a connection to the database using the loaded configuration.
+        The connection is taken from the pool, so repeated calls reuse the same session.
+
+        Every connect() must be paired with a close(). Calls may be nested; close()
+        always releases the most recently acquired connection.
+
+        Args:
+            read_only (bool): The caller only reads, a read replica may be used.
+            branch_id (int): Use the database of this branch (None = the default database).
 
         Returns:
-            mysql.connector.connection.MySQLConnection: The active database connection object.
+            object: The active database connection object (MySQLConnection or SQLiteConnection).
             None: If the connection fails or configuration is missing.
         """
-        if self.config is None:
+        if self.backend is None:
             return None
 
-        try:
-            # 'use_pure=True' is required for compatibility with PyInstaller (EXE builds)
-            self.connection = mysql.connector.connect(
-                host=self.config['host'],
-                user=self.config['user'],
-                password=self.config['password'],
-                database=self.config['database'],
-                use_pure=True
+        if self.pool is None:
+            with self._lock:
+                if self.pool is None:
+                    self._create_pools()
+
+        if branch_id is not None:
+            return self._connect_shard(branch_id, read_only)
+
+        conn = None
+        pool = self._choose_replica() if read_only else None
+        if pool is not None:
+            try:
+                conn = pool.acquire()
+            except DatabaseError as err:
+                print(f"Warning: Read replica unavailable, using the primary: {err}")
+                self.replicas.mark_down(pool)
+
+        if conn is None:
+            pool = self.pool
+            conn = self._acquire_guarded('primary', pool)
+            if conn is None:
+                return None
+
+        self._open_connections.append((pool, conn, read_only))
+        return conn
+
+    def _create_pools(self):
+        """
+        Creates the pool of the primary and, if configured, the pools of the read replicas.
+        """
+        replica_configs = self.config.get('replicas') or []
+        if replica_configs and self.dialect == 'mysql':
+            self.replicas = ReplicaSet(
+                replica_configs, self.backend.connect, self.config.get('pool_size', 5),
+                max_lag=self.config.get('max_replica_lag_seconds', 5),
+                check_interval=self.config.get('replica_check_interval_seconds', 5),
+                pool_options=self._pool_options()
             )
-            return self.connection
-        except mysql.connector.Error as err:
+        self.pool = self._new_pool(self._create_connection)
+        self._start_keepalive()
+
+    def _pool_options(self):
+        """
+        Idle eviction settings of the pools (seconds, 0 = disabled).
+        """
+        def seconds(key, default):
+            return self.config.get(key, default) or None
+        return {
+            'max_idle': seconds('pool_max_idle_seconds', 600),
+            'max_lifetime': seconds('pool_max_lifetime_seconds', 3600),
+            'validate_after': seconds('pool_validate_after_seconds', 30),
+        }
+
+    def _new_pool(self, factory):
+        return ConnectionPool(factory, self.config.get('pool_size', 5), **self._pool_options())
+
+    def _all_pools(self):
+        """
+        Returns:
+            dict[str, ConnectionPool]: Name -> pool ('primary', 'replica <host:port>', 'branch <id>').
+        """
+        pools = {'primary': self.pool} if self.pool else {}
+        if self.replicas:
+            pools.update({f"replica {name}": pool for name, pool in self.replicas.pools().items()})
+        pools.update({f"branch {key}": pool for key, (_, pool) in list(self.shards.items())})
+        return pools
+
+    def pool_stats(self):
+        """
+        Returns the connection counts of all pools.
+
+        Returns:
+            dict[str, dict]: Pool name -> {in_use, idle, created, evicted}.
+        """
+        return {name: pool.stats() for name, pool in self._all_pools().items()}
+
+    def _start_keepalive(self):
+        """
+        Starts the background thread maintaining idle connections ('pool_keepalive_seconds', 0 = disabled).
+        """
+        interval = self.config.get('pool_keepalive_seconds', 60)
+        if not interval or self._keepalive_thread is not None:
+            return
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive, args=(interval,), name="db-keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+
+    def _keepalive(self, interval):
+        while not self._keepalive_stop.wait(interval):
+            for pool in self._all_pools().values():
+                pool.maintain(ping_after=interval)
+
+    def shard_backend(self, branch_id):
+        """
+        Returns the backend of a branch database, creating it and its pool on first use.
+
+        Raises:
+            KeyError: If the branch is not in the 'branches' shard map.
+        """
+        key = str(branch_id)
+        if key not in self.shards:
+            branches = self.config.get('branches') or {}
+            if key not in branches:
+                raise KeyError(f"Unknown branch {branch_id} (not in 'branches' of settings.json)")
+            with self._lock:
+                if key not in self.shards:
+                    # Branch settings override the default ones (host, database, sqlite path...)
+                    backend = create_backend({**self.config, **branches[key]})
+                    self.shards[key] = (backend, self._new_pool(backend.connect))
+        return self.shards[key][0]
+
+    def _connect_shard(self, branch_id, read_only):
+        """
+        Acquires a connection to the database of a branch (shards have no read replicas).
+        """
+        try:
+            self.shard_backend(branch_id)
+        except KeyError as err:
+            print(f"Database Connection Error: {err.args[0]}")
+            return None
+        pool = self.shards[str(branch_id)][1]
+        conn = self._acquire_guarded(f"branch {branch_id}", pool)
+        if conn is None:
+            return None
+        self._open_connections.append((pool, conn, read_only))
+        return conn
+
+    def _breaker(self, name):
+        """
+        Returns the circuit breaker of a database ('primary' or 'branch <id>'), creating it on first use.
+        """
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self.breakers.setdefault(name, CircuitBreaker(
+                    self.config.get('circuit_failure_threshold', 3),
+                    self.config.get('circuit_reset_seconds', 10)
+                ))
+        return breaker
+
+    def _acquire_guarded(self, name, pool):
+        """
+        Acquires a connection from a pool unless the circuit breaker of the database is open.
+
+        Returns:
+            object: The connection, or None if the database is unavailable.
+        """
+        breaker = self._breaker(name)
+        if not breaker.allow():
+            print(f"Database Connection Error: {name} database unavailable, "
+                  f"next attempt in {breaker.retry_in():.0f}s ({breaker.last_error})")
+            return None
+        try:
+            conn = pool.acquire()
+        except DatabaseError as err:
+            breaker.record_failure(err)
             print(f"Database Connection Error: {err}")
             return None
+        breaker.record_success()
+        return conn
+
+    def health(self):
+        """
+        Returns the circuit breaker states of the databases used so far.
 
-    def close(self):
+        Returns:
+            dict[str, dict]: Database name -> {state, failures, last_error, retry_in}.
+        """
+        return {name: breaker.snapshot() for name, breaker in list(self.breakers.items())}
+
+    @property
+    def available(self):
         """
-        Closes the active database connection if it exists and is open.
+        False while the circuit breaker of the primary database is open.
         """
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
\ No newline at end of file
+        breaker = self.breakers.get('primary')
+        return breaker is None or breaker.state != CircuitBreaker.OPEN
+
+    def _choose_replica(self):
+        """
+        Returns the pool of a usable read replica, or None if the read must go to the primary.
+        """
+        if not self.replicas:
+            return None
+        # Read-your-writes: the thread recently used the primary for a (possible) write, stay there
+        primary_used_at = getattr(self._local, 'primary_used_at', None)
+        window = self.config.get('read_your_writes_seconds', 2)
+        if primary_used_at is not None and time.monotonic() - primary_used_at < window:
+            return None
+        return self.replicas.choose()
+
+    def close(self, discard=False):
+        """
+        Releases the most recently acquired connection (of the current thread) back to its pool.
+
+        Args:
+            discard (bool): Close the connection instead of reusing it (it is known to be broken).
+        """
+        if self._open_connections:
+            pool, conn, read_only = self._open_connections.pop()
+            pool.release(conn, discard)
+            if not read_only:
+                self._local.primary_used_at = time.monotonic()
+
+    def shutdown(self):
+        """
+        Disconnects all pooled connections. Called when the application exits.
+        """
+        while self._open_connections:
+            self.close()
+        if self._keepalive_thread is not None:
+            self._keepalive_stop.set()
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+        if self.pool:
+            self.pool.close_all()
+        if self.replicas:
+            self.replicas.close_all()
+        for _, pool in self.shards.values():
+            pool.close_all()
+        # The next connect() creates the pools (and the keep-alive thread) again
+        self.pool = None
+        self.replicas = None
+
+
+class BranchConnection:
+    """
+    DatabaseConnection bound to the database of one branch (see DatabaseConnection.for_branch).
+    Repositories and services use it exactly like the DatabaseConnection itself.
+    """
+
+    def __init__(self, db, branch_id):
+        self.db = db
+        self.branch_id = branch_id
+
+    @property
+    def dialect(self):
+        try:
+            return self.db.shard_backend(self.branch_id).name
+        except KeyError:
+            return None
+
+    def connect(self, read_only=False):
+        return self.db.connect(read_only, branch_id=self.branch_id)
+
+    def close(self, discard=False):
+        self.db.close(discard)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import csv
-import mysql.connector
 import os
-import sys
-from db_connection import DatabaseConnection
+from db_connection import DatabaseConnection, DatabaseError
+from book_repository import BookRepository
+from change_feed import record_change
+from isbn import normalize_isbn
+from settings import get_base_dir
 
 
 class ImportService:
@@ -12,8 +14,29 @@ class ImportService:
     Fulfills the requirement: Import data into at least 2 tables from CSV/XML/JSON.
     """
 
-    def __init__(self):
-        self.db = DatabaseConnection()
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+
+    def get_file_path(self, filename):
+        """
+        Resolves the CSV file: a file name in the 'data' folder or an explicit path.
+
+        Returns:
+            str: Path of the file, or None if it does not exist.
+        """
+        # Resolve path to the data folder (works for both the script and the EXE)
+        file_path = os.path.join(get_base_dir(), 'data', filename)
+
+        # Allow explicit paths too (e.g. 'library import ./export/books.csv' from the command line)
+        if not os.path.exists(file_path) and os.path.isfile(filename):
+            file_path = os.path.abspath(filename)
+
+        return file_path if os.path.exists(file_path) else None
 
     def import_books_from_csv(self, filename):
         """
@@ -28,16 +51,9 @@ class ImportService:
         Returns:
             str: A report summary containing success count and error details.
         """
-        # Resolve path to the data folder
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-        file_path = os.path.join(base_dir, 'data', filename)
-
-        if not os.path.exists(file_path):
-            return f"Error: File {filename} not found at {file_path}. Please check /data folder."
+        file_path = self.get_file_path(filename)
+        if file_path is None:
+            return f"Error: File {filename} not found. Please check /data folder."
 
         conn = self.db.connect()
         if not conn:
@@ -56,7 +72,7 @@ class ImportService:
                         # Extract data from CSV row
                         pub_name = row['publisher_name']
                         title = row['book_title']
-                        isbn = row['isbn']
+                        isbn = normalize_isbn(row['isbn'])
                         price = float(row['price'])
 
                         # 1. Insert into Publishers table
@@ -69,11 +85,17 @@ class ImportService:
                             (title, isbn, price, new_publisher_id)
                         )
 
+                        new_book_id = cursor.lastrowid
+
+                        record_change(cursor, 'publisher', new_publisher_id, 'insert', {'name': pub_name})
+                        record_change(cursor, 'book', new_book_id, 'insert',
+                                      {'title': title, 'isbn': isbn, 'price': price, 'publisher_id': new_publisher_id})
                         conn.commit()
+                        BookRepository.notify_book_added(new_book_id, title, self.branch_id)
                         success_count += 1
                         print(f"Imported: {title} (Publisher: {pub_name})")
 
-                    except mysql.connector.Error as err:
+                    except DatabaseError as err:
                         errors.append(f"Failed to import {row.get('book_title', 'Unknown')}: {err}")
                         conn.rollback()
                     except ValueError:
@@ -0,0 +1,78 @@
+def normalize_isbn(isbn):
+    """
+    Converts an ISBN to its normalised (stored) form: no hyphens or spaces, upper-case 'X'.
+
+    Example: '978-80-7200-123-4' -> '9788072001234'
+
+    Args:
+        isbn (str): ISBN as typed or scanned.
+
+    Returns:
+        str: The normalised ISBN.
+    """
+    return "".join(c for c in str(isbn) if c not in "- \t").upper()
+
+
+def is_valid_isbn10(isbn):
+    """
+    Checks the checksum of a normalised ISBN-10.
+    """
+    if len(isbn) != 10 or not isbn[:9].isdigit() or not (isbn[9].isdigit() or isbn[9] == 'X'):
+        return False
+    digits = [int(c) for c in isbn[:9]] + [10 if isbn[9] == 'X' else int(isbn[9])]
+    return sum((10 - i) * d for i, d in enumerate(digits)) % 11 == 0
+
+
+def is_valid_isbn13(isbn):
+    """
+    Checks the checksum of a normalised ISBN-13.
+    """
+    if len(isbn) != 13 or not isbn.isdigit():
+        return False
+    return sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(isbn)) % 10 == 0
+
+
+def isbn10_to_isbn13(isbn):
+    """
+    Converts a valid normalised ISBN-10 to the equivalent ISBN-13 (978 prefix).
+    """
+    core = "978" + isbn[:9]
+    check = (10 - sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(core)) % 10) % 10
+    return core + str(check)
+
+
+def isbn13_to_isbn10(isbn):
+    """
+    Converts a valid normalised 978-prefixed ISBN-13 to the equivalent ISBN-10.
+
+    Returns:
+        str: The ISBN-10, or None if the ISBN-13 has no ISBN-10 equivalent (979 prefix).
+    """
+    if not isbn.startswith("978"):
+        return None
+    core = isbn[3:12]
+    check = (11 - sum((10 - i) * int(c) for i, c in enumerate(core)) % 11) % 11
+    return core + ("X" if check == 10 else str(check))
+
+
+def isbn_lookup_keys(isbn):
+    """
+    Returns all stored forms under which a book with this ISBN can be found:
+    the normalised ISBN and, for valid ISBNs, its ISBN-10/ISBN-13 counterpart
+    (a scanner reads the ISBN-13 barcode of a book catalogued with its ISBN-10).
+
+    Args:
+        isbn (str): ISBN as typed or scanned.
+
+    Returns:
+        list[str]: Normalised lookup keys, the typed form first.
+    """
+    normalized = normalize_isbn(isbn)
+    keys = [normalized]
+    if is_valid_isbn10(normalized):
+        keys.append(isbn10_to_isbn13(normalized))
+    elif is_valid_isbn13(normalized):
+        counterpart = isbn13_to_isbn10(normalized)
+        if counterpart:
+            keys.append(counterpart)
+    return keys
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from datetime import datetime
+from settings import get_base_dir
+
+
+class LoanJournal:
+    """
+    Durable local write-ahead journal of loan operations (borrow/return) made
+    while the database is unavailable.
+
+    The journal is an append-only JSON Lines file. Every operation is written and
+    fsync-ed before the desk is told it succeeded, so no loan is lost if the
+    computer crashes before the database comes back. fsync is batched (group
+    commit): the first writer of a group syncs the file for all operations written
+    until then, while concurrent writers just wait for it, so a burst of operations
+    costs one fsync instead of one per operation.
+
+    Lines:
+        {"seq": 1, "op": "borrow", "member_id": 1, "book_id": 5, "at": "2026-01-05T10:00:00"}
+        {"ack": 1}    operations up to seq 1 were replayed (applied or rejected)
+
+    Operations are replayed in order by LoanService.replay_journal(). When all of
+    them are acknowledged, the file is truncated.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path, group_delay=0.002):
+        """
+        Args:
+            path (str): Journal file (created if missing).
+            group_delay (float): Seconds the group leader waits before fsync to collect more operations.
+        """
+        self.path = path
+        self.conflicts_path = os.path.splitext(path)[0] + ".conflicts.jsonl"
+        self.group_delay = group_delay
+        self._cond = threading.Condition()
+        self._pending = []        # not yet acknowledged operations, in order
+        self._seq = 0             # last written seq
+        self._synced_seq = 0      # last seq on disk (fsync-ed)
+        self._syncing = False
+        self.replay_lock = threading.Lock()
+        self._load()
+        self._file = open(self.path, mode='a', encoding='utf-8')
+
+    @classmethod
+    def from_config(cls, config, branch_id=None):
+        """
+        Returns the shared journal configured in the 'offline_journal' setting
+        (one per file, i.e. per branch), or None if it is disabled.
+
+        Args:
+            config (dict): The 'database' section of settings.json.
+            branch_id (int): Branch of the LoanService (None = the default database).
+        """
+        settings = (config or {}).get('offline_journal') or {}
+        if not settings.get('enabled'):
+            return None
+        path = settings.get('path', 'data/loan_journal.jsonl')
+        if not os.path.isabs(path):
+            path = os.path.join(get_base_dir(), path)
+        if branch_id is not None:
+            root, extension = os.path.splitext(path)
+            path = f"{root}.branch{branch_id}{extension}"
+        with cls._instances_lock:
+            if path not in cls._instances:
+                cls._instances[path] = cls(path, settings.get('group_commit_ms', 2) / 1000)
+            return cls._instances[path]
+
+    def _load(self):
+        """
+        Reads the operations not yet acknowledged (after a restart).
+
+        A torn last line (a crash during write, never acknowledged to the desk) is
+        cut off, so the next entry starts on a line of its own. A damaged line in the
+        middle of the file is skipped and the lines after it are still read.
+        """
+        if not os.path.exists(self.path):
+            return
+        operations = []
+        acked = 0
+        with open(self.path, mode='r+b') as file:
+            offset = 0
+            for line in file.readlines():
+                if not line.endswith(b"\n"):
+                    file.truncate(offset)
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"Warning: Skipping a damaged line in the loan journal {self.path}: {line[:80]!r}")
+                    continue
+                if 'ack' in record:
+                    acked = max(acked, record['ack'])
+                else:
+                    operations.append(record)
+        self._pending = [op for op in operations if op['seq'] > acked]
+        self._seq = self._synced_seq = max([acked] + [op['seq'] for op in operations])
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def append(self, op, member_id=None, book_id=None):
+        """
+        Durably records an operation; returns after it is on disk.
+
+        Args:
+            op (str): 'borrow' or 'return'.
+            member_id (int): Borrowing member ('borrow' only).
+            book_id (int): The book.
+
+        Returns:
+            dict: The recorded operation.
+        """
+        with self._cond:
+            self._seq += 1
+            entry = {'seq': self._seq, 'op': op, 'member_id': member_id, 'book_id': book_id,
+                     'at': datetime.now().isoformat(timespec='seconds')}
+            self._file.write(json.dumps(entry) + "\n")
+            self._pending.append(entry)
+        self._sync(entry['seq'])
+        return entry
+
+    def _sync(self, seq):
+        """
+        Waits until 'seq' is on disk. The first waiter becomes the group leader and
+        fsyncs everything written so far; the others wait for its result.
+        """
+        with self._cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                self._syncing = True
+                try:
+                    if self.group_delay:
+                        self._cond.wait(self.group_delay)  # let concurrent writers join the group
+                    target = self._seq
+                    self._file.flush()
+                    fd = self._file.fileno()
+                    self._cond.release()
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        self._cond.acquire()
+                    self._synced_seq = max(self._synced_seq, target)
+                finally:
+                    self._syncing = False
+                    self._cond.notify_all()
+
+    def pending(self, limit=None):
+        """
+        Returns:
+            list[dict]: The oldest operations not yet acknowledged.
+        """
+        with self._cond:
+            return list(self._pending[:limit])
+
+    def pending_book_state(self, book_id):
+        """
+        Returns the last queued operation on a book ('borrow', 'return' or None),
+        used to reject conflicting operations while offline.
+        """
+        with self._cond:
+            for entry in reversed(self._pending):
+                if entry['book_id'] == book_id:
+                    return entry['op']
+        return None
+
+    def acknowledge(self, seq):
+        """
+        Marks operations up to seq as replayed. The file is truncated when nothing is pending.
+        """
+        with self._cond:
+            self._pending = [entry for entry in self._pending if entry['seq'] > seq]
+            if self._pending:
+                self._file.write(json.dumps({'ack': seq}) + "\n")
+            else:
+                self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_conflict(self, entry, reason):
+        """
+        Stores an operation rejected during replay (for the librarian to resolve).
+        """
+        print(f"Offline {entry['op']} of Book {entry['book_id']} at {entry['at']} rejected: {reason}")
+        with open(self.conflicts_path, mode='a', encoding='utf-8') as file:
+            file.write(json.dumps({**entry, 'reason': reason,
+                                   'replayed_at': datetime.now().isoformat(timespec='seconds')}) + "\n")
+
+    def close(self):
+        with self._cond:
+            self._file.close()
+
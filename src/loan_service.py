@@ -1,6 +1,14 @@
-import mysql.connector
-from datetime import datetime
-from db_connection import DatabaseConnection
+import time
+from datetime import date, datetime, timedelta
+from backends import IntegrityError
+from cache import LRUCache
+from change_feed import record_change, record_changes
+from db_connection import DatabaseConnection, DatabaseError
+from loan_journal import LoanJournal
+from models import Loan, to_records
+from notification_outbox import NotificationOutbox
+from settings import load_settings
+from transaction_runner import TransactionRunner
 
 
 class LoanService:
@@ -9,10 +17,46 @@ class LoanService:
 
     It implements ACID transactions to ensure data integrity when modifying
     multiple tables ('loans' and 'members') simultaneously.
+
+    With the 'offline_journal' setting enabled, borrows and returns made while the
+    database is unreachable are recorded in a local LoanJournal and replayed in
+    order (replay_journal) as soon as the database is back.
+
+    The member's 'last_activity_at' is written at most once per
+    'member_activity_interval_seconds' per member (and once per borrow_books
+    call), so a member borrowing many books does not lock and rewrite the
+    members row for every loan.
+
+    Every loan gets a due date from the loan period of the member's membership
+    type. mark_overdue_loans() (the overdue sweep) changes the status of loans
+    past their due date to 'OVERDUE'; such books are still borrowed, so all
+    availability checks treat 'ACTIVE' and 'OVERDUE' loans alike.
+
+    A returned book with waiting reservations is lent to the head of the queue
+    in the return transaction (see ReservationService); the member is notified
+    through the notification outbox, so the return does not wait for the delivery.
     """
 
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # Loan period in days per membership type ("loan_days" in the 'app' section of settings.json overrides it)
+    LOAN_DAYS = {'BASIC': 21, 'PREMIUM': 42, 'STUDENT': 28}
+
+    ACTIVITY_UPDATE_QUERY = "UPDATE members SET last_activity_at = %s WHERE member_id = %s"
+
+    # (branch_id, member_id) -> time.monotonic() of the last last_activity_at update, shared by all instances
+    _activity_written = LRUCache(max_size=10000)
+
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+        self.transactions = TransactionRunner(self.db)
+        self.journal = LoanJournal.from_config(DatabaseConnection().config, branch_id)
+        config = DatabaseConnection().config or {}
+        self.replay_batch_size = (config.get('offline_journal') or {}).get('replay_batch_size', 100)
+        self.activity_interval = config.get('member_activity_interval_seconds', 300)
 
     def borrow_book(self, member_id, book_id):
         """
@@ -22,9 +66,12 @@ class LoanService:
         1. Checks if the book is available.
         2. Starts a transaction.
         3. Inserts a record into the 'loans' table.
-        4. Updates the 'members' table (modifies 'joined_at' as activity timestamp).
+        4. Updates the 'members' table ('last_activity_at', at most once per interval).
         5. Commits the transaction if all steps succeed.
 
+        Deadlocks, lock wait timeouts and dropped connections are retried
+        (see TransactionRunner), so only persistent errors are reported.
+
         Args:
             member_id (int): ID of the member borrowing the book.
             book_id (int): ID of the book being borrowed.
@@ -32,72 +79,168 @@ class LoanService:
         Returns:
             str: A message indicating success or failure.
         """
-        conn = self.db.connect()
-        if not conn:
-            return "DB Connection Failed"
+        if not self._journal_replayed():
+            # Older offline operations must reach the database first (order matters)
+            return self._queue_offline('borrow', member_id, book_id)
 
-        cursor = conn.cursor()
+        # Decided once, so that a retried transaction writes it too
+        update_activity = self._activity_due(member_id)
 
-        try:
+        def work(cursor):
             # 1. CHECK AVAILABILITY
-            check_query = "SELECT loan_id FROM loans WHERE book_id = %s AND status = 'ACTIVE'"
+            check_query = "SELECT loan_id FROM loans WHERE book_id = %s AND status IN ('ACTIVE', 'OVERDUE')"
             cursor.execute(check_query, (book_id,))
             if cursor.fetchone():
                 return f"Error: Book ID {book_id} is already borrowed."
-
-            # START TRANSACTION
-            # We explicitly disable autocommit to handle the transaction manually
-            conn.autocommit = False
+            cursor.execute("SELECT is_active FROM books WHERE book_id = %s", (book_id,))
+            book = cursor.fetchone()
+            if not book:
+                return f"Error: Book ID {book_id} does not exist."
+            if not book[0]:
+                return f"Error: Book ID {book_id} has been withdrawn from the catalogue."
+            cursor.execute("SELECT membership_type FROM members WHERE member_id = %s", (member_id,))
+            member = cursor.fetchone()
+            if not member:
+                return f"Error: Member {member_id} does not exist."
 
             print(f"--- Starting Transaction for Member {member_id} borrowing Book {book_id} ---")
 
             # 2. INSERT into LOANS (Table 1 modification)
             insert_loan_query = """
-                INSERT INTO loans (member_id, book_id, loan_date, status) 
-                VALUES (%s, %s, NOW(), 'ACTIVE')
+                INSERT INTO loans (member_id, book_id, loan_date, due_date, status) 
+                VALUES (%s, %s, NOW(), %s, 'ACTIVE')
             """
-            cursor.execute(insert_loan_query, (member_id, book_id))
+            due_date = self.due_date(member[0])
+            cursor.execute(insert_loan_query, (member_id, book_id, due_date))
+            record_change(cursor, 'loan', cursor.lastrowid, 'insert',
+                          {'book_id': book_id, 'member_id': member_id, 'status': 'ACTIVE', 'due_date': due_date})
 
             # 3. UPDATE MEMBERS (Table 2 modification)
             # Fulfills requirement: Update information stored in more than one table.
-            update_member_query = "UPDATE members SET joined_at = NOW() WHERE member_id = %s"
-            cursor.execute(update_member_query, (member_id,))
-
-            # 4. COMMIT
-            # If we reach this point without error, we save changes.
-            conn.commit()
-            print("--- Transaction COMMITTED Successfully ---")
+            if update_activity:
+                cursor.execute(self.ACTIVITY_UPDATE_QUERY, (datetime.now().replace(microsecond=0), member_id))
             return "Success: Book borrowed."
 
-        except mysql.connector.Error as err:
-            # ROLLBACK
-            # If any error occurs, we undo all changes in this transaction.
-            conn.rollback()
+        try:
+            # 4. COMMIT (by the runner) - if any step fails, all changes are rolled back
+            result = self.transactions.run(work, name=f"Borrowing of Book {book_id}")
+        except IntegrityError as err:
+            print(f"--- Transaction ROLLED BACK: {err} ---")
+            return f"Error: {err}"
+        except DatabaseError as err:
             print(f"--- Transaction ROLLED BACK: {err} ---")
             return f"Transaction Failed: {err}"
 
-        finally:
-            if conn.is_connected():
-                conn.autocommit = True
-                cursor.close()
-                self.db.close()
+        if result is None:
+            return self._queue_offline('borrow', member_id, book_id)
+        if result.startswith("Success"):
+            if update_activity:
+                self._activity_recorded(member_id)
+            print("--- Transaction COMMITTED Successfully ---")
+        return result
+
+    def borrow_books(self, member_id, book_ids):
+        """
+        Borrows several books for one member in a single transaction (e.g. a set of
+        textbooks for a class). Availability of all books is checked with one query,
+        the loans are inserted with one multi-row statement and the member row is
+        updated once.
+
+        Args:
+            member_id (int): ID of the member borrowing the books.
+            book_ids (list[int]): IDs of the books.
+
+        Returns:
+            dict[int, str]: Book ID -> message (books already borrowed or withdrawn are skipped,
+            the others are borrowed together or not at all).
+        """
+        book_ids = list(dict.fromkeys(book_ids))
+        if not book_ids:
+            return {}
+        if not self._journal_replayed():
+            return {book_id: self._queue_offline('borrow', member_id, book_id) for book_id in book_ids}
+
+        def work(cursor):
+            placeholders = ", ".join(["%s"] * len(book_ids))
+            cursor.execute(f"SELECT book_id FROM loans WHERE status IN ('ACTIVE', 'OVERDUE') "
+                           f"AND book_id IN ({placeholders})", book_ids)
+            borrowed = {row[0] for row in cursor.fetchall()}
+            cursor.execute(f"SELECT book_id, is_active FROM books WHERE book_id IN ({placeholders})", book_ids)
+            active = dict(cursor.fetchall())
+            withdrawn = {book_id for book_id, is_active in active.items() if not is_active}
+            available = [book_id for book_id in book_ids
+                         if book_id in active and book_id not in borrowed and book_id not in withdrawn]
+            if available:
+                cursor.execute("SELECT membership_type FROM members WHERE member_id = %s", (member_id,))
+                member = cursor.fetchone()
+                if not member:
+                    return {book_id: f"Error: Member {member_id} does not exist." for book_id in book_ids}
+                print(f"--- Starting Transaction for Member {member_id} borrowing {len(available)} books ---")
+                due_date = self.due_date(member[0])
+                cursor.executemany(
+                    "INSERT INTO loans (member_id, book_id, loan_date, due_date, status) "
+                    "VALUES (%s, %s, NOW(), %s, 'ACTIVE')",
+                    [(member_id, book_id, due_date) for book_id in available]
+                )
+                cursor.execute(f"SELECT loan_id, book_id FROM loans WHERE status = 'ACTIVE' "
+                               f"AND book_id IN ({', '.join(['%s'] * len(available))})", available)
+                record_changes(cursor, 'loan', 'insert', [
+                    (loan_id, {'book_id': loan_book_id, 'member_id': member_id, 'status': 'ACTIVE',
+                               'due_date': due_date})
+                    for loan_id, loan_book_id in cursor.fetchall()
+                ])
+                # Once per batch, regardless of the interval
+                cursor.execute(self.ACTIVITY_UPDATE_QUERY, (datetime.now().replace(microsecond=0), member_id))
+            return {book_id: f"Error: Book ID {book_id} is already borrowed." if book_id in borrowed
+                    else f"Error: Book ID {book_id} does not exist." if book_id not in active
+                    else f"Error: Book ID {book_id} has been withdrawn from the catalogue." if book_id in withdrawn
+                    else "Success: Book borrowed." for book_id in book_ids}
+
+        try:
+            results = self.transactions.run(work, name=f"Borrowing of {len(book_ids)} books")
+        except IntegrityError as err:
+            print(f"--- Transaction ROLLED BACK: {err} ---")
+            return {book_id: f"Error: {err}" for book_id in book_ids}
+        except DatabaseError as err:
+            print(f"--- Transaction ROLLED BACK: {err} ---")
+            return {book_id: f"Transaction Failed: {err}" for book_id in book_ids}
+
+        if results is None:
+            return {book_id: self._queue_offline('borrow', member_id, book_id) for book_id in book_ids}
+        if any(message.startswith("Success") for message in results.values()):
+            self._activity_recorded(member_id)
+        return results
+
+    def _activity_due(self, member_id):
+        """
+        Decides whether the member's last_activity_at is written by this loan
+        (at most once per activity_interval seconds per member).
+        """
+        last = self._activity_written.get((self.branch_id, member_id))
+        return last is None or time.monotonic() - last >= self.activity_interval
+
+    def _activity_recorded(self, member_id):
+        """
+        Starts the member's coalescing interval; called only after the update is committed,
+        so a rolled back loan does not suppress the next one.
+        """
+        self._activity_written.put((self.branch_id, member_id), time.monotonic())
 
     def return_book(self, book_id):
         """
         Marks a borrowed book as returned.
         Updates the 'loans' table by setting status to 'RETURNED' and adding a return date.
+        If the book is reserved, it is lent to the first member in the queue.
 
         Args:
             book_id (int): The ID of the book to return.
         """
-        conn = self.db.connect()
-        if not conn:
-            return "DB Connection Failed"
+        if not self._journal_replayed():
+            return self._queue_offline('return', None, book_id)
 
-        cursor = conn.cursor()
-        try:
+        def work(cursor):
             # Verify active loan exists
-            check_query = "SELECT loan_id FROM loans WHERE book_id = %s AND status = 'ACTIVE'"
+            check_query = "SELECT loan_id FROM loans WHERE book_id = %s AND status IN ('ACTIVE', 'OVERDUE')"
             cursor.execute(check_query, (book_id,))
             loan = cursor.fetchone()
 
@@ -111,30 +254,216 @@ class LoanService:
                 WHERE loan_id = %s
             """
             cursor.execute(update_query, (loan[0],))
-            conn.commit()
+            record_change(cursor, 'loan', loan[0], 'update', {'book_id': book_id, 'status': 'RETURNED'})
+
+            reservation = self._hand_off(cursor, book_id, datetime.now().replace(microsecond=0))
+            if reservation:
+                return (f"Success: Book returned. Lent to Member {reservation[1]} "
+                        f"(reservation {reservation[0]}).")
             return "Success: Book returned."
 
-        except mysql.connector.Error as err:
+        try:
+            result = self.transactions.run(work, name=f"Return of Book {book_id}")
+        except DatabaseError as err:
             return f"Error returning book: {err}"
+        return self._queue_offline('return', None, book_id) if result is None else result
+
+    # --- OFFLINE JOURNAL ---
+
+    def _queue_offline(self, op, member_id, book_id):
+        """
+        Records a borrow/return in the offline journal while the database is unavailable.
+
+        Returns:
+            str: A message indicating success or failure ("DB Connection Failed" without a journal).
+        """
+        if self.journal is None:
+            return "DB Connection Failed"
+
+        # Conflicts visible locally (the same book twice while offline) are rejected right away
+        last_op = self.journal.pending_book_state(book_id)
+        if op == 'borrow' and last_op == 'borrow':
+            return f"Error: Book ID {book_id} is already borrowed."
+        if op == 'return' and last_op == 'return':
+            return f"Error: Book ID {book_id} is not currently borrowed."
+
+        try:
+            self.journal.append(op, member_id, book_id)
+        except OSError as err:
+            return f"Transaction Failed: offline journal is not writable: {err}"
+        print(f"--- Database unavailable: {op} of Book {book_id} saved to the offline journal ---")
+        action = "borrowed" if op == 'borrow' else "returned"
+        return f"Success: Book {action} (offline, will be synchronised when the database is back)."
+
+    def _journal_replayed(self):
+        """
+        Returns True if no offline operations are waiting (replaying them first if needed).
+        """
+        if self.journal is None or not len(self.journal):
+            return True
+        return self.replay_journal()['pending'] == 0
+
+    def replay_journal(self):
+        """
+        Applies the operations of the offline journal to the database, in order and
+        in batches (one transaction per batch).
+
+        Operations that no longer fit the database state (e.g. a book borrowed offline
+        that was meanwhile lent at another desk, or a return of a book that is not
+        borrowed) are not applied; they are written to the journal's conflicts file.
+        So is an operation failing with a database error other than a lost connection,
+        so that one bad operation does not keep all new loans in the journal.
+
+        Returns:
+            dict: applied, conflicts and pending (operations still waiting) counts.
+        """
+        summary = {'applied': 0, 'conflicts': 0, 'pending': len(self.journal) if self.journal else 0}
+        if self.journal is None or not self.journal.replay_lock.acquire(blocking=False):
+            return summary  # disabled, or another thread is replaying
+
+        batch_size = self.replay_batch_size
+        try:
+            while True:
+                batch = self.journal.pending(batch_size)
+                if not batch:
+                    break
+                try:
+                    result = self.transactions.run(lambda cursor: self._apply_journal_batch(cursor, batch),
+                                                   name="Offline journal replay")
+                except DatabaseError as err:
+                    if TransactionRunner.classify(err) == 'connection':
+                        print(f"Offline journal replay failed: {err}")
+                        break  # still offline, the operations stay pending
+                    if len(batch) > 1:
+                        batch_size = 1  # find the failing operation by replaying one at a time
+                        continue
+                    # A persistent error must not keep the desk offline: set the operation aside
+                    self.journal.record_conflict(batch[0], f"database error: {err}")
+                    self.journal.acknowledge(batch[0]['seq'])
+                    summary['conflicts'] += 1
+                    batch_size = self.replay_batch_size
+                    continue
+                if result is None:
+                    break  # still offline
+
+                conflicts = result
+                for entry, reason in conflicts:
+                    self.journal.record_conflict(entry, reason)
+                self.journal.acknowledge(batch[-1]['seq'])
+                summary['applied'] += len(batch) - len(conflicts)
+                summary['conflicts'] += len(conflicts)
         finally:
-            cursor.close()
-            self.db.close()
+            self.journal.replay_lock.release()
+
+        summary['pending'] = len(self.journal)
+        if summary['applied'] or summary['conflicts']:
+            print(f"--- Offline journal replayed: {summary['applied']} applied, "
+                  f"{summary['conflicts']} conflicts ---")
+        return summary
 
-    def get_active_loans(self):
+    def _apply_journal_batch(self, cursor, batch):
+        """
+        Applies journal operations inside one transaction, with the original times.
+        The last activity of each member is written once per batch.
+
+        Returns:
+            list[tuple[dict, str]]: (entry, reason) of the rejected operations.
+        """
+        conflicts = []
+        activity = {}  # member_id -> time of the member's last borrow in the batch
+        for entry in batch:
+            at = datetime.fromisoformat(entry['at'])
+            cursor.execute("SELECT loan_id FROM loans WHERE book_id = %s AND status IN ('ACTIVE', 'OVERDUE')",
+                           (entry['book_id'],))
+            loan = cursor.fetchone()
+
+            if entry['op'] == 'borrow':
+                if loan:
+                    conflicts.append((entry, "book is already borrowed"))
+                    continue
+                cursor.execute("SELECT membership_type FROM members WHERE member_id = %s", (entry['member_id'],))
+                member = cursor.fetchone()
+                cursor.execute("SELECT is_active FROM books WHERE book_id = %s", (entry['book_id'],))
+                book = cursor.fetchone()
+                if not member or not book:
+                    conflicts.append((entry, "member or book does not exist"))
+                    continue
+                if not book[0]:
+                    conflicts.append((entry, "book has been withdrawn from the catalogue"))
+                    continue
+                due_date = self.due_date(member[0], at.date())
+                cursor.execute(
+                    "INSERT INTO loans (member_id, book_id, loan_date, due_date, status) "
+                    "VALUES (%s, %s, %s, %s, 'ACTIVE')",
+                    (entry['member_id'], entry['book_id'], at, due_date)
+                )
+                record_change(cursor, 'loan', cursor.lastrowid, 'insert',
+                              {'book_id': entry['book_id'], 'member_id': entry['member_id'], 'status': 'ACTIVE',
+                               'due_date': due_date})
+                activity[entry['member_id']] = max(at, activity.get(entry['member_id'], at))
+            else:
+                if not loan:
+                    conflicts.append((entry, "book is not borrowed"))
+                    continue
+                cursor.execute("UPDATE loans SET status = 'RETURNED', return_date = %s WHERE loan_id = %s",
+                               (at, loan[0]))
+                record_change(cursor, 'loan', loan[0], 'update', {'book_id': entry['book_id'], 'status': 'RETURNED'})
+                self._hand_off(cursor, entry['book_id'], at)
+
+        if activity:
+            cursor.executemany(self.ACTIVITY_UPDATE_QUERY, [(at, member_id) for member_id, at in activity.items()])
+        return conflicts
+
+    def _hand_off(self, cursor, book_id, at):
+        """
+        Lends a just returned book to the head of its reservation queue (in the
+        caller's transaction) and queues the notification of the member.
+
+        The head is found with one range read of the (book_id, status, reservation_id)
+        index, so the cost does not depend on the length of the queue.
+
+        Returns:
+            tuple: (reservation_id, member_id) of the fulfilled reservation, or None if nobody is waiting.
+        """
+        cursor.execute("SELECT reservation_id, member_id FROM reservations "
+                       "WHERE book_id = %s AND status = 'WAITING' ORDER BY reservation_id LIMIT 1", (book_id,))
+        reservation = cursor.fetchone()
+        if not reservation:
+            return None
+
+        reservation_id, member_id = reservation
+        cursor.execute("UPDATE reservations SET status = 'FULFILLED', fulfilled_at = %s WHERE reservation_id = %s",
+                       (at, reservation_id))
+        due_date = self._due_date(cursor, member_id, at.date())
+        cursor.execute("INSERT INTO loans (member_id, book_id, loan_date, due_date, status) "
+                       "VALUES (%s, %s, %s, %s, 'ACTIVE')", (member_id, book_id, at, due_date))
+        record_change(cursor, 'loan', cursor.lastrowid, 'insert',
+                      {'book_id': book_id, 'member_id': member_id, 'status': 'ACTIVE', 'due_date': due_date})
+        NotificationOutbox.enqueue(cursor, member_id, 'RESERVATION_READY',
+                                   {'reservation_id': reservation_id, 'book_id': book_id, 'due_date': due_date})
+        return reservation_id, member_id
+
+    def get_active_loans(self, as_dict=False):
         """
         Retrieves a list of all currently active loans.
         Uses a database VIEW 'view_active_loans' for simplified data access.
 
+        Args:
+            as_dict (bool): Return dictionaries instead of Loan records (compatibility mode).
+
         Returns:
-            list[dict]: List of active loans with member and book details.
+            list[Loan]: List of active loans with member and book details.
         """
-        conn = self.db.connect()
-        cursor = conn.cursor(dictionary=True)
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
         try:
-            query = "SELECT * FROM view_active_loans"
+            query = "SELECT loan_id, full_name, title, loan_date, due_date FROM view_active_loans"
             cursor.execute(query)
-            return cursor.fetchall()
-        except mysql.connector.Error as err:
+            return to_records(cursor.fetchall(), Loan, as_dict)
+        except DatabaseError as err:
             print(f"Error fetching loans: {err}")
             return []
         finally:
@@ -149,19 +478,108 @@ class LoanService:
         Returns:
             list[int]: List of Book IDs.
         """
-        conn = self.db.connect()
+        conn = self.db.connect(read_only=True)
         if not conn:
             return []
 
         cursor = conn.cursor()
         try:
-            query = "SELECT book_id FROM loans WHERE status = 'ACTIVE'"
+            query = "SELECT book_id FROM loans WHERE status IN ('ACTIVE', 'OVERDUE')"
             cursor.execute(query)
             # Flattens the list of tuples [(1,), (5,)] into [1, 5]
             return [row[0] for row in cursor.fetchall()]
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             print(f"Error fetching borrowed IDs: {err}")
             return []
         finally:
             cursor.close()
-            self.db.close()
\ No newline at end of file
+            self.db.close()
+
+    # --- DUE DATES AND OVERDUE SWEEP ---
+
+    @classmethod
+    def due_date(cls, membership_type, loan_date=None):
+        """
+        Returns the due date of a loan made on loan_date (default today) by a member
+        of the given membership type.
+        """
+        loan_days = {**cls.LOAN_DAYS, **(cls._settings().get('loan_days') or {})}
+        days = loan_days.get(membership_type, loan_days['BASIC'])
+        return (loan_date or date.today()) + timedelta(days=days)
+
+    @staticmethod
+    def _settings():
+        try:
+            return load_settings().get('app', {})
+        except FileNotFoundError:
+            return {}
+
+    def _due_date(self, cursor, member_id, loan_date=None):
+        """
+        Reads the member's membership type (inside the borrowing transaction) and returns the due date.
+        """
+        cursor.execute("SELECT membership_type FROM members WHERE member_id = %s", (member_id,))
+        member = cursor.fetchone()
+        return self.due_date(member[0] if member else None, loan_date)
+
+    def mark_overdue_loans(self, batch_size=1000, pause=0.0, today=None):
+        """
+        Marks active loans past their due date as 'OVERDUE' (the overdue sweep).
+
+        The loans are changed in batches, each in its own short transaction: the
+        IDs of the next batch are read from the (status, due_date) index and only
+        those rows are updated and locked. Every batch removes its rows from the
+        'ACTIVE' range, so the next one starts where the previous ended and the
+        cost depends on the number of overdue loans, not on the size of the table.
+
+        Args:
+            batch_size (int): Loans updated per transaction (keeps row locks short).
+            pause (float): Seconds to wait between batches (gives way to checkouts).
+            today (date): Reference date (default: today). Loans due before it are overdue.
+
+        Returns:
+            int: Number of loans marked as overdue.
+        """
+        today = today or date.today()
+        marked = 0
+
+        def work(cursor):
+            cursor.execute(
+                "SELECT loan_id, book_id FROM loans WHERE status = 'ACTIVE' AND due_date < %s "
+                "ORDER BY due_date LIMIT %s",
+                (today, batch_size)
+            )
+            loans = cursor.fetchall()
+            if not loans:
+                return 0, 0
+            placeholders = ", ".join(["%s"] * len(loans))
+            cursor.execute(
+                f"UPDATE loans SET status = 'OVERDUE' WHERE status = 'ACTIVE' AND loan_id IN ({placeholders})",
+                [loan_id for loan_id, _ in loans]
+            )
+            # Only the loans really changed by this batch (not returned meanwhile)
+            cursor.execute(f"SELECT loan_id, book_id FROM loans "
+                           f"WHERE status = 'OVERDUE' AND loan_id IN ({placeholders})",
+                           [loan_id for loan_id, _ in loans])
+            changed = cursor.fetchall()
+            record_changes(cursor, 'loan', 'update',
+                           [(loan_id, {'book_id': book_id, 'status': 'OVERDUE'}) for loan_id, book_id in changed])
+            return len(loans), len(changed)
+
+        while True:
+            try:
+                result = self.transactions.run(work, name="Overdue sweep")
+            except DatabaseError as err:
+                print(f"Error marking overdue loans: {err}")
+                break
+            if result is None:
+                break
+            selected, updated = result
+            marked += updated
+            if selected < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        print(f"Overdue sweep: {marked} loans marked as overdue.")
+        return marked
@@ -13,7 +13,14 @@ if __name__ == "__main__":
     Entry point of the program.
     Initializes the main application loop and handles global exceptions
     to prevent the console window from closing immediately in case of error.
+
+    When arguments are given (e.g. 'LibraryManager.exe books list'), the
+    non-interactive command line interface is used instead of the menu.
     """
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     try:
         # Create instance of the app and run it
         app = LibraryApp()
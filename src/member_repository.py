@@ -0,0 +1,248 @@
+from cache import LRUCache
+from change_feed import record_change
+from db_connection import DatabaseConnection, DatabaseError
+from models import Member, to_records
+
+
+class MemberRepository:
+    """
+    Implements the Repository Pattern for the Member entity.
+
+    Single-member lookups (by ID or e-mail) are served from an LRU identity cache
+    shared by all instances, so checkout flows can validate a member repeatedly
+    without extra round trips. update_member drops the entry of the changed
+    member in its own process (see notify_member_changed). Other processes (a
+    'members update' from the CLI while the API server runs) cannot reach this
+    cache, so entries also expire after CACHE_TTL seconds.
+    """
+    MEMBER_COLUMNS = "member_id, full_name, email, membership_type, joined_at"
+    MEMBERSHIP_TYPES = ('BASIC', 'PREMIUM', 'STUDENT')
+    # Longest time a change made by another process can stay invisible to this one
+    CACHE_TTL = 30
+
+    # One cache per branch: member_id -> Member and folded e-mail -> Member
+    _caches = {}
+
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+
+    @property
+    def _cache(self):
+        return self._branch_cache(self.branch_id)
+
+    @classmethod
+    def _branch_cache(cls, branch_id):
+        cache = cls._caches.get(branch_id)
+        if cache is None:
+            cache = cls._caches.setdefault(branch_id, LRUCache(max_size=2048, ttl=cls.CACHE_TTL))
+        return cache
+
+    def get_by_id(self, member_id, as_dict=False):
+        """
+        Finds a member by ID (primary key).
+
+        Args:
+            member_id (int): ID of the member.
+            as_dict (bool): Return a dictionary instead of a Member record (compatibility mode).
+
+        Returns:
+            Member: The member, or None if it does not exist.
+        """
+        member = self._cache.get(member_id)
+        if member is None:
+            member = self._fetch_one("member_id = %s", member_id)
+        return member._asdict() if member is not None and as_dict else member
+
+    def get_by_email(self, email, as_dict=False):
+        """
+        Finds a member by e-mail (UNIQUE index, case-insensitive).
+
+        Args:
+            email (str): E-mail address of the member.
+            as_dict (bool): Return a dictionary instead of a Member record (compatibility mode).
+
+        Returns:
+            Member: The member, or None if it does not exist.
+        """
+        member = self._cache.get(self._email_key(email))
+        if member is None:
+            member = self._fetch_one("email = %s", email.strip())
+        return member._asdict() if member is not None and as_dict else member
+
+    def search_by_name(self, prefix, limit=20, as_dict=False):
+        """
+        Finds members whose full name starts with the given text (index 'idx_members_full_name', migration 003).
+
+        Args:
+            prefix (str): Beginning of the name.
+            limit (int): Maximum number of results.
+            as_dict (bool): Return dictionaries instead of Member records (compatibility mode).
+
+        Returns:
+            list[Member]: Matching members ordered by name.
+        """
+        # LIKE wildcards typed by the user are matched literally ('!' is the escape character on all backends)
+        pattern = prefix.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+        return self._fetch_many(
+            f"SELECT {self.MEMBER_COLUMNS} FROM members WHERE full_name LIKE %s ESCAPE '!' "
+            f"ORDER BY full_name, member_id LIMIT %s",
+            (pattern, limit), as_dict
+        )
+
+    def list_members(self, after_id=0, limit=100, as_dict=False):
+        """
+        Returns one page of members ordered by ID.
+        Keyset pagination: the next page starts after the last returned ID, so deep
+        pages are as fast as the first one (no OFFSET scan).
+
+        Args:
+            after_id (int): Return members with a higher ID (0 = first page).
+            limit (int): Page size.
+            as_dict (bool): Return dictionaries instead of Member records (compatibility mode).
+
+        Returns:
+            list[Member]: The members of the page.
+        """
+        return self._fetch_many(
+            f"SELECT {self.MEMBER_COLUMNS} FROM members WHERE member_id > %s ORDER BY member_id LIMIT %s",
+            (after_id, limit), as_dict
+        )
+
+    def add_member(self, full_name, email, membership_type='BASIC'):
+        """
+        Registers a new member.
+
+        Args:
+            full_name (str): Name of the member.
+            email (str): Unique e-mail address.
+            membership_type (str): 'BASIC', 'PREMIUM' or 'STUDENT'.
+
+        Returns:
+            int: The ID of the new member.
+            None: If the operation fails.
+        """
+        conn = self.db.connect()
+        if not conn:
+            return None
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "INSERT INTO members (full_name, email, membership_type) VALUES (%s, %s, %s)",
+                (full_name, email.strip(), membership_type)
+            )
+            new_id = cursor.lastrowid
+            record_change(cursor, 'member', new_id, 'insert',
+                          {'full_name': full_name, 'email': email.strip(), 'membership_type': membership_type})
+            conn.commit()
+            print(f"Success: Member '{full_name}' added with ID {new_id}.")
+            return new_id
+        except DatabaseError as err:
+            print(f"Error adding member: {err}")
+            return None
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def update_member(self, member_id, full_name=None, email=None, membership_type=None):
+        """
+        Updates the given fields of a member and invalidates its cached record.
+
+        Args:
+            member_id (int): ID of the member.
+            full_name (str): New name (None = unchanged).
+            email (str): New e-mail (None = unchanged).
+            membership_type (str): New membership type (None = unchanged).
+
+        Returns:
+            str: A message indicating success or failure.
+        """
+        changes = {'full_name': full_name, 'email': email.strip() if email else None,
+                   'membership_type': membership_type}
+        changes = {column: value for column, value in changes.items() if value is not None}
+        if not changes:
+            return "Error: Nothing to update."
+
+        conn = self.db.connect()
+        if not conn:
+            return "DB Connection Failed"
+
+        cursor = conn.cursor()
+        try:
+            assignments = ", ".join(f"{column} = %s" for column in changes)
+            cursor.execute(f"UPDATE members SET {assignments} WHERE member_id = %s",
+                           (*changes.values(), member_id))
+            updated = cursor.rowcount
+            if updated:
+                record_change(cursor, 'member', member_id, 'update', changes)
+            conn.commit()
+            MemberRepository.notify_member_changed(member_id, self.branch_id)
+            if updated == 0 and self.get_by_id(member_id) is None:
+                return f"Error: Member ID {member_id} does not exist."
+            return f"Success: Member ID {member_id} updated."
+        except DatabaseError as err:
+            return f"Error updating member: {err}"
+        finally:
+            cursor.close()
+            self.db.close()
+
+    @classmethod
+    def notify_member_changed(cls, member_id, branch_id=None):
+        """
+        Drops a member from this process's identity cache after its row was modified
+        (called by update_member).
+        """
+        cls._branch_cache(branch_id).discard_if(lambda member: member.member_id == member_id)
+
+    @staticmethod
+    def _email_key(email):
+        return "email:" + email.strip().casefold()
+
+    def _fetch_one(self, condition, value):
+        """
+        Loads one member by a unique column and stores it in the identity cache.
+        """
+        conn = self.db.connect()
+        if not conn:
+            return None
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT {self.MEMBER_COLUMNS} FROM members WHERE {condition}", (value,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            member = Member._make(row)
+            self._cache.put(member.member_id, member)
+            self._cache.put(self._email_key(member.email), member)
+            return member
+        except DatabaseError as err:
+            print(f"Error fetching member: {err}")
+            return None
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def _fetch_many(self, query, params, as_dict):
+        """
+        Runs a member listing query.
+        """
+        conn = self.db.connect()
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return to_records(cursor.fetchall(), Member, as_dict)
+        except DatabaseError as err:
+            print(f"Error fetching members: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
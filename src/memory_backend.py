@@ -0,0 +1,780 @@
+import bisect
+import csv
+import json
+import threading
+from collections import deque, namedtuple
+from datetime import date, datetime, timedelta
+
+from book_repository import BookRepository
+from import_service import ImportService
+from isbn import isbn_lookup_keys, normalize_isbn
+from loan_service import LoanService
+from change_feed import ChangeFeed
+from models import Author, Book, BookWithAuthors, ChangeEvent, Loan, Member, MemberStat, Notification, OverdueLoan, \
+    Publisher, Reservation
+from notification_outbox import NotificationOutbox, print_sender
+from reporting_service import ReportingService
+from title_index import TitlePrefixIndex, TitleTrigramIndex
+
+# Stored loan row (the Loan record is the joined view used by the UI)
+LoanRow = namedtuple('LoanRow', ['loan_id', 'member_id', 'book_id', 'loan_date', 'due_date', 'return_date', 'status'])
+ReservationRow = namedtuple('ReservationRow', ['reservation_id', 'member_id', 'book_id', 'reserved_at', 'status',
+                                               'fulfilled_at'])
+NotificationRow = namedtuple('NotificationRow', ['notification_id', 'member_id', 'kind', 'payload', 'created_at',
+                                                 'sent_at', 'attempts'])
+
+
+def _records(records, as_dict):
+    """
+    Returns the records, or dictionaries in compatibility mode (like models.to_records).
+    """
+    if as_dict:
+        return [record._asdict() for record in records]
+    return records
+
+
+class MemoryStore:
+    """
+    In-memory replacement of the library database ("backend": "memory").
+
+    Tables are dicts keyed by primary key, with secondary indexes kept next to
+    them (books by ISBN, members by e-mail, active loans by book ID). All access
+    goes through one re-entrant lock. Writes validate every constraint (unique
+    keys, foreign keys) before changing anything, so each operation is applied
+    completely or not at all, like a committed or rolled back transaction.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.publishers = {}           # publisher_id -> Publisher
+        self.authors = {}              # author_id -> Author
+        self.books = {}                # book_id -> Book (insertion order = ID order)
+        self.book_deactivated_at = {}  # book_id -> time of withdrawal (withdrawn books, is_active = 0)
+        self.book_ids_by_isbn = {}     # isbn -> book_id (UNIQUE index)
+        self.book_authors = {}         # book_id -> list of author_id (M:N)
+        self.members = {}              # member_id -> Member
+        self.member_ids_by_email = {}  # folded e-mail -> member_id (UNIQUE index)
+        self.loans = {}                # loan_id -> LoanRow
+        self.active_loans = {}         # book_id -> loan_id of the ACTIVE/OVERDUE loan (the set of borrowed books)
+        self.member_activity = {}      # member_id -> last_activity_at
+        self.reservations = {}         # reservation_id -> ReservationRow
+        self.reservation_queues = {}   # book_id -> deque of WAITING reservation_id (FIFO)
+        self.notifications = {}        # notification_id -> NotificationRow (the outbox)
+        self.claimed_notifications = set()  # notification_id being sent by a dispatcher
+        self.change_events = {}        # event_id -> ChangeEvent (the change feed, in ID order)
+        self.prefix_index = None       # title indexes, built on first use
+        self.trigram_index = None
+        self._last_ids = {}
+
+    @classmethod
+    def with_sample_data(cls):
+        """
+        Creates a store with the test data of data/database_schema.sql.
+        """
+        store = cls()
+        now = datetime.now().replace(microsecond=0)
+        for name in ('Penguin Books', 'O Reilly'):
+            publisher_id = store.next_id('publishers')
+            store.publishers[publisher_id] = Publisher(publisher_id, name, None)
+        for first_name, last_name, birth_date in (('George', 'Orwell', date(1903, 6, 25)),
+                                                  ('Guido', 'van Rossum', date(1956, 1, 31))):
+            author_id = store.next_id('authors')
+            store.authors[author_id] = Author(author_id, first_name, last_name, birth_date)
+        member = Member(store.next_id('members'), 'Jan Novak', 'jan@test.com', 'STUDENT', now)
+        store.members[member.member_id] = member
+        store.member_ids_by_email[member.email.casefold()] = member.member_id
+        for title, isbn, price, publisher_id in (('1984', '123456', 299.50, 1), ('Python Guide', '999000', 500.00, 2)):
+            store.insert_book(title, isbn, price, publisher_id)
+        store.book_authors = {1: [1], 2: [2]}
+        return store
+
+    def next_id(self, table):
+        """
+        Returns the next AUTO_INCREMENT value of a table.
+        """
+        self._last_ids[table] = self._last_ids.get(table, 0) + 1
+        return self._last_ids[table]
+
+    def record_change(self, entity, entity_id, action, payload=None):
+        """
+        Appends a change event (call with the lock held, together with the change).
+        """
+        event_id = self.next_id('change_events')
+        if payload is not None:
+            payload = json.loads(json.dumps(payload, default=str))  # like the stored JSON (dates as text)
+        self.change_events[event_id] = ChangeEvent(event_id, entity, entity_id, action, payload,
+                                                   datetime.now().replace(microsecond=0))
+
+    def enqueue_notification(self, member_id, kind, payload, at):
+        """
+        Adds a notification to the outbox (call with the lock held, together with the change).
+        """
+        notification_id = self.next_id('notification_outbox')
+        self.notifications[notification_id] = NotificationRow(notification_id, member_id, kind,
+                                                              json.loads(json.dumps(payload, default=str)),
+                                                              at, None, 0)
+
+    def insert_book(self, title, isbn, price, publisher_id):
+        """
+        Inserts a book after checking the UNIQUE and FOREIGN KEY constraints.
+
+        Returns:
+            Book: The new book.
+
+        Raises:
+            ValueError: If a constraint is violated (nothing is changed).
+        """
+        with self.lock:
+            if isbn in self.book_ids_by_isbn:
+                raise ValueError(f"Duplicate entry '{isbn}' for key 'isbn'")
+            if publisher_id is not None and publisher_id not in self.publishers:
+                raise ValueError("Cannot add or update a child row: a foreign key constraint fails (publisher_id)")
+            book = Book(self.next_id('books'), title, isbn, float(price), 1, publisher_id)
+            self.books[book.book_id] = book
+            self.book_ids_by_isbn[isbn] = book.book_id
+            for index in (self.prefix_index, self.trigram_index):
+                if index is not None:
+                    index.add(book.book_id, title)
+            return book
+
+    def deactivate_book(self, book_id, at):
+        """
+        Withdraws an active book (soft delete) and cancels its waiting reservations.
+
+        Returns:
+            bool: False if the book does not exist or is already withdrawn.
+        """
+        with self.lock:
+            book = self.books.get(book_id)
+            if book is None or not book.is_active:
+                return False
+            self.books[book_id] = book._replace(is_active=0)
+            self.book_deactivated_at[book_id] = at
+            for reservation_id in self.reservation_queues.pop(book_id, ()):
+                reservation = self.reservations[reservation_id]
+                self.reservations[reservation_id] = reservation._replace(status='CANCELLED')
+                self.enqueue_notification(reservation.member_id, 'RESERVATION_CANCELLED',
+                                          {'reservation_id': reservation_id, 'book_id': book_id}, at)
+            for index in (self.prefix_index, self.trigram_index):
+                if index is not None:
+                    index.remove(book_id)
+            return True
+
+    def remove_book(self, book_id):
+        """
+        Deletes a withdrawn book for good, with its loans, reservations and author links.
+        """
+        with self.lock:
+            book = self.books.pop(book_id, None)
+            if book is None:
+                return
+            del self.book_ids_by_isbn[book.isbn]
+            self.book_deactivated_at.pop(book_id, None)
+            self.book_authors.pop(book_id, None)
+            for loan_id in [loan.loan_id for loan in self.loans.values() if loan.book_id == book_id]:
+                del self.loans[loan_id]
+            for reservation_id in [r.reservation_id for r in self.reservations.values() if r.book_id == book_id]:
+                del self.reservations[reservation_id]
+
+    def get_index(self, attribute, index_class):
+        """
+        Returns a title index of the store, building it on first use.
+        """
+        with self.lock:
+            if getattr(self, attribute) is None:
+                setattr(self, attribute, index_class((b.book_id, b.title) for b in self.books.values()
+                                                     if b.is_active))
+            return getattr(self, attribute)
+
+
+class MemoryBookRepository:
+    """
+    In-memory implementation of BookRepository (same methods and results).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _active_books(self):
+        return [book for book in self.store.books.values() if book.is_active]
+
+    def get_all_books(self, as_dict=False, include_inactive=False):
+        with self.store.lock:
+            return _records(list(self.store.books.values()) if include_inactive else self._active_books(), as_dict)
+
+    def get_all_publishers(self, as_dict=False):
+        with self.store.lock:
+            return _records(list(self.store.publishers.values()), as_dict)
+
+    def get_books_with_authors(self, after_id=0, limit=100, as_dict=False, loader=None):
+        with self.store.lock:
+            book_ids = list(self.store.books)
+            start = bisect.bisect_right(book_ids, after_id)
+            books = []
+            for book_id in book_ids[start:]:
+                if len(books) == limit:
+                    break
+                if self.store.books[book_id].is_active:
+                    books.append(self.store.books[book_id])
+            return self._with_authors(books, as_dict)
+
+    def get_all_books_with_authors(self, as_dict=False):
+        with self.store.lock:
+            return self._with_authors(self._active_books(), as_dict)
+
+    def get_authors_by_book_ids(self, book_ids):
+        with self.store.lock:
+            return {book_id: sorted((self.store.authors[a] for a in self.store.book_authors[book_id]),
+                                    key=lambda author: (author.last_name, author.first_name))
+                    for book_id in book_ids if book_id in self.store.book_authors}
+
+    def _with_authors(self, books, as_dict):
+        authors_by_book = self.get_authors_by_book_ids([book.book_id for book in books])
+        records = [BookWithAuthors(*book, tuple(authors_by_book.get(book.book_id, ()))) for book in books]
+        if as_dict:
+            return [{**record._asdict(), 'authors': [author._asdict() for author in record.authors]}
+                    for record in records]
+        return records
+
+    def add_book(self, title, isbn, price, publisher_id):
+        try:
+            with self.store.lock:
+                book = self.store.insert_book(title, normalize_isbn(isbn), price, publisher_id)
+                self.store.record_change('book', book.book_id, 'insert', {'title': title, 'isbn': book.isbn,
+                                                                         'price': price, 'publisher_id': publisher_id})
+        except ValueError as err:
+            print(f"Error adding book: {err}")
+            return None
+        print(f"Success: Book '{title}' added with ID {book.book_id}.")
+        return book.book_id
+
+    def delete_book(self, book_id):
+        with self.store.lock:
+            if not self.store.deactivate_book(book_id, datetime.now().replace(microsecond=0)):
+                print(f"Error: Book ID {book_id} does not exist or is already withdrawn.")
+                return False
+            self.store.record_change('book', book_id, 'update', {'is_active': 0})
+        print(f"Success: Book ID {book_id} withdrawn from the catalogue.")
+        return True
+
+    def add_books(self, books, chunk_size=None):
+        results = []
+        rows = [BookRepository._book_values(book) for book in books]
+        with self.store.lock:
+            for row in rows:
+                if row is None:
+                    results.append(None)
+                    continue
+                title, isbn, price, publisher_id = row
+                try:
+                    new_book = self.store.insert_book(title, isbn, price, publisher_id)
+                except ValueError:
+                    results.append(None)
+                    continue
+                self.store.record_change('book', new_book.book_id, 'insert', {'title': title, 'isbn': isbn,
+                                                                             'price': price,
+                                                                             'publisher_id': publisher_id})
+                results.append(new_book.book_id)
+        return results
+
+    def update_prices(self, prices, chunk_size=None):
+        pairs = prices.items() if hasattr(prices, 'items') else prices
+        new_prices = {book_id: BookRepository._price_value(price) for book_id, price in pairs}
+        results = {}
+        with self.store.lock:
+            for book_id, price in new_prices.items():
+                book = self.store.books.get(book_id)
+                results[book_id] = book is not None and price is not None
+                if results[book_id]:
+                    self.store.books[book_id] = book._replace(price=price)
+                    self.store.record_change('book', book_id, 'update', {'price': price})
+        return results
+
+    def deactivate_books(self, book_ids, chunk_size=None):
+        now = datetime.now().replace(microsecond=0)
+        results = {}
+        with self.store.lock:
+            for book_id in dict.fromkeys(book_ids):
+                results[book_id] = self.store.deactivate_book(book_id, now)
+                if results[book_id]:
+                    self.store.record_change('book', book_id, 'update', {'is_active': 0})
+        return results
+
+    def purge_inactive_books(self, older_than_days=365, batch_size=500, pause=0.0):
+        cutoff = datetime.now().replace(microsecond=0) - timedelta(days=older_than_days)
+        with self.store.lock:
+            book_ids = [book_id for book_id, at in sorted(self.store.book_deactivated_at.items())
+                        if at < cutoff and book_id not in self.store.active_loans]
+            for book_id in book_ids:
+                self.store.remove_book(book_id)
+                self.store.record_change('book', book_id, 'delete')
+        print(f"Purge: {len(book_ids)} withdrawn books deleted.")
+        return len(book_ids)
+
+    def find_by_isbn(self, isbn, as_dict=False):
+        return self.find_by_isbns([isbn], as_dict).get(isbn)
+
+    def find_by_isbns(self, isbns, as_dict=False, chunk_size=None):
+        results = {}
+        with self.store.lock:
+            for isbn in isbns:
+                book_id = next((self.store.book_ids_by_isbn[key] for key in isbn_lookup_keys(isbn)
+                                if key in self.store.book_ids_by_isbn), None)
+                book = self.store.books[book_id] if book_id is not None else None
+                results[isbn] = book._asdict() if book is not None and as_dict else book
+        return results
+
+    def search_books(self, text, limit=20, as_dict=False):
+        """
+        Relevance search: books containing the most of the searched words first.
+        """
+        words = set(TitleTrigramIndex.split_words(text))
+        scored = []
+        with self.store.lock:
+            for book in self._active_books():
+                score = len(words.intersection(TitleTrigramIndex.split_words(book.title)))
+                if score:
+                    scored.append((-score, book.book_id, book))
+        scored.sort(key=lambda item: item[:2])
+        return _records([book for _, _, book in scored[:limit]], as_dict)
+
+    def autocomplete(self, prefix, limit=10):
+        return self.store.get_index('prefix_index', TitlePrefixIndex).complete(prefix, limit)
+
+    def fuzzy_search(self, text, limit=10):
+        return self.store.get_index('trigram_index', TitleTrigramIndex).search(text, limit)
+
+    def iter_titles(self, batch_size=10000):
+        with self.store.lock:
+            pairs = [(book.book_id, book.title) for book in self._active_books()]
+        yield from pairs
+
+
+class MemoryMemberRepository:
+    """
+    In-memory implementation of MemberRepository (same methods and results).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_by_id(self, member_id, as_dict=False):
+        member = self.store.members.get(member_id)
+        return member._asdict() if member is not None and as_dict else member
+
+    def get_by_email(self, email, as_dict=False):
+        member_id = self.store.member_ids_by_email.get(email.strip().casefold())
+        return self.get_by_id(member_id, as_dict) if member_id is not None else None
+
+    def search_by_name(self, prefix, limit=20, as_dict=False):
+        folded = prefix.casefold()
+        with self.store.lock:
+            members = [m for m in self.store.members.values() if m.full_name.casefold().startswith(folded)]
+        members.sort(key=lambda m: (m.full_name.casefold(), m.member_id))
+        return _records(members[:limit], as_dict)
+
+    def list_members(self, after_id=0, limit=100, as_dict=False):
+        with self.store.lock:
+            member_ids = list(self.store.members)
+            start = bisect.bisect_right(member_ids, after_id)
+            return _records([self.store.members[m] for m in member_ids[start:start + limit]], as_dict)
+
+    def add_member(self, full_name, email, membership_type='BASIC'):
+        email = email.strip()
+        with self.store.lock:
+            if email.casefold() in self.store.member_ids_by_email:
+                print(f"Error adding member: Duplicate entry '{email}' for key 'email'")
+                return None
+            member = Member(self.store.next_id('members'), full_name, email, membership_type,
+                            datetime.now().replace(microsecond=0))
+            self.store.members[member.member_id] = member
+            self.store.member_ids_by_email[email.casefold()] = member.member_id
+            self.store.record_change('member', member.member_id, 'insert',
+                                     {'full_name': full_name, 'email': email, 'membership_type': membership_type})
+        print(f"Success: Member '{full_name}' added with ID {member.member_id}.")
+        return member.member_id
+
+    def update_member(self, member_id, full_name=None, email=None, membership_type=None):
+        changes = {'full_name': full_name, 'email': email.strip() if email else None,
+                   'membership_type': membership_type}
+        changes = {column: value for column, value in changes.items() if value is not None}
+        if not changes:
+            return "Error: Nothing to update."
+
+        with self.store.lock:
+            member = self.store.members.get(member_id)
+            if member is None:
+                return f"Error: Member ID {member_id} does not exist."
+            new_email = changes.get('email', member.email).casefold()
+            if self.store.member_ids_by_email.get(new_email, member_id) != member_id:
+                return f"Error updating member: Duplicate entry '{changes['email']}' for key 'email'"
+            del self.store.member_ids_by_email[member.email.casefold()]
+            self.store.members[member_id] = member._replace(**changes)
+            self.store.member_ids_by_email[new_email] = member_id
+            self.store.record_change('member', member_id, 'update', changes)
+        return f"Success: Member ID {member_id} updated."
+
+    @classmethod
+    def notify_member_changed(cls, member_id, branch_id=None):
+        pass  # no cache, the store is always current
+
+
+class MemoryLoanService:
+    """
+    In-memory implementation of LoanService (same methods, messages and transactional behaviour).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def borrow_book(self, member_id, book_id):
+        with self.store.lock:
+            if book_id in self.store.active_loans:
+                return f"Error: Book ID {book_id} is already borrowed."
+            if book_id not in self.store.books:
+                return f"Error: Book ID {book_id} does not exist."
+            if not self.store.books[book_id].is_active:
+                return f"Error: Book ID {book_id} has been withdrawn from the catalogue."
+            if member_id not in self.store.members:
+                return f"Error: Member {member_id} does not exist."
+
+            print(f"--- Starting Transaction for Member {member_id} borrowing Book {book_id} ---")
+
+            now = datetime.now().replace(microsecond=0)
+            due_date = LoanService.due_date(self.store.members[member_id].membership_type, now.date())
+            loan = LoanRow(self.store.next_id('loans'), member_id, book_id, now, due_date, None, 'ACTIVE')
+            self.store.loans[loan.loan_id] = loan
+            self.store.active_loans[book_id] = loan.loan_id
+            self.store.record_change('loan', loan.loan_id, 'insert', {'book_id': book_id, 'member_id': member_id,
+                                                                     'status': 'ACTIVE', 'due_date': due_date})
+            self.store.member_activity[member_id] = now
+            print("--- Transaction COMMITTED Successfully ---")
+            return "Success: Book borrowed."
+
+    def borrow_books(self, member_id, book_ids):
+        book_ids = list(dict.fromkeys(book_ids))
+        with self.store.lock:
+            withdrawn = {book_id for book_id in book_ids
+                         if book_id in self.store.books and not self.store.books[book_id].is_active}
+            available = [book_id for book_id in book_ids if book_id in self.store.books
+                         and book_id not in self.store.active_loans and book_id not in withdrawn]
+            if available and member_id not in self.store.members:
+                return {book_id: f"Error: Member {member_id} does not exist." for book_id in book_ids}
+
+            now = datetime.now().replace(microsecond=0)
+            for book_id in available:
+                due_date = LoanService.due_date(self.store.members[member_id].membership_type, now.date())
+                loan = LoanRow(self.store.next_id('loans'), member_id, book_id, now, due_date, None, 'ACTIVE')
+                self.store.loans[loan.loan_id] = loan
+                self.store.active_loans[book_id] = loan.loan_id
+                self.store.record_change('loan', loan.loan_id, 'insert', {'book_id': book_id, 'member_id': member_id,
+                                                                         'status': 'ACTIVE', 'due_date': due_date})
+            if available:
+                self.store.member_activity[member_id] = now
+            return {book_id: "Success: Book borrowed." if book_id in available
+                    else f"Error: Book ID {book_id} is already borrowed." if book_id in self.store.active_loans
+                    else f"Error: Book ID {book_id} does not exist." if book_id not in self.store.books
+                    else f"Error: Book ID {book_id} has been withdrawn from the catalogue." for book_id in book_ids}
+
+    def return_book(self, book_id):
+        with self.store.lock:
+            loan_id = self.store.active_loans.pop(book_id, None)
+            if loan_id is None:
+                return f"Error: Book ID {book_id} is not currently borrowed."
+            now = datetime.now().replace(microsecond=0)
+            self.store.loans[loan_id] = self.store.loans[loan_id]._replace(status='RETURNED', return_date=now)
+            self.store.record_change('loan', loan_id, 'update', {'book_id': book_id, 'status': 'RETURNED'})
+
+            queue = self.store.reservation_queues.get(book_id)
+            if not queue:
+                return "Success: Book returned."
+            # Hand-off to the head of the queue, in the same "transaction"
+            reservation = self.store.reservations[queue.popleft()]
+            self.store.reservations[reservation.reservation_id] = reservation._replace(status='FULFILLED',
+                                                                                       fulfilled_at=now)
+            member_id = reservation.member_id
+            due_date = LoanService.due_date(self.store.members[member_id].membership_type, now.date())
+            loan = LoanRow(self.store.next_id('loans'), member_id, book_id, now, due_date, None, 'ACTIVE')
+            self.store.loans[loan.loan_id] = loan
+            self.store.active_loans[book_id] = loan.loan_id
+            self.store.record_change('loan', loan.loan_id, 'insert', {'book_id': book_id, 'member_id': member_id,
+                                                                     'status': 'ACTIVE', 'due_date': due_date})
+            self.store.enqueue_notification(member_id, 'RESERVATION_READY', {
+                'reservation_id': reservation.reservation_id, 'book_id': book_id, 'due_date': due_date
+            }, now)
+            return f"Success: Book returned. Lent to Member {member_id} (reservation {reservation.reservation_id})."
+
+    def get_active_loans(self, as_dict=False):
+        with self.store.lock:
+            loans = [self.store.loans[loan_id] for loan_id in self.store.active_loans.values()]
+            records = [Loan(loan.loan_id, self.store.members[loan.member_id].full_name,
+                            self.store.books[loan.book_id].title, loan.loan_date, loan.due_date) for loan in loans]
+        records.sort(key=lambda loan: loan.loan_id)
+        return _records(records, as_dict)
+
+    def mark_overdue_loans(self, batch_size=1000, pause=0.0, today=None):
+        today = today or date.today()
+        with self.store.lock:
+            overdue = [self.store.loans[loan_id] for loan_id in self.store.active_loans.values()]
+            overdue = [loan for loan in overdue if loan.status == 'ACTIVE' and loan.due_date < today]
+            for loan in overdue:
+                self.store.loans[loan.loan_id] = loan._replace(status='OVERDUE')
+                self.store.record_change('loan', loan.loan_id, 'update', {'book_id': loan.book_id, 'status': 'OVERDUE'})
+        print(f"Overdue sweep: {len(overdue)} loans marked as overdue.")
+        return len(overdue)
+
+    def get_borrowed_book_ids(self):
+        with self.store.lock:
+            return list(self.store.active_loans)
+
+
+class MemoryReservationService:
+    """
+    In-memory implementation of ReservationService (one FIFO deque per book).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def reserve_book(self, member_id, book_id):
+        with self.store.lock:
+            if book_id not in self.store.books:
+                return f"Error: Book ID {book_id} does not exist."
+            if not self.store.books[book_id].is_active:
+                return f"Error: Book ID {book_id} has been withdrawn from the catalogue."
+            loan_id = self.store.active_loans.get(book_id)
+            if loan_id is None:
+                return f"Error: Book ID {book_id} is not borrowed, borrow it instead."
+            if self.store.loans[loan_id].member_id == member_id:
+                return f"Error: Member {member_id} has borrowed Book ID {book_id}."
+            queue = self.store.reservation_queues.setdefault(book_id, deque())
+            if any(self.store.reservations[r].member_id == member_id for r in queue):
+                return f"Error: Member {member_id} has already reserved Book ID {book_id}."
+            if member_id not in self.store.members:
+                return f"Error: Member {member_id} does not exist."
+
+            reservation = ReservationRow(self.store.next_id('reservations'), member_id, book_id,
+                                         datetime.now().replace(microsecond=0), 'WAITING', None)
+            self.store.reservations[reservation.reservation_id] = reservation
+            queue.append(reservation.reservation_id)
+            return f"Success: Book reserved (position {len(queue)} in the queue)."
+
+    def cancel_reservation(self, reservation_id):
+        with self.store.lock:
+            reservation = self.store.reservations.get(reservation_id)
+            if reservation is None or reservation.status != 'WAITING':
+                return f"Error: Reservation {reservation_id} is not waiting."
+            self.store.reservation_queues[reservation.book_id].remove(reservation_id)
+            self.store.reservations[reservation_id] = reservation._replace(status='CANCELLED')
+            return "Success: Reservation cancelled."
+
+    def get_waiting_reservations(self, book_id=None, as_dict=False):
+        with self.store.lock:
+            book_ids = sorted(self.store.reservation_queues) if book_id is None else [book_id]
+            records = []
+            for queued_book_id in book_ids:
+                for reservation_id in self.store.reservation_queues.get(queued_book_id, ()):
+                    r = self.store.reservations[reservation_id]
+                    records.append(Reservation(r.reservation_id, r.member_id, self.store.members[r.member_id].full_name,
+                                               r.book_id, self.store.books[r.book_id].title, r.reserved_at))
+        return _records(records, as_dict)
+
+
+class MemoryNotificationOutbox(NotificationOutbox):
+    """
+    In-memory implementation of NotificationOutbox (same sending and retry rules).
+    """
+
+    def __init__(self, store, sender=None, batch_size=100, max_attempts=5, interval=5, claim_seconds=300):
+        self.store = store
+        self.sender = sender or print_sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.interval = interval
+        self.claim_seconds = claim_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _pending(self, limit, claim=False):
+        with self.store.lock:
+            rows = [row for row in self.store.notifications.values()
+                    if row.sent_at is None and row.attempts < self.max_attempts
+                    and not (claim and row.notification_id in self.store.claimed_notifications)][:limit]
+            if claim:
+                self.store.claimed_notifications.update(row.notification_id for row in rows)
+            return [Notification(row.notification_id, row.member_id, self.store.members[row.member_id].email,
+                                 row.kind, row.payload, row.created_at, row.attempts) for row in rows]
+
+    def pending(self, limit=100, as_dict=False):
+        return _records(self._pending(limit), as_dict)
+
+    def dispatch(self):
+        sent_total = 0
+        while True:
+            batch = self._pending(self.batch_size, claim=True)
+            failed = False
+            for notification in batch:
+                try:
+                    self.sender(notification)
+                    sent_at = datetime.now().replace(microsecond=0)
+                    sent_total += 1
+                except Exception as err:
+                    print(f"Sending notification {notification.notification_id} failed: {err}")
+                    sent_at = None
+                    failed = True
+                with self.store.lock:
+                    row = self.store.notifications[notification.notification_id]
+                    self.store.notifications[row.notification_id] = row._replace(sent_at=sent_at,
+                                                                                 attempts=row.attempts + 1)
+                    self.store.claimed_notifications.discard(row.notification_id)
+            if failed or len(batch) < self.batch_size:
+                return sent_total
+
+
+class MemoryChangeFeed(ChangeFeed):
+    """
+    In-memory implementation of ChangeFeed (events are appended under the store lock, so there are no gaps).
+    """
+
+    def __init__(self, store, after_id=0, batch_size=500, skipped=()):
+        self.store = store
+        self.last_id = after_id
+        self.batch_size = batch_size
+        self.gap_timeout = 0
+        self.late_horizon = 0
+        self.skipped = dict.fromkeys(skipped)
+        self.lost_ids = []
+
+    def latest_id(self):
+        with self.store.lock:
+            return next(reversed(self.store.change_events), 0)
+
+    def purge(self, keep=100000, batch_size=5000):
+        with self.store.lock:
+            cutoff = self.latest_id() - keep
+            old = [event_id for event_id in self.store.change_events if event_id <= cutoff]
+            for event_id in old:
+                del self.store.change_events[event_id]
+        return len(old)
+
+    def _fetch(self, after_id, limit):
+        now = datetime.now()
+        events = []
+        with self.store.lock:
+            # Newest first, so a feed that is up to date reads only the new events
+            for event_id in reversed(self.store.change_events):
+                if event_id <= after_id:
+                    break
+                events.append(self.store.change_events[event_id])
+        return [(event, now) for event in reversed(events)][:limit]
+
+    def _fetch_ids(self, event_ids):
+        now = datetime.now()
+        with self.store.lock:
+            found = [self.store.change_events[event_id] for event_id in event_ids
+                     if event_id in self.store.change_events]
+        return found, {'now': now, **{event_id: now for event_id in event_ids}}
+
+
+class MemoryImportService(ImportService):
+    """
+    In-memory implementation of ImportService. Every CSV row (publisher + book) is
+    inserted completely or not at all, like the per-row transaction of the database version.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def import_books_from_csv(self, filename):
+        file_path = self.get_file_path(filename)
+        if file_path is None:
+            return f"Error: File {filename} not found. Please check /data folder."
+
+        success_count = 0
+        errors = []
+        try:
+            with open(file_path, mode='r', encoding='utf-8') as csv_file:
+                for row in csv.DictReader(csv_file):
+                    try:
+                        pub_name = row['publisher_name']
+                        title = row['book_title']
+                        isbn = normalize_isbn(row['isbn'])
+                        price = float(row['price'])
+                    except ValueError:
+                        errors.append(f"Invalid data format in row: {row}")
+                        continue
+
+                    with self.store.lock:
+                        if isbn in self.store.book_ids_by_isbn:
+                            errors.append(f"Failed to import {title}: Duplicate entry '{isbn}' for key 'isbn'")
+                            continue
+                        publisher_id = self.store.next_id('publishers')
+                        self.store.publishers[publisher_id] = Publisher(publisher_id, pub_name, None)
+                        book = self.store.insert_book(title, isbn, price, publisher_id)
+                        self.store.record_change('publisher', publisher_id, 'insert', {'name': pub_name})
+                        self.store.record_change('book', book.book_id, 'insert', {'title': title, 'isbn': isbn,
+                                                                                 'price': price,
+                                                                                 'publisher_id': publisher_id})
+                    success_count += 1
+                    print(f"Imported: {title} (Publisher: {pub_name})")
+
+            result_msg = f"\n--- Import Finished ---\nSuccess: {success_count}\nErrors: {len(errors)}"
+            if errors:
+                result_msg += "\nError Details:\n" + "\n".join(errors)
+            return result_msg
+
+        except Exception as e:
+            return f"Critical Error during import: {e}"
+
+
+class MemoryReportingService(ReportingService):
+    """
+    In-memory implementation of ReportingService (same aggregation as TOP_BORROWERS_QUERY).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_top_borrowers(self, as_dict=False):
+        totals = {}
+        with self.store.lock:
+            for loan in self.store.loans.values():
+                count, value = totals.get(loan.member_id, (0, 0.0))
+                totals[loan.member_id] = (count + 1, value + self.store.books[loan.book_id].price)
+            stats = [MemberStat(self.store.members[member_id].full_name, self.store.members[member_id].email,
+                                count, value)
+                     for member_id, (count, value) in totals.items()]
+        stats.sort(key=lambda stat: stat.total_value_borrowed, reverse=True)
+        return _records(stats, as_dict)
+
+    def generate_top_borrowers_report(self):
+        return self.format_top_borrowers_report(self.get_top_borrowers())
+
+    def get_overdue_loans(self, as_dict=False, today=None):
+        today = today or date.today()
+        with self.store.lock:
+            loans = [self.store.loans[loan_id] for loan_id in self.store.active_loans.values()]
+            records = [OverdueLoan(loan.loan_id, self.store.members[loan.member_id].full_name,
+                                   self.store.members[loan.member_id].email, self.store.books[loan.book_id].title,
+                                   loan.loan_date, loan.due_date, (today - loan.due_date).days)
+                       for loan in loans if loan.due_date < today]
+        records.sort(key=lambda loan: loan.due_date)
+        return _records(records, as_dict)
+
+    def generate_overdue_report(self):
+        return self.format_overdue_report(self.get_overdue_loans())
+
+
+class MemoryMigrationService:
+    """
+    Placeholder for MigrationService, the in-memory store has no schema to migrate.
+    """
+
+    def apply_migrations(self):
+        return "Database schema is up to date (in-memory backend)."
+
+    def get_pending_migrations(self):
+        return []
+
+    def check_schema(self):
+        return None
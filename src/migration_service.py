@@ -0,0 +1,209 @@
+import glob
+import os
+import re
+from db_connection import DatabaseConnection, DatabaseError
+from settings import get_base_dir
+
+
+class MigrationService:
+    """
+    Applies incremental schema changes (migrations) to an existing database.
+
+    Migrations are SQL files in 'data/migrations/<backend>' (mysql, sqlite) named
+    '<number>_<description>.sql'; both folders contain the same versions.
+    They are applied in order of their file names and every applied migration is
+    recorded in the 'schema_migrations' table, so each one runs only once.
+    The base schema is still created by 'data/database_schema.sql' (SQLite: 'database_schema_sqlite.sql').
+
+    A '-- check: SELECT ...' line in a migration is run before its statements;
+    if the query returns rows (e.g. ISBNs that would collide once normalised),
+    the migration is not applied and the rows are reported.
+
+    MySQL commits every DDL statement at once, so a migration that fails halfway
+    cannot be rolled back. Its CREATE TABLE, CREATE INDEX, ADD INDEX and
+    ADD COLUMN statements (one change per statement) are therefore skipped when
+    information_schema shows the change is already there, and the migration can
+    simply be run again.
+    """
+
+    # Branches whose schema was found up to date (checked once per process)
+    _up_to_date = set()
+
+    # DDL statements of MySQL migrations that can be skipped on a re-run: pattern -> what it creates
+    MYSQL_DDL_PATTERNS = [
+        (re.compile(r"^ALTER TABLE (?P<table>\w+) ADD (?:FULLTEXT |UNIQUE )?INDEX (?P<name>\w+)", re.I), 'index'),
+        (re.compile(r"^CREATE (?:FULLTEXT |UNIQUE )?INDEX (?P<name>\w+) ON (?P<table>\w+)", re.I), 'index'),
+        (re.compile(r"^ALTER TABLE (?P<table>\w+) ADD COLUMN (?P<name>\w+)", re.I), 'column'),
+        (re.compile(r"^CREATE TABLE (?P<table>\w+)", re.I), 'table'),
+    ]
+
+    EXISTS_QUERIES = {
+        'index': "SELECT 1 FROM information_schema.statistics "
+                 "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+        'column': "SELECT 1 FROM information_schema.columns "
+                  "WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s",
+        'table': "SELECT 1 FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+    }
+
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+
+    def get_migrations_dir(self):
+        """
+        Returns:
+            str: Path of the folder with migration files for the configured backend.
+        """
+        return os.path.join(get_base_dir(), 'data', 'migrations', self.db.dialect or 'mysql')
+
+    def apply_migrations(self):
+        """
+        Applies all migrations that have not been applied yet.
+
+        Returns:
+            str: A summary of applied migrations or an error description.
+        """
+        conn = self.db.connect()
+        if not conn:
+            return "DB Connection Failed"
+
+        cursor = conn.cursor()
+        applied_now = []
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version VARCHAR(100) PRIMARY KEY,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+
+            for path in sorted(glob.glob(os.path.join(self.get_migrations_dir(), '*.sql'))):
+                version = os.path.splitext(os.path.basename(path))[0]
+                if version in applied:
+                    continue
+
+                for check in self._read_checks(path):
+                    cursor.execute(check)
+                    rows = cursor.fetchall()
+                    if rows:
+                        conn.rollback()
+                        done = f" (applied: {', '.join(applied_now)})" if applied_now else ""
+                        return (f"Migration Failed: {version} cannot be applied, {len(rows)} conflicting row(s): "
+                                f"{'; '.join(' / '.join(str(value) for value in row) for row in rows[:10])}. "
+                                f"Fix them and run the migration again{done}.")
+
+                print(f"Applying migration {version}...")
+                for statement in self._read_statements(path):
+                    if self.db.dialect == 'mysql' and self._ddl_done(cursor, statement):
+                        print(f"  Skipping (already applied): {statement.splitlines()[0]}")
+                        continue
+                    cursor.execute(statement)
+                cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+                conn.commit()
+                applied_now.append(version)
+
+            if not applied_now:
+                return "Database schema is up to date."
+            return "Applied migrations: " + ", ".join(applied_now)
+
+        except DatabaseError as err:
+            conn.rollback()
+            return f"Migration Failed: {err}"
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def get_pending_migrations(self):
+        """
+        Returns:
+            list[str]: Versions of the migrations not applied yet (in order), None if the database is unavailable.
+        """
+        versions = [os.path.splitext(os.path.basename(path))[0]
+                    for path in sorted(glob.glob(os.path.join(self.get_migrations_dir(), '*.sql')))]
+        conn = self.db.connect()  # not a replica, it may lag behind
+        if not conn:
+            return None
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+        except DatabaseError:
+            applied = set()  # no migration was ever applied
+        finally:
+            cursor.close()
+            self.db.close()
+        return [version for version in versions if version not in applied]
+
+    def check_schema(self):
+        """
+        Checks at startup that all migrations were applied. The repositories write
+        to tables created by migrations (e.g. every change records a change event),
+        so on an older schema each write would fail with "table doesn't exist".
+
+        Returns:
+            str: An error message naming the pending migrations, None if the schema is
+            up to date (or the database is unavailable, which is reported elsewhere).
+        """
+        if self.branch_id in MigrationService._up_to_date:
+            return None
+        pending = self.get_pending_migrations()
+        if pending is None:
+            return None
+        if pending:
+            return (f"Error: The database schema is out of date (pending migrations: {', '.join(pending)}). "
+                    f"Run 'library migrate' first.")
+        MigrationService._up_to_date.add(self.branch_id)
+        return None
+
+    def _ddl_done(self, cursor, statement):
+        """
+        Returns True if a MySQL DDL statement has already been applied (by an earlier, failed run).
+        """
+        for pattern, kind in self.MYSQL_DDL_PATTERNS:
+            match = pattern.match(statement)
+            if match:
+                names = match.group('table', 'name') if kind != 'table' else (match.group('table'),)
+                cursor.execute(self.EXISTS_QUERIES[kind], names)
+                return cursor.fetchone() is not None
+        return False
+
+    @staticmethod
+    def _read_checks(path):
+        """
+        Returns:
+            list[str]: The queries of the '-- check:' lines of a migration file.
+        """
+        with open(path, mode='r', encoding='utf-8') as sql_file:
+            return [line.strip()[len('-- check:'):].strip() for line in sql_file
+                    if line.strip().startswith('-- check:')]
+
+    def _read_statements(self, path):
+        """
+        Splits a migration file into single SQL statements.
+        Statements are separated by ';' at the end of a line, '--' comment lines are skipped.
+
+        Returns:
+            list[str]: The statements of the file.
+        """
+        statements = []
+        current = []
+        with open(path, mode='r', encoding='utf-8') as sql_file:
+            for line in sql_file:
+                stripped = line.strip()
+                if not stripped or stripped.startswith('--'):
+                    continue
+                current.append(line)
+                if stripped.endswith(';'):
+                    statements.append("".join(current).strip().rstrip(';'))
+                    current = []
+        if current:
+            statements.append("".join(current).strip())
+        return statements
@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+# Compact, immutable row records returned by the repositories and services.
+#
+# They are built directly from plain tuple cursors: a record is a tuple with named
+# fields (no per-row dict, the field names are stored only once in the class).
+# The field order must match the column order of the corresponding SELECT statements.
+
+Book = namedtuple('Book', ['book_id', 'title', 'isbn', 'price', 'is_active', 'publisher_id'])
+Author = namedtuple('Author', ['author_id', 'first_name', 'last_name', 'birth_date'])
+# Book with the list of its Author records (see BookRepository.get_books_with_authors)
+BookWithAuthors = namedtuple('BookWithAuthors', Book._fields + ('authors',))
+Publisher = namedtuple('Publisher', ['publisher_id', 'name', 'website'])
+Member = namedtuple('Member', ['member_id', 'full_name', 'email', 'membership_type', 'joined_at'])
+Loan = namedtuple('Loan', ['loan_id', 'full_name', 'title', 'loan_date', 'due_date'])
+OverdueLoan = namedtuple('OverdueLoan', ['loan_id', 'full_name', 'email', 'title', 'loan_date', 'due_date',
+                                         'days_overdue'])
+MemberStat = namedtuple('MemberStat', ['full_name', 'email', 'total_loans', 'total_value_borrowed'])
+Reservation = namedtuple('Reservation', ['reservation_id', 'member_id', 'full_name', 'book_id', 'title',
+                                         'reserved_at'])
+# Row of the change feed (payload is the decoded JSON object, or None)
+ChangeEvent = namedtuple('ChangeEvent', ['event_id', 'entity', 'entity_id', 'action', 'payload', 'created_at'])
+# Row of the notification outbox (payload is the decoded JSON object)
+Notification = namedtuple('Notification', ['notification_id', 'member_id', 'email', 'kind', 'payload', 'created_at',
+                                           'attempts'])
+
+
+def to_records(rows, record_type, as_dict=False):
+    """
+    Converts rows fetched from a tuple cursor into records.
+
+    Args:
+        rows (list[tuple]): Rows in the column order of the record type.
+        record_type (type): One of the record classes above.
+        as_dict (bool): Compatibility mode, return plain dictionaries instead of records.
+
+    Returns:
+        list: List of records (or dictionaries if as_dict is True).
+    """
+    records = list(map(record_type._make, rows))
+    if as_dict:
+        return [record._asdict() for record in records]
+    return records
@@ -0,0 +1,237 @@
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from db_connection import DatabaseConnection, DatabaseError
+from models import Notification
+from transaction_runner import TransactionRunner
+
+
+def print_sender(notification):
+    """
+    Default delivery of a notification: prints it (replace with an e-mail/SMS gateway).
+    """
+    print(f"Notification to {notification.email}: {notification.kind} {json.dumps(notification.payload)}")
+
+
+class NotificationOutbox:
+    """
+    Notifications to members, sent asynchronously (transactional outbox).
+
+    A service that causes a notification (e.g. LoanService handing a returned book
+    to the next reservation) only inserts a row into 'notification_outbox' with
+    enqueue(), inside its own transaction. The notification exists exactly when
+    the change is committed, and the transaction never waits for a mail server.
+
+    dispatch() claims a batch of unsent rows in order (from the index on sent_at)
+    by setting claimed_by/claimed_until in a short transaction, hands them to the
+    sender outside of any transaction and then marks them sent. Rows claimed by
+    another dispatcher (the API server's thread, 'library notifications send',
+    a second API process) are skipped until their claim expires after
+    'claim_seconds', so two dispatchers never send the same notification.
+    start() runs it in a background thread every 'interval' seconds. Delivery is
+    at least once: a crash between sending and marking sends the batch again
+    once its claim has expired. A notification whose sender fails is released
+    and retried on the next run (a run stops after a batch with failures, so
+    retries are 'interval' seconds apart), up to 'max_attempts' times.
+    """
+
+    INSERT_QUERY = "INSERT INTO notification_outbox (member_id, kind, payload, created_at) VALUES (%s, %s, %s, NOW())"
+
+    PENDING_QUERY = """
+        SELECT o.notification_id, o.member_id, m.email, o.kind, o.payload, o.created_at, o.attempts
+        FROM notification_outbox o
+        JOIN members m ON o.member_id = m.member_id
+        WHERE o.sent_at IS NULL AND o.attempts < %s
+        ORDER BY o.notification_id
+        LIMIT %s
+    """
+
+    CLAIMABLE_QUERY = """
+        SELECT notification_id
+        FROM notification_outbox
+        WHERE sent_at IS NULL AND attempts < %s AND (claimed_until IS NULL OR claimed_until < %s)
+        ORDER BY notification_id
+        LIMIT %s
+    """
+
+    CLAIMED_QUERY = """
+        SELECT o.notification_id, o.member_id, m.email, o.kind, o.payload, o.created_at, o.attempts
+        FROM notification_outbox o
+        JOIN members m ON o.member_id = m.member_id
+        WHERE o.claimed_by = %s AND o.sent_at IS NULL
+        ORDER BY o.notification_id
+    """
+
+    def __init__(self, branch_id=None, sender=None, batch_size=100, max_attempts=5, interval=5, claim_seconds=300):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+            sender (callable): Function (Notification) delivering one notification; raising an error means failure.
+            batch_size (int): Notifications claimed and sent together.
+            max_attempts (int): Failed deliveries after which a notification is no longer retried.
+            interval (float): Seconds between two runs of the background thread.
+            claim_seconds (float): How long a claimed batch is reserved for this dispatcher (must exceed
+                the time needed to send one batch).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+        self.transactions = TransactionRunner(self.db)
+        self.sender = sender or print_sender
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.interval = interval
+        self.claim_seconds = claim_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def enqueue(cls, cursor, member_id, kind, payload):
+        """
+        Adds a notification inside the caller's transaction.
+
+        Args:
+            cursor (object): Cursor of the open transaction.
+            member_id (int): Recipient.
+            kind (str): Type of the notification (e.g. 'RESERVATION_READY').
+            payload (dict): Details (stored as JSON).
+        """
+        cursor.execute(cls.INSERT_QUERY, (member_id, kind, json.dumps(payload, default=str)))
+
+    def pending(self, limit=100, as_dict=False):
+        """
+        Returns:
+            list[Notification]: The oldest unsent notifications.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.PENDING_QUERY, (self.max_attempts, limit))
+            records = [self._record(row) for row in cursor.fetchall()]
+            return [record._asdict() for record in records] if as_dict else records
+        except DatabaseError as err:
+            print(f"Error fetching notifications: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def dispatch(self):
+        """
+        Sends all unsent notifications that no other dispatcher has claimed, batch by batch.
+
+        Returns:
+            int: Number of notifications sent.
+        """
+        sent_total = 0
+        while True:
+            token = uuid.uuid4().hex
+            batch = self._claim(token)
+            if not batch:
+                break
+
+            sent, failed = [], []
+            for notification in batch:
+                try:
+                    self.sender(notification)
+                    sent.append(notification.notification_id)
+                except Exception as err:
+                    print(f"Sending notification {notification.notification_id} failed: {err}")
+                    failed.append(notification.notification_id)
+
+            if not self._finish(token, sent, failed):
+                break  # the claim expires and the batch is sent again (at least once)
+            sent_total += len(sent)
+            # Failed notifications would be claimed again at once: retry them in the next run
+            if failed or len(batch) < self.batch_size:
+                break
+        return sent_total
+
+    def _claim(self, token):
+        """
+        Reserves the oldest unclaimed notifications for this dispatcher.
+
+        The UPDATE repeats the claim condition, so of two dispatchers selecting the
+        same rows only one claims each row (the other's UPDATE waits for the row
+        lock and then no longer matches it).
+
+        Returns:
+            list[Notification]: The claimed notifications (empty if none or on error).
+        """
+        def work(cursor):
+            now = datetime.now().replace(microsecond=0)
+            cursor.execute(self.CLAIMABLE_QUERY, (self.max_attempts, now, self.batch_size))
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return []
+            cursor.execute(f"UPDATE notification_outbox SET claimed_by = %s, claimed_until = %s "
+                           f"WHERE notification_id IN ({', '.join(['%s'] * len(ids))}) "
+                           f"AND sent_at IS NULL AND (claimed_until IS NULL OR claimed_until < %s)",
+                           [token, now + timedelta(seconds=self.claim_seconds)] + ids + [now])
+            cursor.execute(self.CLAIMED_QUERY, (token,))
+            return [self._record(row) for row in cursor.fetchall()]
+
+        try:
+            return self.transactions.run(work, name="Notification claim") or []
+        except DatabaseError as err:
+            print(f"Error dispatching notifications: {err}")
+            return []
+
+    def _finish(self, token, sent, failed):
+        """
+        Marks the sent notifications and releases the failed ones for a later retry.
+
+        Returns:
+            bool: True if the batch was recorded.
+        """
+        def work(cursor):
+            if sent:
+                cursor.execute(f"UPDATE notification_outbox SET sent_at = %s, attempts = attempts + 1, "
+                               f"claimed_by = NULL, claimed_until = NULL "
+                               f"WHERE claimed_by = %s AND notification_id IN ({', '.join(['%s'] * len(sent))})",
+                               [datetime.now().replace(microsecond=0), token] + sent)
+            if failed:
+                cursor.execute(f"UPDATE notification_outbox SET attempts = attempts + 1, "
+                               f"claimed_by = NULL, claimed_until = NULL "
+                               f"WHERE claimed_by = %s AND notification_id IN ({', '.join(['%s'] * len(failed))})",
+                               [token] + failed)
+            return True
+
+        try:
+            return bool(self.transactions.run(work, name="Notification delivery"))
+        except DatabaseError as err:
+            print(f"Error dispatching notifications: {err}")
+            return False
+
+    def start(self):
+        """
+        Starts the background thread running dispatch() every 'interval' seconds.
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread (after the batch being sent, if any).
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dispatch()
+            except Exception as err:  # keep the dispatcher alive, the outbox is drained by the next run
+                print(f"Error in notification dispatcher: {err}")
+
+    @staticmethod
+    def _record(row):
+        return Notification(row[0], row[1], row[2], row[3], json.loads(row[4]), row[5], row[6])
@@ -0,0 +1,123 @@
+import threading
+import time
+from backends import DatabaseError
+from connection_pool import ConnectionPool
+
+
+class ReplicaSet:
+    """
+    Read replicas of the MySQL primary, used for read-only queries (read/write splitting).
+
+    Each replica has its own ConnectionPool. Replicas are used in round-robin order;
+    a replica whose replication lag is above the threshold (or which is unreachable,
+    or not replicating at all) is skipped until the next lag check. If no replica is
+    usable, reads go to the primary.
+    """
+
+    def __init__(self, configs, factory, pool_size=5, max_lag=5, check_interval=5, pool_options=None):
+        """
+        Args:
+            configs (list[dict]): Connection settings of the replicas (merged over the primary settings).
+            factory (callable): Function (config) -> new connection.
+            pool_size (int): Idle connections kept per replica.
+            max_lag (float): Maximum accepted lag in seconds (None = do not check the lag).
+            check_interval (float): Seconds between two lag checks of the same replica.
+            pool_options (dict): Idle eviction settings of the pools (see ConnectionPool).
+        """
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._replicas = [
+            {
+                'name': f"{config.get('host')}:{config.get('port', 3306)}",
+                'pool': ConnectionPool(lambda config=config: factory(config), pool_size, **(pool_options or {})),
+                'usable': True,
+                'checked_at': None,
+            }
+            for config in configs
+        ]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._replicas)
+
+    def choose(self):
+        """
+        Returns the pool of the next usable replica (round-robin), or None if all replicas are lagging or down.
+        """
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self._replicas)
+        for offset in range(len(self._replicas)):
+            replica = self._replicas[(start + offset) % len(self._replicas)]
+            if self._is_usable(replica):
+                return replica['pool']
+        return None
+
+    def mark_down(self, pool):
+        """
+        Excludes a replica whose connection failed until its next check.
+        """
+        for replica in self._replicas:
+            if replica['pool'] is pool:
+                replica['usable'] = False
+                replica['checked_at'] = time.monotonic()
+
+    def pools(self):
+        """
+        Returns:
+            dict[str, ConnectionPool]: Replica name (host:port) -> its pool.
+        """
+        return {replica['name']: replica['pool'] for replica in self._replicas}
+
+    def close_all(self):
+        """
+        Closes idle connections of all replicas.
+        """
+        for replica in self._replicas:
+            replica['pool'].close_all()
+
+    def _is_usable(self, replica):
+        """
+        Returns the result of the last lag check, re-checking the replica when it is too old.
+        """
+        now = time.monotonic()
+        if replica['checked_at'] is None or now - replica['checked_at'] >= self.check_interval:
+            replica['checked_at'] = now
+            if self.max_lag is None:
+                replica['usable'] = True
+            else:
+                lag = self._measure_lag(replica['pool'])
+                usable = lag is not None and lag <= self.max_lag
+                if replica['usable'] and not usable:
+                    state = "not replicating" if lag is None else f"{lag}s behind the primary"
+                    print(f"Warning: Replica {replica['name']} skipped ({state}).")
+                replica['usable'] = usable
+        return replica['usable']
+
+    def _measure_lag(self, pool):
+        """
+        Reads the replication lag of a replica.
+
+        Returns:
+            int: Seconds behind the primary, or None if the replica is unreachable or not replicating.
+        """
+        try:
+            conn = pool.acquire()
+        except DatabaseError:
+            return None
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except DatabaseError:
+                cursor.execute("SHOW SLAVE STATUS")  # MySQL older than 8.0.22
+            status = cursor.fetchone()
+            if not status:
+                return None
+            return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        except DatabaseError:
+            return None
+        finally:
+            cursor.close()
+            pool.release(conn)
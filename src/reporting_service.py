@@ -1,5 +1,6 @@
-import mysql.connector
-from db_connection import DatabaseConnection
+from datetime import date
+from db_connection import DatabaseConnection, DatabaseError
+from models import MemberStat, OverdueLoan, to_records
 
 
 class ReportingService:
@@ -9,8 +10,120 @@ class ReportingService:
     Fulfills the requirement: Aggregated report from at least 3 tables.
     """
 
-    def __init__(self):
-        self.db = DatabaseConnection()
+    TOP_BORROWERS_QUERY = """
+        SELECT 
+            m.full_name, 
+            m.email,
+            COUNT(l.loan_id) as total_loans, 
+            SUM(b.price) as total_value_borrowed
+        FROM members m
+        JOIN loans l ON m.member_id = l.member_id
+        JOIN books b ON l.book_id = b.book_id
+        GROUP BY m.member_id
+        ORDER BY total_value_borrowed DESC
+    """
+
+    # Uses the (status, due_date) index of the loans table
+    OVERDUE_LOANS_QUERY = """
+        SELECT l.loan_id, m.full_name, m.email, b.title, l.loan_date, l.due_date
+        FROM loans l
+        JOIN members m ON l.member_id = m.member_id
+        JOIN books b ON l.book_id = b.book_id
+        WHERE l.status IN ('ACTIVE', 'OVERDUE') AND l.due_date < %s
+        ORDER BY l.due_date
+    """
+
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+
+    def get_top_borrowers(self, as_dict=False):
+        """
+        Retrieves the raw data of the borrowing report (one row per member).
+        Used by the command line interface for machine readable output (JSON/JSONL).
+
+        Args:
+            as_dict (bool): Return dictionaries instead of MemberStat records (compatibility mode).
+
+        Returns:
+            list[MemberStat]: Rows with full_name, email, total_loans, total_value_borrowed.
+        """
+        if self.branch_id is None and DatabaseConnection().branch_ids:
+            results = self.merge_branch_results(DatabaseConnection().for_each_branch(
+                lambda branch_id: ReportingService(branch_id)._fetch_top_borrowers(), include_default=True
+            ))
+            return [record._asdict() for record in results] if as_dict else results
+        return self._fetch_top_borrowers(as_dict)
+
+    def _fetch_top_borrowers(self, as_dict=False):
+        """
+        Runs the borrowing report query on this service's own database only.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.TOP_BORROWERS_QUERY)
+            return to_records(cursor.fetchall(), MemberStat, as_dict)
+        except DatabaseError as err:
+            print(f"Error fetching report data: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
+
+    @staticmethod
+    def merge_branch_results(results_by_branch):
+        """
+        Merges the report rows of all branches (a member registered at several
+        branches, identified by e-mail, becomes one row with summed totals).
+
+        Args:
+            results_by_branch (dict[int, list[MemberStat]]): Branch ID (None = the default database) -> rows.
+
+        Returns:
+            list[MemberStat]: Merged rows, ordered by total_value_borrowed descending.
+        """
+        merged = {}
+        for results in results_by_branch.values():
+            for row in results:
+                key = row.email.casefold()
+                previous = merged.get(key)
+                if previous is None:
+                    merged[key] = row
+                else:
+                    merged[key] = previous._replace(
+                        total_loans=previous.total_loans + row.total_loans,
+                        total_value_borrowed=(previous.total_value_borrowed or 0) + (row.total_value_borrowed or 0)
+                    )
+        return sorted(merged.values(), key=lambda row: row.total_value_borrowed or 0, reverse=True)
+
+    @staticmethod
+    def format_top_borrowers_report(results):
+        """
+        Formats MemberStat records as a console table.
+
+        Returns:
+            str: Formatted string table suitable for console output.
+        """
+        # Formatting the report header
+        report = "\n=== LIBRARY BORROWING REPORT ===\n"
+        report += f"{'Member Name':<25} | {'Loans':<5} | {'Total Value':<10}\n"
+        report += "-" * 50 + "\n"
+
+        for row in results:
+            # Handle None values if sum is null
+            val = row.total_value_borrowed if row.total_value_borrowed else 0.0
+            report += f"{row.full_name:<25} | {row.total_loans:<5} | {val:<10.2f}\n"
+
+        report += "================================\n"
+        return report
 
     def generate_top_borrowers_report(self):
         """
@@ -21,45 +134,115 @@ class ReportingService:
         - Uses Aggregation functions: COUNT() and SUM().
         - Groups results by member.
 
+        With branches configured, the report of every branch and of the default database
+        is queried in parallel and merged.
+
         Returns:
             str: Formatted string table suitable for console output.
         """
-        conn = self.db.connect()
+        if self.branch_id is None and DatabaseConnection().branch_ids:
+            return self.format_top_borrowers_report(self.get_top_borrowers())
+
+        conn = self.db.connect(read_only=True)
         if not conn:
             return "DB Connection Failed"
 
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         try:
-            query = """
-                SELECT 
-                    m.full_name, 
-                    m.email,
-                    COUNT(l.loan_id) as total_loans, 
-                    SUM(b.price) as total_value_borrowed
-                FROM members m
-                JOIN loans l ON m.member_id = l.member_id
-                JOIN books b ON l.book_id = b.book_id
-                GROUP BY m.member_id
-                ORDER BY total_value_borrowed DESC
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-
-            # Formatting the report header
-            report = "\n=== LIBRARY BORROWING REPORT ===\n"
-            report += f"{'Member Name':<25} | {'Loans':<5} | {'Total Value':<10}\n"
-            report += "-" * 50 + "\n"
+            cursor.execute(self.TOP_BORROWERS_QUERY)
+            return self.format_top_borrowers_report(to_records(cursor.fetchall(), MemberStat))
 
-            for row in results:
-                # Handle None values if sum is null
-                val = row['total_value_borrowed'] if row['total_value_borrowed'] else 0.0
-                report += f"{row['full_name']:<25} | {row['total_loans']:<5} | {val:<10.2f}\n"
+        except DatabaseError as err:
+            return f"Error generating report: {err}"
+        finally:
+            cursor.close()
+            self.db.close()
+
+    def get_overdue_loans(self, as_dict=False, today=None):
+        """
+        Retrieves the loans past their due date (marked by the overdue sweep or not yet),
+        the most overdue first.
+
+        Args:
+            as_dict (bool): Return dictionaries instead of OverdueLoan records (compatibility mode).
+            today (date): Reference date (default: today).
+
+        Returns:
+            list[OverdueLoan]: Rows with loan_id, full_name, email, title, loan_date, due_date, days_overdue.
+        """
+        today = today or date.today()
+        if self.branch_id is None and DatabaseConnection().branch_ids:
+            results_by_branch = DatabaseConnection().for_each_branch(
+                lambda branch_id: ReportingService(branch_id)._fetch_overdue_loans(today=today), include_default=True
+            )
+            results = sorted((row for results in results_by_branch.values() for row in results),
+                             key=lambda row: row.days_overdue, reverse=True)
+            return [record._asdict() for record in results] if as_dict else results
+        return self._fetch_overdue_loans(as_dict, today)
+
+    def _fetch_overdue_loans(self, as_dict=False, today=None):
+        """
+        Runs the overdue loans query on this service's own database only.
+        """
+        today = today or date.today()
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.OVERDUE_LOANS_QUERY, (today,))
+            rows = [row + ((today - row[5]).days,) for row in cursor.fetchall()]
+            return to_records(rows, OverdueLoan, as_dict)
+        except DatabaseError as err:
+            print(f"Error fetching overdue loans: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
 
-            report += "================================\n"
-            return report
+    @staticmethod
+    def format_overdue_report(results):
+        """
+        Formats OverdueLoan records as a console table.
+
+        Returns:
+            str: Formatted string table suitable for console output.
+        """
+        report = "\n=== OVERDUE LOANS REPORT ===\n"
+        report += f"{'Member Name':<25} | {'Book':<30} | {'Due Date':<10} | {'Days':<4}\n"
+        report += "-" * 80 + "\n"
+
+        for row in results:
+            report += f"{row.full_name:<25} | {row.title[:30]:<30} | {str(row.due_date):<10} | {row.days_overdue:<4}\n"
+
+        report += f"Total overdue loans: {len(results)}\n"
+        report += "============================\n"
+        return report
+
+    def generate_overdue_report(self):
+        """
+        Generates a report of the loans past their due date.
+
+        Returns:
+            str: Formatted string table suitable for console output.
+        """
+        if self.branch_id is None and DatabaseConnection().branch_ids:
+            return self.format_overdue_report(self.get_overdue_loans())
+
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return "DB Connection Failed"
+
+        today = date.today()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.OVERDUE_LOANS_QUERY, (today,))
+            rows = [row + ((today - row[5]).days,) for row in cursor.fetchall()]
+            return self.format_overdue_report(to_records(rows, OverdueLoan))
 
-        except mysql.connector.Error as err:
+        except DatabaseError as err:
             return f"Error generating report: {err}"
         finally:
             cursor.close()
-            self.db.close()
\ No newline at end of file
+            self.db.close()
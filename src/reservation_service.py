@@ -0,0 +1,128 @@
+from backends import IntegrityError
+from db_connection import DatabaseConnection, DatabaseError
+from models import Reservation, to_records
+from transaction_runner import TransactionRunner
+
+
+class ReservationService:
+    """
+    Service handling the reservation queue of borrowed books.
+
+    A member can reserve a book that is currently borrowed. Reservations of a book
+    form a FIFO queue (ordered by reservation_id); when the book is returned,
+    LoanService.return_book lends it to the head of the queue in the same
+    transaction and notifies the member through the notification outbox.
+    """
+
+    QUEUE_QUERY = """
+        SELECT r.reservation_id, r.member_id, m.full_name, r.book_id, b.title, r.reserved_at
+        FROM reservations r
+        JOIN members m ON r.member_id = m.member_id
+        JOIN books b ON r.book_id = b.book_id
+        WHERE r.status = 'WAITING'
+    """
+
+    def __init__(self, branch_id=None):
+        """
+        Args:
+            branch_id (int): Branch whose database is used (None = the default database).
+        """
+        self.branch_id = branch_id
+        self.db = DatabaseConnection().for_branch(branch_id)
+        self.transactions = TransactionRunner(self.db)
+
+    def reserve_book(self, member_id, book_id):
+        """
+        Adds a member to the end of the reservation queue of a borrowed book.
+
+        Args:
+            member_id (int): ID of the member.
+            book_id (int): ID of the borrowed book.
+
+        Returns:
+            str: A message indicating success (with the position in the queue) or failure.
+        """
+        def work(cursor):
+            cursor.execute("SELECT is_active FROM books WHERE book_id = %s", (book_id,))
+            book = cursor.fetchone()
+            if not book:
+                return f"Error: Book ID {book_id} does not exist."
+            if not book[0]:
+                return f"Error: Book ID {book_id} has been withdrawn from the catalogue."
+            cursor.execute("SELECT member_id FROM loans WHERE book_id = %s AND status IN ('ACTIVE', 'OVERDUE')",
+                           (book_id,))
+            loan = cursor.fetchone()
+            if not loan:
+                return f"Error: Book ID {book_id} is not borrowed, borrow it instead."
+            if loan[0] == member_id:
+                return f"Error: Member {member_id} has borrowed Book ID {book_id}."
+
+            cursor.execute("SELECT reservation_id FROM reservations "
+                           "WHERE book_id = %s AND status = 'WAITING' AND member_id = %s", (book_id, member_id))
+            if cursor.fetchone():
+                return f"Error: Member {member_id} has already reserved Book ID {book_id}."
+            cursor.execute("SELECT member_id FROM members WHERE member_id = %s", (member_id,))
+            if not cursor.fetchone():
+                return f"Error: Member {member_id} does not exist."
+
+            cursor.execute("INSERT INTO reservations (member_id, book_id, reserved_at, status) "
+                           "VALUES (%s, %s, NOW(), 'WAITING')", (member_id, book_id))
+            cursor.execute("SELECT COUNT(*) FROM reservations WHERE book_id = %s AND status = 'WAITING'", (book_id,))
+            return f"Success: Book reserved (position {cursor.fetchone()[0]} in the queue)."
+
+        try:
+            result = self.transactions.run(work, name=f"Reservation of Book {book_id}")
+        except IntegrityError as err:
+            return f"Error: {err}"
+        except DatabaseError as err:
+            return f"Transaction Failed: {err}"
+        return "DB Connection Failed" if result is None else result
+
+    def cancel_reservation(self, reservation_id):
+        """
+        Cancels a waiting reservation (the member leaves the queue).
+
+        Returns:
+            str: A message indicating success or failure.
+        """
+        def work(cursor):
+            cursor.execute("UPDATE reservations SET status = 'CANCELLED' "
+                           "WHERE reservation_id = %s AND status = 'WAITING'", (reservation_id,))
+            if cursor.rowcount == 0:
+                return f"Error: Reservation {reservation_id} is not waiting."
+            return "Success: Reservation cancelled."
+
+        try:
+            result = self.transactions.run(work, name=f"Cancellation of Reservation {reservation_id}")
+        except DatabaseError as err:
+            return f"Transaction Failed: {err}"
+        return "DB Connection Failed" if result is None else result
+
+    def get_waiting_reservations(self, book_id=None, as_dict=False):
+        """
+        Retrieves the waiting reservations in queue order (of one book, or of all books).
+
+        Args:
+            book_id (int): Only the queue of this book (None = all books).
+            as_dict (bool): Return dictionaries instead of Reservation records (compatibility mode).
+
+        Returns:
+            list[Reservation]: Waiting reservations, the head of each queue first.
+        """
+        conn = self.db.connect(read_only=True)
+        if not conn:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            if book_id is None:
+                cursor.execute(self.QUEUE_QUERY + " ORDER BY r.book_id, r.reservation_id")
+            else:
+                cursor.execute(self.QUEUE_QUERY + " AND r.book_id = %s ORDER BY r.reservation_id", (book_id,))
+            return to_records(cursor.fetchall(), Reservation, as_dict)
+        except DatabaseError as err:
+            print(f"Error fetching reservations: {err}")
+            return []
+        finally:
+            cursor.close()
+            self.db.close()
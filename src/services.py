@@ -0,0 +1,141 @@
+import functools
+
+
+class ServiceContainer:
+    """
+    Lazily creates the repositories and services used by the UI layers (menu, CLI).
+
+    Each service (and the modules it needs, including the MySQL driver) is imported
+    and instantiated only when it is used for the first time, so starting the
+    application or running a single CLI command pays only for what it really uses.
+
+    With "backend": "memory" in settings.json (or backend = 'memory' set on the
+    container) the in-memory implementations from memory_backend.py are used
+    instead and no database is needed.
+
+    With branches configured in settings.json, branch_id selects the branch
+    database (shard) used by the services; None is the default database, whose
+    reports cover all branches.
+    """
+
+    # None = use the 'backend' setting from settings.json
+    backend = None
+    branch_id = None
+
+    SERVICES = ('book_repo', 'member_repo', 'loan_service', 'reservation_service', 'notification_outbox',
+                'import_service', 'report_service', 'migration_service')
+
+    def use_branch(self, branch_id):
+        """
+        Switches the services to the database of another branch (created again on next use).
+
+        Args:
+            branch_id (int): ID of the branch (None = the default database).
+        """
+        if branch_id != self.branch_id:
+            self.branch_id = branch_id
+            for name in self.SERVICES:
+                self.__dict__.pop(name, None)
+
+    @functools.cached_property
+    def backend_name(self):
+        if self.backend:
+            return self.backend
+        from settings import load_settings
+        try:
+            return load_settings()['database'].get('backend', 'mysql')
+        except FileNotFoundError:
+            return 'mysql'
+
+    @functools.cached_property
+    def memory_store(self):
+        """
+        Data of the in-memory backend (None for the database backends).
+        """
+        if self.backend_name != 'memory':
+            return None
+        from memory_backend import MemoryStore
+        return MemoryStore.with_sample_data()
+
+    @functools.cached_property
+    def book_repo(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryBookRepository
+            return MemoryBookRepository(self.memory_store)
+        from book_repository import BookRepository
+        return BookRepository(self.branch_id)
+
+    @functools.cached_property
+    def member_repo(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryMemberRepository
+            return MemoryMemberRepository(self.memory_store)
+        from member_repository import MemberRepository
+        return MemberRepository(self.branch_id)
+
+    @functools.cached_property
+    def loan_service(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryLoanService
+            return MemoryLoanService(self.memory_store)
+        from loan_service import LoanService
+        return LoanService(self.branch_id)
+
+    @functools.cached_property
+    def reservation_service(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryReservationService
+            return MemoryReservationService(self.memory_store)
+        from reservation_service import ReservationService
+        return ReservationService(self.branch_id)
+
+    @functools.cached_property
+    def notification_outbox(self):
+        from settings import load_settings
+        try:
+            settings = load_settings()['app'].get('notifications') or {}
+        except FileNotFoundError:
+            settings = {}
+        options = {'batch_size': settings.get('batch_size', 100), 'max_attempts': settings.get('max_attempts', 5),
+                   'interval': settings.get('dispatch_interval_seconds', 5),
+                   'claim_seconds': settings.get('claim_seconds', 300)}
+        if self.memory_store is not None:
+            from memory_backend import MemoryNotificationOutbox
+            return MemoryNotificationOutbox(self.memory_store, **options)
+        from notification_outbox import NotificationOutbox
+        return NotificationOutbox(self.branch_id, **options)
+
+    def change_feed(self, after_id=0, skipped=()):
+        """
+        Returns a new change feed positioned after 'after_id' (every consumer needs its own),
+        still looking up the event IDs 'skipped' by the consumer's previous feed.
+        """
+        if self.memory_store is not None:
+            from memory_backend import MemoryChangeFeed
+            return MemoryChangeFeed(self.memory_store, after_id, skipped=skipped)
+        from change_feed import ChangeFeed
+        return ChangeFeed(self.branch_id, after_id, skipped=skipped)
+
+    @functools.cached_property
+    def import_service(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryImportService
+            return MemoryImportService(self.memory_store)
+        from import_service import ImportService
+        return ImportService(self.branch_id)
+
+    @functools.cached_property
+    def report_service(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryReportingService
+            return MemoryReportingService(self.memory_store)
+        from reporting_service import ReportingService
+        return ReportingService(self.branch_id)
+
+    @functools.cached_property
+    def migration_service(self):
+        if self.memory_store is not None:
+            from memory_backend import MemoryMigrationService
+            return MemoryMigrationService()
+        from migration_service import MigrationService
+        return MigrationService(self.branch_id)
@@ -0,0 +1,39 @@
+import functools
+import json
+import os
+import sys
+
+
+def get_base_dir():
+    """
+    Returns the application base directory (the folder containing 'config' and 'data').
+
+    It handles path resolution for two scenarios:
+    1. Running as a script (development environment).
+    2. Running as a compiled EXE file (production/frozen environment).
+
+    Returns:
+        str: Absolute path of the base directory.
+    """
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=None)
+def load_settings():
+    """
+    Loads 'config/settings.json'.
+
+    The file is read and parsed only once per process; every later call returns the
+    same (shared) dictionary, so do not modify the result.
+
+    Returns:
+        dict: The complete configuration (sections 'database', 'app', ...).
+
+    Raises:
+        FileNotFoundError: If the configuration file does not exist.
+    """
+    config_path = os.path.join(get_base_dir(), 'config', 'settings.json')
+    with open(config_path, 'r') as file:
+        return json.load(file)
@@ -0,0 +1,300 @@
+import bisect
+import heapq
+import re
+import threading
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+class TitlePrefixIndex:
+    """
+    In-memory prefix index over book titles used for as-you-type autocomplete.
+
+    Titles are kept in one sorted array of (folded_title, book_id) keys. All titles
+    starting with a prefix form a contiguous range of that array, which is found
+    with a binary search (bisect), so a lookup costs O(log n + results) even for
+    a catalogue with millions of books.
+    """
+
+    def __init__(self, pairs=()):
+        """
+        Args:
+            pairs (iterable[tuple[int, str]]): Initial (book_id, title) pairs.
+        """
+        self._titles = {}
+        for book_id, title in pairs:
+            self._titles[book_id] = title
+        self._keys = sorted((self._fold(title), book_id) for book_id, title in self._titles.items())
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @staticmethod
+    def _fold(text):
+        """
+        Normalizes text for case-insensitive comparison.
+        """
+        return text.strip().casefold()
+
+    def add(self, book_id, title):
+        """
+        Adds (or replaces) the title of a book.
+        """
+        with self._lock:
+            self._remove_locked(book_id)
+            self._titles[book_id] = title
+            bisect.insort(self._keys, (self._fold(title), book_id))
+
+    def remove(self, book_id):
+        """
+        Removes a book from the index (no-op if it is not indexed).
+        """
+        with self._lock:
+            self._remove_locked(book_id)
+
+    def _remove_locked(self, book_id):
+        title = self._titles.pop(book_id, None)
+        if title is None:
+            return
+        key = (self._fold(title), book_id)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns books whose title starts with the given prefix (case-insensitive),
+        in alphabetical order.
+
+        Args:
+            prefix (str): Text typed so far.
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            list[tuple[int, str]]: (book_id, title) pairs.
+        """
+        folded = self._fold(prefix)
+        results = []
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (folded,))
+            while i < len(self._keys) and len(results) < limit:
+                key, book_id = self._keys[i]
+                if not key.startswith(folded):
+                    break
+                results.append((book_id, self._titles[book_id]))
+                i += 1
+        return results
+
+
+class TitleTrigramIndex:
+    """
+    In-memory trigram index for typo-tolerant (fuzzy) title lookup.
+
+    Titles are split into words and every distinct word is split into trigrams
+    (3 character windows padded with spaces, as in PostgreSQL pg_trgm). Two
+    inverted indexes with compact array('i') posting lists (4 bytes per entry
+    instead of a Python int object) are kept:
+        trigram -> IDs of vocabulary words containing the trigram
+        word    -> IDs of books whose title contains the word
+
+    A lookup first maps every query word to the most similar vocabulary words
+    (a misspelled word still shares most of its trigrams with the correct one),
+    then takes the books of the most selective query word as candidates and ranks
+    them by how well their title covers all query words. The cost depends on the
+    vocabulary and the number of candidates, not on the size of the catalogue.
+    """
+
+    def __init__(self, pairs=(), scan_budget=20000, words_per_term=5, candidate_limit=1000):
+        """
+        Args:
+            pairs (iterable[tuple[int, str]]): Initial (book_id, title) pairs.
+            scan_budget (int): Maximum number of posting entries read per query word
+                (longer lists are skipped or checked per candidate).
+            words_per_term (int): Number of similar vocabulary words considered per query word.
+            candidate_limit (int): Maximum number of titles ranked per lookup.
+        """
+        self.scan_budget = scan_budget
+        self.words_per_term = words_per_term
+        self.candidate_limit = candidate_limit
+        self._titles = {}
+        self._words = []
+        self._word_ids = {}
+        self._trigram_postings = {}
+        self._word_postings = []
+        self._stale_entries = 0
+        self._lock = threading.Lock()
+        for book_id, title in pairs:
+            self._add_locked(book_id, title)
+
+    def __len__(self):
+        return len(self._titles)
+
+    @staticmethod
+    def split_words(text):
+        """
+        Splits a text into lower-case words (punctuation is ignored).
+        """
+        return _NON_WORD.sub(" ", text.casefold()).split()
+
+    @staticmethod
+    def trigrams(word):
+        """
+        Returns the set of trigrams of a single word.
+
+        Example: 'dune' -> {'  d', ' du', 'dun', 'une', 'ne '}
+        """
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, book_id, title):
+        """
+        Adds (or replaces) the title of a book.
+        """
+        with self._lock:
+            self._add_locked(book_id, title)
+
+    def _add_locked(self, book_id, title):
+        if book_id in self._titles:
+            self._remove_locked(book_id)
+        self._titles[book_id] = title
+        for word in set(self.split_words(title)):
+            word_id = self._word_ids.get(word)
+            if word_id is None:
+                word_id = self._register_word(word)
+            self._word_postings[word_id].append(book_id)
+
+    def _register_word(self, word):
+        """
+        Adds a new word to the vocabulary and to the trigram postings.
+
+        Returns:
+            int: ID of the word.
+        """
+        word_id = len(self._words)
+        self._words.append(word)
+        self._word_ids[word] = word_id
+        self._word_postings.append(array('i'))
+        for trigram in self.trigrams(word):
+            postings = self._trigram_postings.get(trigram)
+            if postings is None:
+                postings = self._trigram_postings[trigram] = array('i')
+            postings.append(word_id)
+        return word_id
+
+    def remove(self, book_id):
+        """
+        Removes a book from the index (no-op if it is not indexed).
+        """
+        with self._lock:
+            self._remove_locked(book_id)
+
+    def _remove_locked(self, book_id):
+        # Posting entries are not deleted one by one (that would be O(n) per list);
+        # they are skipped during lookups and dropped by the next compaction.
+        title = self._titles.pop(book_id, None)
+        if title is None:
+            return
+        self._stale_entries += len(set(self.split_words(title)))
+        if self._stale_entries > 1000 and self._stale_entries > len(self._titles):
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """
+        Rebuilds the word posting lists without entries of removed books.
+        """
+        self._stale_entries = 0
+        self._word_postings = [array('i') for _ in self._words]
+        for book_id, title in self._titles.items():
+            for word in set(self.split_words(title)):
+                self._word_postings[self._word_ids[word]].append(book_id)
+
+    def _similar_words(self, word, min_similarity):
+        """
+        Finds vocabulary words similar to a (possibly misspelled) query word.
+
+        Returns:
+            dict[int, float]: Word ID -> trigram similarity (Dice coefficient, 0..1).
+        """
+        query = self.trigrams(word)
+        # Rarest trigrams first: they are the most selective and the cheapest to read
+        lists = sorted((self._trigram_postings[t] for t in query if t in self._trigram_postings), key=len)
+        counts = Counter()
+        scanned = 0
+        for postings in lists:
+            if scanned and scanned + len(postings) > self.scan_budget:
+                break
+            counts.update(postings)
+            scanned += len(postings)
+
+        similar = []
+        for word_id, _ in heapq.nlargest(self.words_per_term * 4, counts.items(), key=itemgetter(1)):
+            candidate = self.trigrams(self._words[word_id])
+            similarity = 2 * len(query & candidate) / (len(query) + len(candidate))
+            if similarity >= min_similarity:
+                similar.append((similarity, word_id))
+        similar.sort(reverse=True)
+        return {word_id: similarity for similarity, word_id in similar[:self.words_per_term]}
+
+    def search(self, text, limit=10, min_similarity=0.3):
+        """
+        Finds titles similar to the (possibly misspelled) text.
+
+        Args:
+            text (str): Searched title or its part.
+            limit (int): Maximum number of results.
+            min_similarity (float): Minimal similarity of a word and of the whole title (0..1).
+
+        Returns:
+            list[tuple[int, str, float]]: (book_id, title, similarity), the best match first.
+        """
+        query_words = list(dict.fromkeys(self.split_words(text)))
+        if not query_words:
+            return []
+
+        with self._lock:
+            terms = [t for t in (self._similar_words(w, min_similarity) for w in query_words) if t]
+            if not terms:
+                return []
+            terms.sort(key=lambda term: sum(len(self._word_postings[w]) for w in term))
+
+            # Books containing a word of the term -> best similarity of that word.
+            # Terms with very long posting lists (common words) are checked per candidate instead.
+            term_hits = []
+            for term in terms:
+                if term_hits and sum(len(self._word_postings[w]) for w in term) > self.scan_budget:
+                    break
+                hits = {}
+                for word_id, similarity in term.items():
+                    for book_id in self._word_postings[word_id]:
+                        if hits.get(book_id, 0.0) < similarity:
+                            hits[book_id] = similarity
+                term_hits.append(hits)
+            common_terms = terms[len(term_hits):]
+
+            # Candidates are the books of the most selective query word
+            candidates = term_hits[0]
+            if len(candidates) > self.candidate_limit:
+                candidates = dict(heapq.nlargest(self.candidate_limit, candidates.items(), key=itemgetter(1)))
+
+            results = []
+            for book_id in candidates:
+                title = self._titles.get(book_id)
+                if title is None:
+                    continue
+                score = sum(hits.get(book_id, 0.0) for hits in term_hits)
+                if common_terms:
+                    title_word_ids = {self._word_ids[w] for w in self.split_words(title)}
+                    score += sum(
+                        max((sim for word_id, sim in term.items() if word_id in title_word_ids), default=0.0)
+                        for term in common_terms
+                    )
+                score /= len(query_words)
+                if score >= min_similarity:
+                    results.append((score, len(title), book_id, title))
+
+        results.sort(key=lambda r: (-r[0], r[1], r[3]))
+        return [(book_id, title, round(score, 3)) for score, _, book_id, title in results[:limit]]
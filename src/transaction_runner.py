@@ -0,0 +1,177 @@
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from backends import DatabaseError
+
+try:
+    from mysql.connector import errorcode
+except ImportError:  # SQLite-only installation
+    errorcode = None
+
+if errorcode:
+    # Transient server-side conflicts: the transaction was rolled back and can simply run again
+    CONFLICT_ERRORS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+    # The pooled connection is dead (server restart, idle timeout, network drop): reconnect and run again
+    CONNECTION_ERRORS = {errorcode.CR_SERVER_GONE_ERROR, errorcode.CR_SERVER_LOST}
+else:
+    CONFLICT_ERRORS = {1213, 1205}
+    CONNECTION_ERRORS = {2006, 2013}
+
+
+class TransactionMetrics:
+    """
+    Process-wide counters of transaction attempts (shared by all runners).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = Counter()
+            self._errors = Counter()
+            self._attempt_seconds = 0.0
+
+    def record(self, outcome, seconds, error_code=None):
+        """
+        Records one attempt.
+
+        Args:
+            outcome (str): 'committed', 'retried', 'reconnected' or 'failed'.
+            seconds (float): Duration of the attempt.
+            error_code (object): errno of the error that ended the attempt (if any).
+        """
+        with self._lock:
+            self._counts['attempts'] += 1
+            self._counts[outcome] += 1
+            self._attempt_seconds += seconds
+            if error_code is not None:
+                self._errors[error_code] += 1
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: attempts, committed, retried, reconnected, failed, errors (errno -> count)
+            and avg_attempt_ms.
+        """
+        with self._lock:
+            attempts = self._counts['attempts']
+            stats = {key: self._counts[key] for key in ('attempts', 'committed', 'retried', 'reconnected', 'failed')}
+            stats['errors'] = dict(self._errors)
+            stats['avg_attempt_ms'] = round(self._attempt_seconds * 1000 / attempts, 3) if attempts else 0.0
+            return stats
+
+
+class TransactionRunner:
+    """
+    Runs a unit of work in a database transaction, retrying transient failures.
+
+    Deadlocks (1213) and lock wait timeouts (1205) roll the transaction back on the
+    server; the whole unit of work is run again after a short random (jittered)
+    exponential backoff, so competing transactions do not collide again in lockstep.
+    A dropped connection (2006, 2013) is discarded from the pool and the work is
+    run again on a fresh connection. With SQLite, 'database is locked' is retried.
+    Any other error is not retried.
+
+    The unit of work must only use the database (no side effects outside the
+    transaction), because it may run more than once. It should also check the
+    current state first (as borrow_book checks availability): if the connection
+    drops during COMMIT, the transaction may have been committed before the retry.
+    """
+
+    metrics = TransactionMetrics()
+
+    def __init__(self, db, max_attempts=4, base_delay=0.02, max_delay=0.5):
+        """
+        Args:
+            db (DatabaseConnection): Connection manager (or a BranchConnection).
+            max_attempts (int): Maximum number of attempts per transaction.
+            base_delay (float): Backoff before the second attempt in seconds (doubled for each next one).
+            max_delay (float): Upper bound of the backoff in seconds.
+        """
+        self.db = db
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @staticmethod
+    def classify(err):
+        """
+        Decides whether an error is transient.
+
+        Returns:
+            str: 'conflict' (retry), 'connection' (reconnect and retry) or None (do not retry).
+        """
+        errno = getattr(err, 'errno', None)
+        if errno in CONFLICT_ERRORS:
+            return 'conflict'
+        if errno in CONNECTION_ERRORS:
+            return 'connection'
+        if isinstance(err, sqlite3.OperationalError) and 'locked' in str(err):
+            return 'conflict'
+        return None
+
+    def backoff(self, attempt):
+        """
+        Returns the delay before the next attempt ("full jitter": random up to the exponential bound).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def run(self, work, name="Transaction"):
+        """
+        Runs work(cursor) in a transaction and commits it.
+
+        Args:
+            work (callable): Function (cursor) -> result. Raising an error rolls the transaction back.
+            name (str): Label used in log messages.
+
+        Returns:
+            object: Result of the work, or None if no database connection could be opened.
+
+        Raises:
+            DatabaseError: The last error, if it is not transient or all attempts failed.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            conn = self.db.connect()
+            if not conn:
+                return None
+
+            cursor = None
+            broken = False
+            started = time.perf_counter()
+            try:
+                conn.autocommit = False
+                cursor = conn.cursor()
+                result = work(cursor)
+                conn.commit()
+                self.metrics.record('committed', time.perf_counter() - started)
+                return result
+            except DatabaseError as err:
+                kind = self.classify(err)
+                broken = kind == 'connection'
+                if not broken:
+                    self._rollback(conn)
+                errno = getattr(err, 'errno', None)
+                if kind is None or attempt == self.max_attempts:
+                    self.metrics.record('failed', time.perf_counter() - started, errno)
+                    raise
+                self.metrics.record('reconnected' if broken else 'retried', time.perf_counter() - started, errno)
+                print(f"--- {name} attempt {attempt} failed ({err}), retrying ---")
+            finally:
+                if cursor is not None and not broken:
+                    cursor.close()
+                # A dead connection is closed instead of going back to the pool
+                self.db.close(discard=broken)
+
+            if not broken:
+                time.sleep(self.backoff(attempt))
+
+    @staticmethod
+    def _rollback(conn):
+        try:
+            conn.rollback()
+        except DatabaseError:
+            pass